@@ -0,0 +1,104 @@
+"""
+文檔歷史增量存儲基準測試
+
+在內存中模擬一個文檔的連續編輯（每個版本修改、插入或刪除少量段落），比較每個版本
+保存完整快照與定期快照加行級增量兩種方式的存儲字節數，以及在不同快照間隔下
+重建任意一個版本的耗時。不需要數據庫。
+
+用法：
+    python benchmarks/bench_history_delta.py --revisions 200 --paragraphs 400
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.backend.knowledge_api.services.history_delta import (  # noqa: E402
+    apply_delta,
+    encode_revision,
+)
+
+
+def generate_revisions(revisions: int, paragraphs: int, seed: int):
+    """生成一串版本內容：每次隨機修改、插入或刪除一到三個段落"""
+    rng = random.Random(seed)
+    lines = [f"第 {i} 段：" + "知識庫內容 " * rng.randint(5, 20) for i in range(paragraphs)]
+    contents = ["\n".join(lines)]
+    for revision in range(1, revisions):
+        for _ in range(rng.randint(1, 3)):
+            position = rng.randrange(len(lines))
+            action = rng.random()
+            if action < 0.6:
+                lines[position] = f"第 {position} 段（修訂 {revision}）：" + "更新內容 " * rng.randint(5, 20)
+            elif action < 0.8 or len(lines) < 2:
+                lines.insert(position, f"新增段落 {revision}：" + "補充說明 " * rng.randint(5, 20))
+            else:
+                del lines[position]
+        contents.append("\n".join(lines))
+    return contents
+
+
+def encode_all(contents, interval: int):
+    """按快照間隔編碼全部版本，返回 [(快照內容, 增量)]"""
+    stored = []
+    previous = None
+    for revision, content in enumerate(contents, start=1):
+        stored.append(encode_revision(revision, previous, content, interval))
+        previous = content
+    return stored
+
+
+def reconstruct(stored, revision: int) -> str:
+    """從不晚於 revision 的最近快照開始應用增量，重建該版本"""
+    start = revision
+    while stored[start - 1][0] is None:
+        start -= 1
+    content = stored[start - 1][0]
+    for _, delta in stored[start:revision]:
+        content = apply_delta(content, delta)
+    return content
+
+
+def stored_bytes(stored) -> int:
+    return sum(len((content or "").encode("utf-8")) + len((delta or "").encode("utf-8")) for content, delta in stored)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--revisions", type=int, default=200)
+    parser.add_argument("--paragraphs", type=int, default=400)
+    parser.add_argument("--intervals", type=int, nargs="+", default=[1, 10, 20, 50])
+    parser.add_argument("--samples", type=int, default=50, help="測量重建耗時的隨機版本數")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    contents = generate_revisions(args.revisions, args.paragraphs, args.seed)
+    full_bytes = sum(len(content.encode("utf-8")) for content in contents)
+    rng = random.Random(args.seed)
+    sample = [rng.randint(1, len(contents)) for _ in range(args.samples)]
+    print(f"{len(contents)} revisions, {full_bytes / 1024:.0f} KiB as full snapshots")
+
+    print(f"{'interval':>8}{'encode s':>10}{'KiB':>10}{'ratio':>8}{'rebuild ms p50':>16}{'p max':>8}")
+    for interval in args.intervals:
+        started = time.perf_counter()
+        stored = encode_all(contents, interval)
+        encode_seconds = time.perf_counter() - started
+
+        timings = []
+        for revision in sample:
+            started = time.perf_counter()
+            content = reconstruct(stored, revision)
+            timings.append((time.perf_counter() - started) * 1000)
+            assert content == contents[revision - 1]
+
+        size = stored_bytes(stored)
+        print(f"{interval:>8}{encode_seconds:>10.2f}{size / 1024:>10.0f}{full_bytes / size:>7.1f}x"
+              f"{statistics.median(timings):>16.2f}{max(timings):>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+工單寫入事務基準測試
+
+比較兩種寫入模式的吞吐量：
+  two-commit   實體 commit + refresh 後再以第二個事務寫入歷史記錄（舊實現）
+  single-unit  flush 取得主鍵，歷史記錄在同一事務中寫入，只提交一次（現實現）
+
+使用與 tickets / ticket_history 結構相同的臨時表，默認連接 Settings.DATABASE_URL，
+也可以通過 --database-url 指定其他數據庫（例如 sqlite:///bench.db）。
+
+用法：
+    python benchmarks/bench_ticket_writes.py --writes 2000
+"""
+import argparse
+import sys
+import time
+import uuid
+from pathlib import Path
+
+from sqlalchemy import JSON, Column, DateTime, ForeignKey, String, Text, Uuid, create_engine, func
+from sqlalchemy.orm import declarative_base, sessionmaker
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.config import settings  # noqa: E402
+
+Base = declarative_base()
+
+
+class BenchTicket(Base):
+    __tablename__ = "bench_tickets"
+
+    id = Column(Uuid, primary_key=True, default=uuid.uuid4)
+    title = Column(String(200), nullable=False)
+    description = Column(Text, nullable=False)
+    created_at = Column(DateTime, nullable=False, server_default=func.now())
+
+
+class BenchTicketHistory(Base):
+    __tablename__ = "bench_ticket_history"
+
+    id = Column(Uuid, primary_key=True, default=uuid.uuid4)
+    ticket_id = Column(Uuid, ForeignKey("bench_tickets.id"), nullable=False)
+    action = Column(String(50), nullable=False)
+    changes = Column(JSON)
+    created_at = Column(DateTime, nullable=False, server_default=func.now())
+
+
+def two_commit(session, i: int) -> None:
+    ticket = BenchTicket(title=f"ticket {i}", description="benchmark")
+    session.add(ticket)
+    session.commit()
+    session.refresh(ticket)
+
+    session.add(BenchTicketHistory(ticket_id=ticket.id, action="created", changes={"ticket": "created"}))
+    session.commit()
+
+
+def single_unit(session, i: int) -> None:
+    ticket = BenchTicket(title=f"ticket {i}", description="benchmark")
+    session.add(ticket)
+    session.flush()
+
+    session.add(BenchTicketHistory(ticket_id=ticket.id, action="created", changes={"ticket": "created"}))
+    session.commit()
+    session.refresh(ticket)
+
+
+def run(factory, write, writes: int) -> float:
+    """返回每秒寫入次數"""
+    started = time.perf_counter()
+    for i in range(writes):
+        with factory() as session:
+            write(session, i)
+    return writes / (time.perf_counter() - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    parser.add_argument("--writes", type=int, default=2000)
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+
+    try:
+        # 預熱連接池
+        run(factory, single_unit, min(50, args.writes))
+
+        results = {
+            "two-commit": run(factory, two_commit, args.writes),
+            "single-unit": run(factory, single_unit, args.writes),
+        }
+        for name, rate in results.items():
+            print(f"{name:<12} {rate:>10.1f} writes/s")
+        print(f"speedup      {results['single-unit'] / results['two-commit']:>10.2f}x")
+    finally:
+        Base.metadata.drop_all(engine)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+pg_trgm 子串搜索基準測試
+
+在獨立的臨時表中生成指定行數的數據，分別測量無索引和建立 pg_trgm GIN 索引後
+ILIKE '%term%' 查詢的耗時。需要可寫的 PostgreSQL 數據庫（默認使用 Settings.DATABASE_URL）。
+
+用法：
+    python benchmarks/bench_trigram_search.py --rows 1000000
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from sqlalchemy import create_engine, text
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.config import settings  # noqa: E402
+from src.database.trigram import escape_like  # noqa: E402
+
+TABLE = "bench_trigram_tickets"
+
+# 罕見詞（選擇性高）和常見詞（選擇性低）各一個
+TERMS = ["printer-7f3a", "network"]
+
+
+def seed(conn, rows: int) -> None:
+    """生成測試數據：標題和描述由詞彙表單詞和隨機 md5 片段組成"""
+    conn.execute(text(f"DROP TABLE IF EXISTS {TABLE}"))
+    conn.execute(text(f"CREATE TABLE {TABLE} (id bigserial PRIMARY KEY, title text NOT NULL, description text NOT NULL)"))
+    conn.execute(text(f"""
+        INSERT INTO {TABLE} (title, description)
+        SELECT
+            (ARRAY['vpn', 'printer', 'network', 'password', 'laptop', 'email'])[1 + i % 6]
+                || ' ' || substr(md5(i::text), 1, 8),
+            'ticket ' || i || ' ' || md5((i * 7)::text) || ' ' || md5((i * 13)::text)
+                || CASE WHEN i % 50000 = 0 THEN ' printer-7f3a' ELSE '' END
+        FROM generate_series(1, :rows) AS s(i)
+    """), {"rows": rows})
+    conn.execute(text(f"ANALYZE {TABLE}"))
+
+
+def create_indexes(conn) -> None:
+    conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    conn.execute(text(f"CREATE INDEX {TABLE}_title_trgm ON {TABLE} USING gin (title gin_trgm_ops)"))
+    conn.execute(text(f"CREATE INDEX {TABLE}_description_trgm ON {TABLE} USING gin (description gin_trgm_ops)"))
+    conn.execute(text(f"ANALYZE {TABLE}"))
+
+
+def measure(conn, term: str, repeat: int):
+    """返回查詢耗時中位數（毫秒）、匹配行數和執行計劃首行"""
+    query = text(
+        f"SELECT id FROM {TABLE} "
+        f"WHERE title ILIKE :pattern ESCAPE '\\' OR description ILIKE :pattern ESCAPE '\\' "
+        f"LIMIT 100"
+    )
+    params = {"pattern": f"%{escape_like(term)}%"}
+    plan = conn.execute(text(f"EXPLAIN {query.text}"), params).scalars().all()
+
+    timings = []
+    matched = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        matched = len(conn.execute(query, params).all())
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), matched, plan[0].strip()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--keep", action="store_true", help="保留測試表")
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    with engine.begin() as conn:
+        started = time.perf_counter()
+        seed(conn, args.rows)
+        print(f"seeded {args.rows} rows in {time.perf_counter() - started:.1f}s")
+
+    try:
+        with engine.connect() as conn:
+            baseline = {term: measure(conn, term, args.repeat) for term in TERMS}
+
+        with engine.begin() as conn:
+            started = time.perf_counter()
+            create_indexes(conn)
+            print(f"built trigram indexes in {time.perf_counter() - started:.1f}s")
+
+        with engine.connect() as conn:
+            indexed = {term: measure(conn, term, args.repeat) for term in TERMS}
+
+        print(f"{'term':<16}{'rows':>6}{'seq scan ms':>14}{'trigram ms':>13}{'speedup':>10}")
+        for term in TERMS:
+            before_ms, matched, before_plan = baseline[term]
+            after_ms, _, after_plan = indexed[term]
+            print(f"{term:<16}{matched:>6}{before_ms:>14.1f}{after_ms:>13.1f}{before_ms / after_ms:>9.1f}x")
+            print(f"  before: {before_plan}")
+            print(f"  after:  {after_plan}")
+    finally:
+        if not args.keep:
+            with engine.begin() as conn:
+                conn.execute(text(f"DROP TABLE IF EXISTS {TABLE}"))
+
+
+if __name__ == "__main__":
+    main()
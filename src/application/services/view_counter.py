@@ -0,0 +1,28 @@
+from abc import ABC, abstractmethod
+from typing import Dict
+import uuid
+
+# 瀏覽計數的實體類型
+VIEW_COUNT_KINDS = ("document", "question")
+
+
+class ViewCounter(ABC):
+    """瀏覽計數緩衝介面
+
+    讀取端只累加增量，由後台任務定期把增量批量寫回數據庫，避免每次瀏覽都鎖定行。
+    """
+
+    @abstractmethod
+    def increment(self, kind: str, entity_id: uuid.UUID, amount: int = 1) -> int:
+        """累加瀏覽次數，返回該實體尚未寫回數據庫的增量"""
+        pass
+
+    @abstractmethod
+    def drain(self) -> Dict[str, Dict[uuid.UUID, int]]:
+        """取出並清空全部待寫回的增量，按實體類型分組"""
+        pass
+
+    @abstractmethod
+    def restore(self, counts: Dict[str, Dict[uuid.UUID, int]]) -> None:
+        """寫回失敗時把取出的增量放回緩衝區"""
+        pass
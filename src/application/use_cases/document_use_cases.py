@@ -5,6 +5,7 @@ from ...domain.entities.document import Document
 from ...domain.repositories.document_repository import DocumentRepository
 from ...domain.events.event_publisher import EventPublisher
 from ...domain.events.document_events import DocumentViewed, DocumentTagAdded, DocumentTagRemoved
+from ..services.view_counter import ViewCounter
 
 
 class CreateDocumentUseCase:
@@ -73,9 +74,11 @@ class UpdateDocumentUseCase:
 class GetDocumentUseCase:
     """獲取文檔用例"""
     
-    def __init__(self, document_repository: DocumentRepository, event_publisher: EventPublisher):
+    def __init__(self, document_repository: DocumentRepository, event_publisher: EventPublisher,
+                 view_counter: Optional[ViewCounter] = None):
         self.document_repository = document_repository
         self.event_publisher = event_publisher
+        self.view_counter = view_counter
     
     def execute(self, document_id: uuid.UUID, viewer_id: Optional[uuid.UUID] = None) -> Optional[Document]:
         # 獲取文檔
@@ -83,9 +86,13 @@ class GetDocumentUseCase:
         if not document:
             return None
         
-        # 增加瀏覽次數
-        document.increment_view_count()
-        updated_document = self.document_repository.save(document)
+        # 增加瀏覽次數：有瀏覽計數緩衝時只累加增量，不寫回文檔
+        if self.view_counter is not None:
+            document.view_count += self.view_counter.increment("document", document_id)
+            updated_document = document
+        else:
+            document.increment_view_count()
+            updated_document = self.document_repository.save(document)
         
         # 發布瀏覽事件
         view_event = DocumentViewed(
@@ -5,6 +5,12 @@ import os
 import logging
 from typing import List
 
+from src.config import settings
+from src.database.async_session import dispose_async_engine
+from src.database.db import get_pool_status
+from ..shared.threadpool import configure_threadpool
+from ...infrastructure.counters.view_count_flusher import create_view_count_flusher
+
 # 配置日誌
 logging.basicConfig(
     level=logging.INFO,
@@ -35,6 +41,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 瀏覽計數寫回任務
+view_count_flusher = create_view_count_flusher()
+
 # 包含路由 - 暫時註解掉避免導入錯誤
 # app.include_router(documents.router, prefix="/api/documents", tags=["documents"])
 # app.include_router(questions.router, prefix="/api/questions", tags=["questions"])
@@ -50,6 +59,9 @@ app.include_router(document_approval.router, prefix="/api", tags=["document-appr
 @app.on_event("startup")
 async def startup_event():
     logger.info("Starting up Knowledge API")
+    # 同步路由在線程池中執行，線程數與數據庫連接池對齊
+    configure_threadpool(settings.DB_THREADPOOL_SIZE)
+    view_count_flusher.start()
     # 初始化數據庫 - 暫時註解掉
     # init_db()
     logger.info("Database initialized")
@@ -59,6 +71,9 @@ async def startup_event():
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info("Shutting down Knowledge API")
+    # 寫回剩餘的瀏覽增量
+    view_count_flusher.stop()
+    await dispose_async_engine()
 
 
 # 健康檢查端點
@@ -67,6 +82,12 @@ async def health_check():
     return {"status": "healthy", "service": "knowledge_api"}
 
 
+# 連接池狀態端點，用於按工作進程數調整連接池大小
+@app.get("/health/db-pool")
+async def db_pool_health():
+    return get_pool_status()
+
+
 # 根路由
 @app.get("/")
 async def root():
@@ -1,9 +1,13 @@
-from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, String, Text, func, Table
+from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Index, Integer, String, Text, func, Table
 from sqlalchemy.dialects.postgresql import UUID, JSONB, TSVECTOR
 from sqlalchemy.orm import relationship
 import uuid
 
 from database.session import Base
+from database.trigram import enable_pg_trgm, trigram_index
+
+# 子串搜索使用的 pg_trgm 擴展
+enable_pg_trgm(Base.metadata)
 
 
 # 文檔與標籤的多對多關聯表
@@ -17,11 +21,17 @@ document_tag = Table(
 
 class Category(Base):
     __tablename__ = "categories"
+    __table_args__ = (
+        # 子樹查詢使用路徑前綴匹配
+        Index("ix_categories_path", "path", postgresql_ops={"path": "text_pattern_ops"}),
+    )
     
     id = Column(UUID, primary_key=True, default=uuid.uuid4)
     name = Column(String(100), nullable=False)
     description = Column(Text)
     parent_id = Column(UUID, ForeignKey("categories.id"))
+    # 物化路徑 /<根分類ID>/.../<本分類ID>/，由分類的創建和移動維護
+    path = Column(Text, nullable=False)
     created_at = Column(DateTime, nullable=False, server_default=func.now())
     updated_at = Column(DateTime, nullable=False, server_default=func.now(), onupdate=func.now())
     
@@ -32,6 +42,12 @@ class Category(Base):
 
 class Document(Base):
     __tablename__ = "documents"
+    __table_args__ = (
+        # 文檔列表子串搜索
+        trigram_index("ix_documents_title_trgm", "title"),
+        trigram_index("ix_documents_content_trgm", "content"),
+        trigram_index("ix_documents_summary_trgm", "summary"),
+    )
     
     id = Column(UUID, primary_key=True, default=uuid.uuid4)
     title = Column(String(200), nullable=False)
@@ -90,11 +106,22 @@ class DocumentComment(Base):
 
 class DocumentHistory(Base):
     __tablename__ = "document_history"
+    __table_args__ = (
+        # 歷史記錄鍵集分頁索引，對應 WHERE document_id = ? ORDER BY created_at DESC, id DESC
+        Index("ix_document_history_document_id_created_at_id", "document_id", "created_at", "id"),
+        # 按版本號重建內容，同時防止並發寫入產生重複版本
+        Index("uq_document_history_document_id_revision", "document_id", "revision", unique=True),
+    )
     
     id = Column(UUID, primary_key=True, default=uuid.uuid4)
     document_id = Column(UUID, ForeignKey("documents.id"), nullable=False)
     user_id = Column(UUID, ForeignKey("users.id"), nullable=False)
-    content = Column(Text, nullable=False)
+    # 文檔內從 1 遞增的版本號；舊數據為空，由 compact_document_history 腳本補齊
+    revision = Column(Integer)
+    # 完整快照，增量版本為空
+    content = Column(Text)
+    # 相對上一版本的行級增量（見 history_delta.make_delta），快照版本為空
+    delta = Column(Text)
     changes = Column(JSONB)
     created_at = Column(DateTime, nullable=False, server_default=func.now())
     
@@ -118,6 +145,11 @@ class DocumentTag(Base):
 
 class Question(Base):
     __tablename__ = "questions"
+    __table_args__ = (
+        # 問題列表子串搜索
+        trigram_index("ix_questions_title_trgm", "title"),
+        trigram_index("ix_questions_content_trgm", "content"),
+    )
     
     id = Column(UUID, primary_key=True, default=uuid.uuid4)
     title = Column(String(200), nullable=False)
@@ -139,12 +171,20 @@ class Question(Base):
 
 class Answer(Base):
     __tablename__ = "answers"
+    __table_args__ = (
+        # 回答列表排序：已接受優先，其次按得分和時間
+        Index("ix_answers_question_id_ranking", "question_id", "is_accepted", "score", "created_at"),
+    )
     
     id = Column(UUID, primary_key=True, default=uuid.uuid4)
     question_id = Column(UUID, ForeignKey("questions.id"), nullable=False)
     user_id = Column(UUID, ForeignKey("users.id"), nullable=False)
     content = Column(Text, nullable=False)
     is_accepted = Column(Boolean, nullable=False, default=False)
+    # 投票計數，由投票操作增量維護，可用 reconcile_answer_votes 腳本按 answer_votes 重算
+    upvote_count = Column(Integer, nullable=False, default=0, server_default="0")
+    downvote_count = Column(Integer, nullable=False, default=0, server_default="0")
+    score = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(DateTime, nullable=False, server_default=func.now())
     updated_at = Column(DateTime, nullable=False, server_default=func.now(), onupdate=func.now())
     accepted_at = Column(DateTime)
@@ -157,6 +197,10 @@ class Answer(Base):
 
 class AnswerVote(Base):
     __tablename__ = "answer_votes"
+    __table_args__ = (
+        # 查找用戶已有投票和按回答匯總
+        Index("ix_answer_votes_answer_id_user_id", "answer_id", "user_id"),
+    )
     
     id = Column(UUID, primary_key=True, default=uuid.uuid4)
     answer_id = Column(UUID, ForeignKey("answers.id"), nullable=False)
@@ -1,10 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
 from sqlalchemy.orm import Session
 from typing import List, Optional
 import uuid
 
 # 導入數據庫依賴
-from database.session import get_db
+from database.session import get_db, get_read_db
 
 # 導入模型和架構
 from ..models.knowledge import Category
@@ -17,18 +17,19 @@ from ..schemas.category import (
 
 # 導入服務
 from ..services.category_service import CategoryService
+from ...shared.tree_snapshot import snapshot_response
 
 # 創建路由
 router = APIRouter(prefix="/categories", tags=["categories"])
 
 
 @router.get("/", response_model=CategoryListResponse)
-async def get_categories(
+def get_categories(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
     parent_id: Optional[uuid.UUID] = None,
     search: Optional[str] = None,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """獲取分類列表，支持分頁、父分類篩選和搜索"""
     category_service = CategoryService(db)
@@ -53,7 +54,7 @@ async def get_categories(
 
 
 @router.post("/", response_model=CategoryResponse, status_code=status.HTTP_201_CREATED)
-async def create_category(category: CategoryCreate, db: Session = Depends(get_db)):
+def create_category(category: CategoryCreate, db: Session = Depends(get_db)):
     """創建新分類"""
     category_service = CategoryService(db)
     
@@ -77,7 +78,7 @@ async def create_category(category: CategoryCreate, db: Session = Depends(get_db
 
 
 @router.get("/{category_id}", response_model=CategoryResponse)
-async def get_category(category_id: uuid.UUID, db: Session = Depends(get_db)):
+def get_category(category_id: uuid.UUID, db: Session = Depends(get_db)):
     """獲取分類詳情"""
     category_service = CategoryService(db)
     category = category_service.get_category(category_id)
@@ -92,7 +93,7 @@ async def get_category(category_id: uuid.UUID, db: Session = Depends(get_db)):
 
 
 @router.put("/{category_id}", response_model=CategoryResponse)
-async def update_category(category_id: uuid.UUID, category_update: CategoryUpdate, db: Session = Depends(get_db)):
+def update_category(category_id: uuid.UUID, category_update: CategoryUpdate, db: Session = Depends(get_db)):
     """更新分類信息"""
     category_service = CategoryService(db)
     
@@ -141,7 +142,7 @@ async def update_category(category_id: uuid.UUID, category_update: CategoryUpdat
 
 
 @router.delete("/{category_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_category(category_id: uuid.UUID, db: Session = Depends(get_db)):
+def delete_category(category_id: uuid.UUID, db: Session = Depends(get_db)):
     """刪除分類"""
     category_service = CategoryService(db)
     
@@ -178,7 +179,11 @@ async def delete_category(category_id: uuid.UUID, db: Session = Depends(get_db))
 
 
 @router.get("/tree/all", response_model=List[CategoryResponse])
-async def get_category_tree(db: Session = Depends(get_db)):
-    """獲取分類樹結構"""
+def get_category_tree(request: Request, db: Session = Depends(get_db)):
+    """獲取分類樹結構
+
+    返回進程內緩存的序列化結果並附帶 ETag，請求頭 If-None-Match 匹配時返回 304。
+    快照從主庫重建：寫入遞增版本號後，副本可能尚未同步，從副本重建會把舊樹緩存在新版本下。
+    """
     category_service = CategoryService(db)
-    return category_service.get_category_tree()
\ No newline at end of file
+    return snapshot_response(category_service.get_category_tree_snapshot(), request)
\ No newline at end of file
@@ -1,11 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query, Path, Body, File, UploadFile
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Path, Body, File, UploadFile, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
 import uuid
 from datetime import datetime
 
 # 導入數據庫依賴
-from database.session import get_db
+from database.session import get_db, get_read_db
 
 # 導入模型和架構
 from ..models.knowledge import Document, DocumentAttachment, DocumentComment, DocumentHistory, DocumentTag
@@ -22,6 +23,8 @@ from ..schemas.document import (
 
 # 導入服務
 from ..services.document_service import DocumentService
+from ...shared.export import EXPORT_MEDIA_TYPES, iter_json_lines
+from ...shared.pagination import InvalidCursorError, next_cursor
 
 # 創建路由
 router = APIRouter()
@@ -31,20 +34,27 @@ def get_document_service(db: Session = Depends(get_db)):
     return DocumentService(db)
 
 
+# 只讀端點使用的文檔服務實例（可讀取副本）
+def get_read_document_service(db: Session = Depends(get_read_db)):
+    return DocumentService(db)
+
+
 @router.get("/", response_model=List[DocumentListResponse])
-async def get_documents(
+def get_documents(
     skip: int = Query(0, description="跳過的記錄數"),
     limit: int = Query(100, description="返回的最大記錄數"),
     category_id: Optional[uuid.UUID] = Query(None, description="按分類篩選"),
+    include_subcategories: bool = Query(False, description="按分類篩選時包含全部子分類"),
     creator_id: Optional[uuid.UUID] = Query(None, description="按創建者篩選"),
     is_published: Optional[bool] = Query(None, description="按發布狀態篩選"),
     tag_id: Optional[uuid.UUID] = Query(None, description="按標籤篩選"),
     search: Optional[str] = Query(None, description="搜索標題和內容"),
-    document_service: DocumentService = Depends(get_document_service)
+    document_service: DocumentService = Depends(get_read_document_service)
 ):
     """獲取文檔列表，支持分頁和篩選"""
     filters = {
         "category_id": category_id,
+        "include_subcategories": include_subcategories,
         "creator_id": creator_id,
         "is_published": is_published,
         "tag_id": tag_id,
@@ -54,7 +64,7 @@ async def get_documents(
 
 
 @router.post("/", response_model=DocumentResponse, status_code=status.HTTP_201_CREATED)
-async def create_document(
+def create_document(
     document: DocumentCreate,
     document_service: DocumentService = Depends(get_document_service)
 ):
@@ -63,9 +73,9 @@ async def create_document(
 
 
 @router.get("/{document_id}", response_model=DocumentResponse)
-async def get_document(
+def get_document(
     document_id: uuid.UUID = Path(..., description="文檔ID"),
-    document_service: DocumentService = Depends(get_document_service)
+    document_service: DocumentService = Depends(get_read_document_service)
 ):
     """獲取文檔詳情"""
     document = document_service.get_document(document_id)
@@ -78,7 +88,7 @@ async def get_document(
 
 
 @router.put("/{document_id}", response_model=DocumentResponse)
-async def update_document(
+def update_document(
     document_id: uuid.UUID = Path(..., description="文檔ID"),
     document_update: DocumentUpdate = Body(...),
     document_service: DocumentService = Depends(get_document_service)
@@ -94,7 +104,7 @@ async def update_document(
 
 
 @router.delete("/{document_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_document(
+def delete_document(
     document_id: uuid.UUID = Path(..., description="文檔ID"),
     document_service: DocumentService = Depends(get_document_service)
 ):
@@ -109,7 +119,7 @@ async def delete_document(
 
 
 @router.post("/{document_id}/publish", response_model=DocumentResponse)
-async def publish_document(
+def publish_document(
     document_id: uuid.UUID = Path(..., description="文檔ID"),
     document_service: DocumentService = Depends(get_document_service)
 ):
@@ -124,7 +134,7 @@ async def publish_document(
 
 
 @router.post("/{document_id}/unpublish", response_model=DocumentResponse)
-async def unpublish_document(
+def unpublish_document(
     document_id: uuid.UUID = Path(..., description="文檔ID"),
     document_service: DocumentService = Depends(get_document_service)
 ):
@@ -139,7 +149,7 @@ async def unpublish_document(
 
 
 @router.post("/{document_id}/comments", response_model=DocumentCommentResponse, status_code=status.HTTP_201_CREATED)
-async def create_document_comment(
+def create_document_comment(
     document_id: uuid.UUID = Path(..., description="文檔ID"),
     comment: DocumentCommentCreate = Body(...),
     document_service: DocumentService = Depends(get_document_service)
@@ -149,7 +159,7 @@ async def create_document_comment(
 
 
 @router.get("/{document_id}/comments", response_model=List[DocumentCommentResponse])
-async def get_document_comments(
+def get_document_comments(
     document_id: uuid.UUID = Path(..., description="文檔ID"),
     skip: int = Query(0, description="跳過的記錄數"),
     limit: int = Query(100, description="返回的最大記錄數"),
@@ -160,7 +170,7 @@ async def get_document_comments(
 
 
 @router.post("/{document_id}/attachments", response_model=DocumentAttachmentResponse, status_code=status.HTTP_201_CREATED)
-async def upload_document_attachment(
+def upload_document_attachment(
     document_id: uuid.UUID = Path(..., description="文檔ID"),
     file: UploadFile = File(...),
     user_id: uuid.UUID = Query(..., description="上傳用戶ID"),
@@ -171,7 +181,7 @@ async def upload_document_attachment(
 
 
 @router.get("/{document_id}/attachments", response_model=List[DocumentAttachmentResponse])
-async def get_document_attachments(
+def get_document_attachments(
     document_id: uuid.UUID = Path(..., description="文檔ID"),
     document_service: DocumentService = Depends(get_document_service)
 ):
@@ -180,16 +190,57 @@ async def get_document_attachments(
 
 
 @router.get("/{document_id}/history", response_model=List[dict])
-async def get_document_history(
+def get_document_history(
+    response: Response,
     document_id: uuid.UUID = Path(..., description="文檔ID"),
-    document_service: DocumentService = Depends(get_document_service)
+    limit: Optional[int] = Query(None, ge=1, description="每頁記錄數，不指定時返回全部"),
+    cursor: Optional[str] = Query(None, description="分頁游標，取自上一頁響應的 X-Next-Cursor 頭"),
+    content: str = Query("full", regex="^(full|none|diff)$", description="內容快照：full 完整返回，none 省略，diff 返回相對上一版本的差異"),
+    document_service: DocumentService = Depends(get_read_document_service)
+):
+    """獲取文檔歷史記錄，按時間倒序
+
+    指定 limit 時分頁返回，響應頭 X-Next-Cursor 攜帶下一頁游標，沒有下一頁時不返回。
+    """
+    try:
+        history = document_service.get_history(document_id, limit=limit, cursor=cursor, content=content)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    cursor_for_next_page = next_cursor(history, limit) if limit else None
+    if cursor_for_next_page:
+        response.headers["X-Next-Cursor"] = cursor_for_next_page
+    return history
+
+
+@router.get("/{document_id}/history/stream")
+def stream_document_history(
+    document_id: uuid.UUID = Path(..., description="文檔ID"),
+    content: str = Query("none", regex="^(full|none|diff)$", description="內容快照：full 完整返回，none 省略，diff 返回相對上一版本的差異"),
+    document_service: DocumentService = Depends(get_read_document_service)
+):
+    """以 NDJSON 流式返回文檔的全部歷史記錄，按時間倒序，默認不含內容快照"""
+    return StreamingResponse(
+        iter_json_lines(document_service.stream_history(document_id, content=content)),
+        media_type=EXPORT_MEDIA_TYPES["ndjson"]
+    )
+
+
+@router.get("/{document_id}/history/revisions/{revision}", response_model=dict)
+def get_document_revision(
+    document_id: uuid.UUID = Path(..., description="文檔ID"),
+    revision: int = Path(..., ge=1, description="版本號"),
+    document_service: DocumentService = Depends(get_read_document_service)
 ):
-    """獲取文檔歷史記錄"""
-    return document_service.get_history(document_id)
+    """獲取文檔指定版本的完整內容"""
+    item = document_service.get_revision(document_id, revision)
+    if not item:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="文檔版本不存在")
+    return item
 
 
 @router.get("/{document_id}/tags", response_model=List[DocumentTagResponse])
-async def get_document_tags(
+def get_document_tags(
     document_id: uuid.UUID = Path(..., description="文檔ID"),
     document_service: DocumentService = Depends(get_document_service)
 ):
@@ -198,7 +249,7 @@ async def get_document_tags(
 
 
 @router.post("/{document_id}/tags/{tag_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def add_document_tag(
+def add_document_tag(
     document_id: uuid.UUID = Path(..., description="文檔ID"),
     tag_id: uuid.UUID = Path(..., description="標籤ID"),
     document_service: DocumentService = Depends(get_document_service)
@@ -214,7 +265,7 @@ async def add_document_tag(
 
 
 @router.delete("/{document_id}/tags/{tag_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def remove_document_tag(
+def remove_document_tag(
     document_id: uuid.UUID = Path(..., description="文檔ID"),
     tag_id: uuid.UUID = Path(..., description="標籤ID"),
     document_service: DocumentService = Depends(get_document_service)
@@ -32,7 +32,7 @@ def get_question_service(db: Session = Depends(get_db)):
 
 
 @router.get("/", response_model=List[QuestionListResponse])
-async def get_questions(
+def get_questions(
     skip: int = Query(0, description="跳過的記錄數"),
     limit: int = Query(100, description="返回的最大記錄數"),
     document_id: Optional[uuid.UUID] = Query(None, description="按文檔篩選"),
@@ -52,7 +52,7 @@ async def get_questions(
 
 
 @router.post("/", response_model=QuestionResponse, status_code=status.HTTP_201_CREATED)
-async def create_question(
+def create_question(
     question: QuestionCreate,
     question_service: QuestionService = Depends(get_question_service)
 ):
@@ -61,7 +61,7 @@ async def create_question(
 
 
 @router.get("/{question_id}", response_model=QuestionResponse)
-async def get_question(
+def get_question(
     question_id: uuid.UUID = Path(..., description="問題ID"),
     question_service: QuestionService = Depends(get_question_service)
 ):
@@ -76,7 +76,7 @@ async def get_question(
 
 
 @router.put("/{question_id}", response_model=QuestionResponse)
-async def update_question(
+def update_question(
     question_id: uuid.UUID = Path(..., description="問題ID"),
     question_update: QuestionUpdate = Body(...),
     question_service: QuestionService = Depends(get_question_service)
@@ -92,7 +92,7 @@ async def update_question(
 
 
 @router.delete("/{question_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_question(
+def delete_question(
     question_id: uuid.UUID = Path(..., description="問題ID"),
     question_service: QuestionService = Depends(get_question_service)
 ):
@@ -107,7 +107,7 @@ async def delete_question(
 
 
 @router.post("/{question_id}/resolve", response_model=QuestionResponse)
-async def resolve_question(
+def resolve_question(
     question_id: uuid.UUID = Path(..., description="問題ID"),
     question_service: QuestionService = Depends(get_question_service)
 ):
@@ -122,7 +122,7 @@ async def resolve_question(
 
 
 @router.post("/{question_id}/unresolve", response_model=QuestionResponse)
-async def unresolve_question(
+def unresolve_question(
     question_id: uuid.UUID = Path(..., description="問題ID"),
     question_service: QuestionService = Depends(get_question_service)
 ):
@@ -137,7 +137,7 @@ async def unresolve_question(
 
 
 @router.post("/{question_id}/answers", response_model=AnswerResponse, status_code=status.HTTP_201_CREATED)
-async def create_answer(
+def create_answer(
     question_id: uuid.UUID = Path(..., description="問題ID"),
     answer: AnswerCreate = Body(...),
     question_service: QuestionService = Depends(get_question_service)
@@ -147,7 +147,7 @@ async def create_answer(
 
 
 @router.get("/{question_id}/answers", response_model=List[AnswerResponse])
-async def get_answers(
+def get_answers(
     question_id: uuid.UUID = Path(..., description="問題ID"),
     skip: int = Query(0, description="跳過的記錄數"),
     limit: int = Query(100, description="返回的最大記錄數"),
@@ -158,7 +158,7 @@ async def get_answers(
 
 
 @router.put("/{question_id}/answers/{answer_id}", response_model=AnswerResponse)
-async def update_answer(
+def update_answer(
     question_id: uuid.UUID = Path(..., description="問題ID"),
     answer_id: uuid.UUID = Path(..., description="回答ID"),
     answer_update: AnswerUpdate = Body(...),
@@ -175,7 +175,7 @@ async def update_answer(
 
 
 @router.delete("/{question_id}/answers/{answer_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_answer(
+def delete_answer(
     question_id: uuid.UUID = Path(..., description="問題ID"),
     answer_id: uuid.UUID = Path(..., description="回答ID"),
     question_service: QuestionService = Depends(get_question_service)
@@ -191,7 +191,7 @@ async def delete_answer(
 
 
 @router.post("/{question_id}/answers/{answer_id}/accept", response_model=AnswerResponse)
-async def accept_answer(
+def accept_answer(
     question_id: uuid.UUID = Path(..., description="問題ID"),
     answer_id: uuid.UUID = Path(..., description="回答ID"),
     question_service: QuestionService = Depends(get_question_service)
@@ -207,7 +207,7 @@ async def accept_answer(
 
 
 @router.post("/{question_id}/answers/{answer_id}/unaccept", response_model=AnswerResponse)
-async def unaccept_answer(
+def unaccept_answer(
     question_id: uuid.UUID = Path(..., description="問題ID"),
     answer_id: uuid.UUID = Path(..., description="回答ID"),
     question_service: QuestionService = Depends(get_question_service)
@@ -223,7 +223,7 @@ async def unaccept_answer(
 
 
 @router.post("/{question_id}/answers/{answer_id}/vote", response_model=AnswerResponse)
-async def vote_answer(
+def vote_answer(
     question_id: uuid.UUID = Path(..., description="問題ID"),
     answer_id: uuid.UUID = Path(..., description="回答ID"),
     vote: AnswerVoteCreate = Body(...),
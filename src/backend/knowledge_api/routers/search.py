@@ -4,7 +4,7 @@ from typing import List, Optional
 import uuid
 
 # 導入數據庫依賴
-from database.session import get_db
+from database.session import get_read_db
 
 # 導入模型和架構
 from ..schemas.search import SearchResponse, SearchResult
@@ -17,13 +17,14 @@ router = APIRouter(prefix="/search", tags=["search"])
 
 
 @router.get("/", response_model=SearchResponse)
-async def search(
+def search(
     q: str = Query(..., min_length=2, description="搜索關鍵詞"),
     type: Optional[str] = Query(None, description="搜索類型，可選值：document, question, all"),
     category_id: Optional[uuid.UUID] = Query(None, description="分類ID，用於篩選結果"),
+    include_subcategories: bool = Query(False, description="按分類篩選時包含全部子分類"),
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """全文搜索文檔和問題"""
     search_service = SearchService(db)
@@ -37,6 +38,8 @@ async def search(
     filters = {}
     if category_id:
         filters["category_id"] = category_id
+        if include_subcategories:
+            filters["include_subcategories"] = True
     
     # 執行搜索
     results, total = search_service.search(
@@ -52,6 +55,7 @@ async def search(
         "type": search_type,
         "results": results,
         "total": total,
+        "total_is_estimate": search_service.is_estimated_total(total),
         "page": skip // limit + 1,
         "size": limit,
         "pages": (total + limit - 1) // limit
@@ -59,12 +63,13 @@ async def search(
 
 
 @router.get("/documents", response_model=SearchResponse)
-async def search_documents(
+def search_documents(
     q: str = Query(..., min_length=2, description="搜索關鍵詞"),
     category_id: Optional[uuid.UUID] = Query(None, description="分類ID，用於篩選結果"),
+    include_subcategories: bool = Query(False, description="按分類篩選時包含全部子分類"),
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """搜索文檔"""
     search_service = SearchService(db)
@@ -73,6 +78,8 @@ async def search_documents(
     filters = {}
     if category_id:
         filters["category_id"] = category_id
+        if include_subcategories:
+            filters["include_subcategories"] = True
     
     # 執行搜索
     results, total = search_service.search(
@@ -88,6 +95,7 @@ async def search_documents(
         "type": "document",
         "results": results,
         "total": total,
+        "total_is_estimate": search_service.is_estimated_total(total),
         "page": skip // limit + 1,
         "size": limit,
         "pages": (total + limit - 1) // limit
@@ -95,12 +103,13 @@ async def search_documents(
 
 
 @router.get("/questions", response_model=SearchResponse)
-async def search_questions(
+def search_questions(
     q: str = Query(..., min_length=2, description="搜索關鍵詞"),
     category_id: Optional[uuid.UUID] = Query(None, description="分類ID，用於篩選結果"),
+    include_subcategories: bool = Query(False, description="按分類篩選時包含全部子分類"),
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """搜索問題"""
     search_service = SearchService(db)
@@ -109,6 +118,8 @@ async def search_questions(
     filters = {}
     if category_id:
         filters["category_id"] = category_id
+        if include_subcategories:
+            filters["include_subcategories"] = True
     
     # 執行搜索
     results, total = search_service.search(
@@ -124,6 +135,7 @@ async def search_questions(
         "type": "question",
         "results": results,
         "total": total,
+        "total_is_estimate": search_service.is_estimated_total(total),
         "page": skip // limit + 1,
         "size": limit,
         "pages": (total + limit - 1) // limit
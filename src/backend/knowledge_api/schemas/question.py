@@ -68,8 +68,8 @@ class AnswerResponse(BaseSchema):
     user_name: Optional[str] = None
     content: str
     is_accepted: bool
-    upvotes_count: int = 0
-    downvotes_count: int = 0
+    upvote_count: int = 0
+    downvote_count: int = 0
     created_at: datetime
     updated_at: datetime
     accepted_at: Optional[datetime] = None
@@ -39,6 +39,7 @@ class SearchResponse(BaseModel):
     type: str  # document, question 或 all
     results: List[SearchResult]
     total: int
+    total_is_estimate: bool = False  # 為 True 時 total 為封頂估算值
     page: int
     size: int
     pages: int
@@ -0,0 +1,81 @@
+"""
+壓縮文檔歷史
+
+按當前的 DOCUMENT_HISTORY_STORAGE 設置重寫已有文檔歷史：delta 模式下每隔
+--interval 個版本保留一次完整快照，其餘版本改存行級增量；沒有版本號的舊記錄按時間順序編號。
+每個文檔在獨立事務中處理，結果以 JSON 輸出到標準輸出。
+
+部署本版本前必須先運行一次 --upgrade-schema：文檔的創建和更新會寫入 revision 和 delta 列，
+已有的 document_history 表缺少這兩列時寫入會失敗。
+
+用法：
+    python -m src.backend.knowledge_api.scripts.compact_document_history --upgrade-schema
+    python -m src.backend.knowledge_api.scripts.compact_document_history --interval 50
+    python -m src.backend.knowledge_api.scripts.compact_document_history --dry-run
+"""
+import argparse
+import json
+import sys
+
+from sqlalchemy import text
+
+from src.database.db import SessionLocal, engine
+from ..models.knowledge import DocumentHistory
+from ..services.document_history import DocumentHistoryStore
+from ..services.history_delta import HISTORY_STORAGE_MODES
+
+# 為已有的 document_history 表添加版本號和增量列（PostgreSQL）
+UPGRADE_STATEMENTS = (
+    "ALTER TABLE document_history ADD COLUMN IF NOT EXISTS revision integer",
+    "ALTER TABLE document_history ADD COLUMN IF NOT EXISTS delta text",
+    "ALTER TABLE document_history ALTER COLUMN content DROP NOT NULL",
+    "CREATE UNIQUE INDEX IF NOT EXISTS uq_document_history_document_id_revision "
+    "ON document_history (document_id, revision)",
+)
+
+
+def upgrade_schema() -> None:
+    with engine.begin() as connection:
+        for statement in UPGRADE_STATEMENTS:
+            connection.execute(text(statement))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--upgrade-schema", action="store_true", help="先為 document_history 表添加新列和唯一索引")
+    parser.add_argument("--storage", choices=HISTORY_STORAGE_MODES, default=None, help="存儲方式，默認取自配置")
+    parser.add_argument("--interval", type=int, default=None, help="快照間隔，默認取自配置")
+    parser.add_argument("--dry-run", action="store_true", help="只統計壓縮前後的字節數，不寫入數據庫")
+    args = parser.parse_args()
+
+    if args.upgrade_schema:
+        upgrade_schema()
+
+    db = SessionLocal()
+    report = {"documents": 0, "revisions": 0, "bytes_before": 0, "bytes_after": 0}
+    try:
+        store = DocumentHistoryStore(db, storage=args.storage, snapshot_interval=args.interval)
+        document_ids = [
+            document_id for (document_id,) in db.query(DocumentHistory.document_id).distinct()
+        ]
+        for document_id in document_ids:
+            revisions, size_before, size_after = store.compact(document_id)
+            if args.dry_run:
+                db.rollback()
+            else:
+                db.commit()
+            report["documents"] += 1
+            report["revisions"] += revisions
+            report["bytes_before"] += size_before
+            report["bytes_after"] += size_after
+    finally:
+        db.close()
+
+    report["dry_run"] = args.dry_run
+    json.dump(report, sys.stdout, ensure_ascii=False, indent=2)
+    sys.stdout.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+"""
+重建分類物化路徑
+
+按 parent_id 重新計算 categories 表的 path 列，只更新有變化的行。
+--upgrade-schema 為已有數據庫添加 path 列和前綴索引，回填後設為 NOT NULL。
+結果以 JSON 輸出到標準輸出。
+
+用法：
+    python -m src.backend.knowledge_api.scripts.rebuild_category_paths --upgrade-schema
+    python -m src.backend.knowledge_api.scripts.rebuild_category_paths
+"""
+import argparse
+import json
+import sys
+
+from sqlalchemy import text
+
+from src.database.db import SessionLocal, engine
+from ..services.category_service import CategoryService
+
+# 為已有的 categories 表添加物化路徑列和前綴索引（PostgreSQL）
+UPGRADE_STATEMENTS = (
+    "ALTER TABLE categories ADD COLUMN IF NOT EXISTS path text",
+    "CREATE INDEX IF NOT EXISTS ix_categories_path ON categories (path text_pattern_ops)",
+)
+
+# 回填完成後執行
+FINALIZE_STATEMENTS = (
+    "ALTER TABLE categories ALTER COLUMN path SET NOT NULL",
+)
+
+
+def execute(statements) -> None:
+    with engine.begin() as connection:
+        for statement in statements:
+            connection.execute(text(statement))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--upgrade-schema", action="store_true", help="先為 categories 表添加 path 列和索引")
+    args = parser.parse_args()
+
+    if args.upgrade_schema:
+        execute(UPGRADE_STATEMENTS)
+
+    db = SessionLocal()
+    try:
+        updated = CategoryService(db).rebuild_paths()
+    finally:
+        db.close()
+
+    if args.upgrade_schema:
+        execute(FINALIZE_STATEMENTS)
+
+    json.dump({"updated": updated}, sys.stdout, ensure_ascii=False, indent=2)
+    sys.stdout.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,60 @@
+"""
+重算回答投票計數
+
+按 answer_votes 表批量重算 answers 表的 upvote_count、downvote_count 和 score，
+只更新與實際投票不一致的行。結果以 JSON 輸出到標準輸出。
+
+用法：
+    python -m src.backend.knowledge_api.scripts.reconcile_answer_votes --upgrade-schema
+    python -m src.backend.knowledge_api.scripts.reconcile_answer_votes
+    python -m src.backend.knowledge_api.scripts.reconcile_answer_votes --question-id <uuid>
+"""
+import argparse
+import json
+import sys
+import uuid
+
+from sqlalchemy import text
+
+from src.database.db import SessionLocal, engine
+from ..services.question_service import QuestionService
+
+# 為已有的 answers 表添加計數列和排序索引（PostgreSQL）
+UPGRADE_STATEMENTS = (
+    "ALTER TABLE answers ADD COLUMN IF NOT EXISTS upvote_count integer NOT NULL DEFAULT 0",
+    "ALTER TABLE answers ADD COLUMN IF NOT EXISTS downvote_count integer NOT NULL DEFAULT 0",
+    "ALTER TABLE answers ADD COLUMN IF NOT EXISTS score integer NOT NULL DEFAULT 0",
+    "CREATE INDEX IF NOT EXISTS ix_answers_question_id_ranking "
+    "ON answers (question_id, is_accepted, score, created_at)",
+    "CREATE INDEX IF NOT EXISTS ix_answer_votes_answer_id_user_id ON answer_votes (answer_id, user_id)",
+)
+
+
+def upgrade_schema() -> None:
+    with engine.begin() as connection:
+        for statement in UPGRADE_STATEMENTS:
+            connection.execute(text(statement))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--upgrade-schema", action="store_true", help="先為 answers 表添加計數列和索引")
+    parser.add_argument("--question-id", type=uuid.UUID, default=None, help="只重算指定問題的回答")
+    args = parser.parse_args()
+
+    if args.upgrade_schema:
+        upgrade_schema()
+
+    db = SessionLocal()
+    try:
+        updated = QuestionService(db).reconcile_vote_tallies(args.question_id)
+    finally:
+        db.close()
+
+    json.dump({"updated": updated}, sys.stdout, ensure_ascii=False, indent=2)
+    sys.stdout.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,6 @@
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func, or_
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy import false, func, literal, or_, select, update
 from typing import List, Dict, Any, Optional
 import uuid
 from datetime import datetime
@@ -7,7 +8,10 @@ import logging
 
 # 導入模型和架構
 from ..models.knowledge import Category, Document
-from ..schemas.category import CategoryCreate, CategoryUpdate
+from ..schemas.category import CategoryCreate, CategoryResponse, CategoryUpdate
+from .category_tree import build_paths, category_path, path_has_ancestor
+from .search_cache import get_search_cache
+from ...shared.tree_snapshot import TreeSnapshot, build_tree, get_tree_cache
 
 # 配置日誌
 logger = logging.getLogger("category_service")
@@ -16,6 +20,7 @@ logger = logging.getLogger("category_service")
 class CategoryService:
     def __init__(self, db: Session):
         self.db = db
+        self.tree_cache = get_tree_cache("categories")
 
     def get_categories(self, skip: int = 0, limit: int = 100, filters: Dict[str, Any] = None) -> List[Category]:
         """獲取分類列表，支持分頁和篩選"""
@@ -60,9 +65,11 @@ class CategoryService:
 
     def create_category(self, category_data: CategoryCreate) -> Category:
         """創建新分類"""
-        category = Category(**category_data.dict())
+        category = Category(id=uuid.uuid4(), **category_data.dict())
+        category.path = category_path(self._path(category.parent_id), category.id)
         self.db.add(category)
         self.db.commit()
+        self.tree_cache.invalidate()
         self.db.refresh(category)
         return category
 
@@ -78,11 +85,22 @@ class CategoryService:
 
         # 更新字段
         update_data = category_update.dict(exclude_unset=True)
+        old_parent_id = category.parent_id
         for key, value in update_data.items():
             setattr(category, key, value)
 
+        moved = category.parent_id != old_parent_id
+        if moved:
+            self._move_subtree(category)
+
         category.updated_at = datetime.now()
         self.db.commit()
+        self.tree_cache.invalidate()
+        if moved:
+            # 子樹範圍變化，按分類子樹篩選的搜索緩存失效
+            search_cache = get_search_cache()
+            search_cache.invalidate_documents()
+            search_cache.invalidate_questions()
         self.db.refresh(category)
         return category
 
@@ -95,6 +113,7 @@ class CategoryService:
         # 刪除分類
         self.db.delete(category)
         self.db.commit()
+        self.tree_cache.invalidate()
         return True
 
     def name_exists_at_level(self, name: str, parent_id: Optional[uuid.UUID], exclude_id: Optional[uuid.UUID] = None) -> bool:
@@ -118,34 +137,81 @@ class CategoryService:
         return self.db.query(Document).filter(Document.category_id == category_id).count() > 0
 
     def is_descendant(self, ancestor_id: uuid.UUID, descendant_id: uuid.UUID) -> bool:
-        """檢查一個分類是否是另一個分類的後代"""
+        """檢查一個分類是否是另一個分類的後代，只需讀取後代分類的路徑"""
         if ancestor_id == descendant_id:
             return True
-            
-        descendant = self.db.query(Category).filter(Category.id == descendant_id).first()
-        if not descendant or not descendant.parent_id:
-            return False
-            
-        if descendant.parent_id == ancestor_id:
-            return True
-            
-        return self.is_descendant(ancestor_id, descendant.parent_id)
+
+        path = self._path(descendant_id)
+        return path is not None and path_has_ancestor(path, ancestor_id)
 
     def get_category_tree(self) -> List[Category]:
-        """獲取分類樹結構"""
-        # 獲取所有頂級分類
-        root_categories = self.db.query(Category).filter(Category.parent_id.is_(None)).all()
-        
-        # 遞歸加載子分類
-        for category in root_categories:
-            self._load_children(category)
-            
-        return root_categories
+        """獲取分類樹結構，一次查詢讀取全部分類後在內存中組裝"""
+        categories = self.db.query(Category).order_by(Category.name).all()
+        roots, children = build_tree(categories, key=lambda c: c.id, parent=lambda c: c.parent_id)
+
+        # 直接設置已加載的子分類，不觸發延遲加載，也不標記為待寫入
+        for category in categories:
+            set_committed_value(category, "children", children.get(category.id, []))
+
+        return roots
+
+    def get_category_tree_snapshot(self) -> TreeSnapshot:
+        """獲取預先序列化的分類樹，分類寫入後重建"""
+        return self.tree_cache.get(self._serialize_tree)
+
+    def _serialize_tree(self) -> bytes:
+        roots = self.get_category_tree()
+        return ("[" + ",".join(CategoryResponse.from_orm(root).json() for root in roots) + "]").encode("utf-8")
+
+    def get_subtree_ids(self, category_id: uuid.UUID) -> List[uuid.UUID]:
+        """獲取分類及其全部後代分類的ID"""
+        return [row.id for row in self.db.execute(select(Category.id).where(subtree_clause(self.db, category_id)))]
+
+    def rebuild_paths(self) -> int:
+        """按 parent_id 重新計算全部分類的物化路徑，只更新有變化的行，返回更新的行數"""
+        rows = self.db.query(Category.id, Category.parent_id, Category.path).all()
+        paths = build_paths((row.id, row.parent_id) for row in rows)
+        changed = [
+            {"id": row.id, "path": paths[row.id]}
+            for row in rows
+            if row.id in paths and row.path != paths[row.id]
+        ]
+        if changed:
+            self.db.execute(update(Category), changed)
+        self.db.commit()
+        return len(changed)
 
-    def _load_children(self, category: Category) -> None:
-        """遞歸加載子分類"""
-        children = self.db.query(Category).filter(Category.parent_id == category.id).all()
-        category.children = children
-        
-        for child in children:
-            self._load_children(child)
\ No newline at end of file
+    def _path(self, category_id: Optional[uuid.UUID]) -> Optional[str]:
+        if category_id is None:
+            return None
+        return self.db.query(Category.path).filter(Category.id == category_id).scalar()
+
+    def _move_subtree(self, category: Category) -> None:
+        """分類移動到新的父分類後，用一條 UPDATE 改寫自身及全部後代的路徑前綴"""
+        old_path = category.path
+        new_path = category_path(self._path(category.parent_id), category.id)
+        self.db.query(Category).filter(Category.path.startswith(old_path)).update(
+            {Category.path: literal(new_path) + func.substr(Category.path, len(old_path) + 1)},
+            synchronize_session=False
+        )
+        set_committed_value(category, "path", new_path)
+
+
+def subtree_clause(db: Session, category_id: uuid.UUID):
+    """分類及其後代分類的篩選條件：路徑以該分類的路徑為前綴
+
+    先查出該分類的路徑再作為常量前綴傳入，LIKE 'prefix%' 才能使用 text_pattern_ops 索引；
+    分類不存在時不匹配任何分類。
+    """
+    path = db.query(Category.path).filter(Category.id == category_id).scalar()
+    if path is None:
+        return false()
+    # 路徑只含十六進制 ID 和分隔符，無需轉義 LIKE 通配符
+    return Category.path.like(f"{path}%")
+
+
+def category_filter(db: Session, column, category_id: uuid.UUID, include_subcategories: bool = False):
+    """按分類篩選的條件，include_subcategories 為 True 時包含全部後代分類"""
+    if include_subcategories:
+        return column.in_(select(Category.id).where(subtree_clause(db, category_id)))
+    return column == category_id
@@ -0,0 +1,39 @@
+import uuid
+from typing import Dict, Iterable, Optional, Tuple
+
+# 物化路徑的分隔符：路徑形如 /<根分類ID>/<子分類ID>/.../<本分類ID>/
+PATH_SEPARATOR = "/"
+
+
+def category_path(parent_path: Optional[str], category_id: uuid.UUID) -> str:
+    """根據父分類路徑生成分類的物化路徑，頂級分類的父路徑為 None"""
+    return f"{parent_path or PATH_SEPARATOR}{category_id.hex}{PATH_SEPARATOR}"
+
+
+def path_has_ancestor(path: str, ancestor_id: uuid.UUID) -> bool:
+    """路徑是否經過 ancestor_id（分類自身也算作自己的祖先）"""
+    return f"{PATH_SEPARATOR}{ancestor_id.hex}{PATH_SEPARATOR}" in path
+
+
+def build_paths(rows: Iterable[Tuple[uuid.UUID, Optional[uuid.UUID]]]) -> Dict[uuid.UUID, str]:
+    """由 (id, parent_id) 計算全部分類的物化路徑
+
+    父分類不存在的分類視為頂級分類；環上的分類無法確定路徑，不出現在結果中。
+    """
+    parents = dict(rows)
+    paths: Dict[uuid.UUID, str] = {}
+    for category_id in parents:
+        # 沿父鏈向上直到已知路徑或頂級分類，再自上而下填充
+        chain = []
+        seen = set()
+        current = category_id
+        while current is not None and current not in paths and current in parents and current not in seen:
+            seen.add(current)
+            chain.append(current)
+            current = parents[current]
+        if current is not None and current in seen:
+            continue
+        parent_path = paths.get(current)
+        for node in reversed(chain):
+            parent_path = paths[node] = category_path(parent_path, node)
+    return paths
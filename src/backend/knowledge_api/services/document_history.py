@@ -0,0 +1,170 @@
+import logging
+import uuid
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from ..models.knowledge import Document, DocumentHistory
+from .history_delta import apply_delta, content_diff, encode_revision, is_snapshot_revision
+from src.config import settings
+
+# 配置日誌
+logger = logging.getLogger("document_history")
+
+
+class RevisionReader:
+    """按版本號重建一個文檔的歷史內容
+
+    增量版本從不晚於它的最近快照開始依次應用增量得到；每次只緩存最近加載的一段
+    （快照及其後的增量版本），按版本倒序讀取時每段只查詢一次，內存佔用與快照間隔成正比。
+    """
+
+    def __init__(self, db: Session, document_id: uuid.UUID):
+        self.db = db
+        self.document_id = document_id
+        self._segment: Dict[int, str] = {}
+
+    def content(self, revision: int) -> Optional[str]:
+        """返回指定版本的內容，版本不存在時返回 None"""
+        if revision not in self._segment:
+            self._load_segment(revision)
+        return self._segment.get(revision)
+
+    def _load_segment(self, revision: int) -> None:
+        snapshot_revision = self.db.query(func.max(DocumentHistory.revision)).filter(
+            DocumentHistory.document_id == self.document_id,
+            DocumentHistory.revision <= revision,
+            DocumentHistory.content.isnot(None)
+        ).scalar()
+        if snapshot_revision is None:
+            self._segment = {}
+            return
+
+        rows = self.db.query(
+            DocumentHistory.revision,
+            DocumentHistory.content,
+            DocumentHistory.delta
+        ).filter(
+            DocumentHistory.document_id == self.document_id,
+            DocumentHistory.revision.between(snapshot_revision, revision)
+        ).order_by(DocumentHistory.revision)
+
+        segment: Dict[int, str] = {}
+        current = None
+        for row_revision, content, delta in rows:
+            current = content if content is not None else apply_delta(current, delta)
+            segment[row_revision] = current
+        self._segment = segment
+
+
+class DocumentHistoryStore:
+    """文檔歷史的寫入、讀取和壓縮
+
+    storage 為 full 時每個版本保存完整快照；為 delta 時每 snapshot_interval 個版本保存一次快照，
+    其餘版本只保存相對上一版本的行級增量，讀取時按需重建。
+    """
+
+    def __init__(self, db: Session, storage: Optional[str] = None, snapshot_interval: Optional[int] = None):
+        self.db = db
+        self.storage = storage or settings.DOCUMENT_HISTORY_STORAGE
+        self.snapshot_interval = snapshot_interval or settings.DOCUMENT_HISTORY_SNAPSHOT_INTERVAL
+
+    def record(self, document_id: uuid.UUID, user_id: uuid.UUID, content: str,
+               changes: Dict[str, Any]) -> DocumentHistory:
+        """添加一個新版本（不提交），增量相對數據庫中的上一版本計算
+
+        先鎖定文檔行，同一文檔的並發編輯依次計算版本號，不會在唯一索引上衝突。
+        """
+        self.db.query(Document.id).filter(Document.id == document_id).with_for_update().scalar()
+        latest = self.db.query(func.max(DocumentHistory.revision)).filter(
+            DocumentHistory.document_id == document_id
+        ).scalar()
+        revision = (latest or 0) + 1
+
+        previous = None
+        if latest is not None and self.storage == "delta" and not is_snapshot_revision(revision, self.snapshot_interval):
+            previous = RevisionReader(self.db, document_id).content(latest)
+        snapshot, delta = self._encode(revision, previous, content)
+
+        history = DocumentHistory(
+            document_id=document_id,
+            user_id=user_id,
+            revision=revision,
+            content=snapshot,
+            delta=delta,
+            changes=changes
+        )
+        self.db.add(history)
+        return history
+
+    def items(self, document_id: uuid.UUID, rows: Iterable[Any], content: str) -> Iterator[Dict[str, Any]]:
+        """把按時間倒序的歷史行轉換為字典，按 content 模式填充完整內容或差異
+
+        diff 模式下每條記錄的差異需要下一行（更早的版本），因此會向前多讀一行。
+        """
+        reader = RevisionReader(self.db, document_id)
+        pending: Optional[Dict[str, Any]] = None
+        for row in rows:
+            item = dict(row._mapping)
+            item.pop("delta", None)
+            if content in ("full", "diff") and item.get("content") is None and item.get("revision") is not None:
+                item["content"] = reader.content(item["revision"])
+
+            if content != "diff":
+                yield item
+                continue
+            if pending is not None:
+                pending["content_diff"] = content_diff(item["content"], pending.pop("content"))
+                yield pending
+            pending = item
+
+        if pending is not None:
+            # 最早的版本相對空文本計算差異
+            pending["content_diff"] = content_diff("", pending.pop("content"))
+            yield pending
+
+    def compact(self, document_id: uuid.UUID) -> Tuple[int, int, int]:
+        """按當前存儲方式重寫一個文檔的全部歷史（不提交），返回 (版本數, 原字節數, 新字節數)
+
+        舊數據（沒有版本號）排在最前，按 (created_at, id) 編號；已有版本號的記錄保持原順序。
+        """
+        rows = self.db.query(DocumentHistory).filter(
+            DocumentHistory.document_id == document_id
+        ).order_by(
+            DocumentHistory.revision.asc().nulls_first(),
+            DocumentHistory.created_at,
+            DocumentHistory.id
+        ).all()
+
+        contents = []
+        current = None
+        for row in rows:
+            current = row.content if row.content is not None else apply_delta(current, row.delta)
+            contents.append(current)
+        size_before = sum(_stored_size(row.content, row.delta) for row in rows)
+
+        # 先清空版本號再重新編號，避免與唯一索引衝突
+        for row in rows:
+            row.revision = None
+        self.db.flush()
+
+        previous = None
+        for revision, (row, content) in enumerate(zip(rows, contents), start=1):
+            row.revision = revision
+            row.content, row.delta = self._encode(revision, previous, content)
+            previous = content
+        self.db.flush()
+
+        size_after = sum(_stored_size(row.content, row.delta) for row in rows)
+        return len(rows), size_before, size_after
+
+    def _encode(self, revision: int, previous: Optional[str], content: str) -> Tuple[Optional[str], Optional[str]]:
+        if self.storage != "delta":
+            return content, None
+        return encode_revision(revision, previous, content, self.snapshot_interval)
+
+
+def _stored_size(content: Optional[str], delta: Optional[str]) -> int:
+    """一條歷史記錄內容部分佔用的字節數"""
+    return len((content or "").encode("utf-8")) + len((delta or "").encode("utf-8"))
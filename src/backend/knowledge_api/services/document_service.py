@@ -1,7 +1,8 @@
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func, or_, and_
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy import func, and_, select, tuple_
 from fastapi import UploadFile, HTTPException, status
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterator, Optional
 import uuid
 import os
 import shutil
@@ -23,16 +24,30 @@ from ..schemas.document import (
     DocumentUpdate, 
     DocumentCommentCreate
 )
+from ...ticket_api.models.ticket import User
+from ...shared.pagination import decode_cursor
+from ....application.services.view_counter import ViewCounter
+from ....infrastructure.counters.view_counter_impl import get_view_counter
+from .category_service import category_filter
+from .document_history import DocumentHistoryStore, RevisionReader
+from .search_backend import get_search_backend
+from .search_cache import get_search_cache
+from database.trigram import contains_any
+from src.config import settings
 
 # 配置日誌
 logger = logging.getLogger("document_service")
 
 
 class DocumentService:
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, view_counter: Optional[ViewCounter] = None):
         self.db = db
+        self.view_counter = view_counter or get_view_counter()
         self.upload_dir = os.path.join("static", "uploads", "documents")
         os.makedirs(self.upload_dir, exist_ok=True)
+        self.search_backend = get_search_backend()
+        self.search_cache = get_search_cache()
+        self.history = DocumentHistoryStore(db)
 
     def get_documents(self, skip: int = 0, limit: int = 100, filters: Dict[str, Any] = None) -> List[Document]:
         """獲取文檔列表，支持分頁和篩選"""
@@ -41,7 +56,9 @@ class DocumentService:
         # 應用篩選條件
         if filters:
             if filters.get("category_id"):
-                query = query.filter(Document.category_id == filters["category_id"])
+                query = query.filter(
+                    category_filter(self.db, Document.category_id, filters["category_id"], filters.get("include_subcategories"))
+                )
             if filters.get("creator_id"):
                 query = query.filter(Document.creator_id == filters["creator_id"])
             if filters.get("is_published") is not None:
@@ -49,14 +66,7 @@ class DocumentService:
             if filters.get("tag_id"):
                 query = query.join(document_tag).filter(document_tag.c.tag_id == filters["tag_id"])
             if filters.get("search"):
-                search_term = f"%{filters['search']}%"
-                query = query.filter(
-                    or_(
-                        Document.title.ilike(search_term),
-                        Document.content.ilike(search_term),
-                        Document.summary.ilike(search_term)
-                    )
-                )
+                query = query.filter(contains_any([Document.title, Document.content, Document.summary], filters["search"]))
 
         # 加載關聯數據
         query = query.options(
@@ -99,15 +109,13 @@ class DocumentService:
             self.db.refresh(document)
 
         # 記錄歷史
-        history = DocumentHistory(
-            document_id=document.id,
-            user_id=document_data.creator_id,
-            content=document.content,
-            changes={"document": "created"}
-        )
-        self.db.add(history)
+        self.history.record(document.id, document_data.creator_id, document.content, {"document": "created"})
         self.db.commit()
 
+        # 同步搜索索引並使搜索緩存失效
+        self.search_backend.index_document(document)
+        self.search_cache.invalidate_documents()
+
         return document
 
     def get_document(self, document_id: uuid.UUID) -> Optional[Document]:
@@ -119,10 +127,9 @@ class DocumentService:
         ).filter(Document.id == document_id).first()
 
         if document:
-            # 增加瀏覽次數
-            document.view_count += 1
-            self.db.commit()
-            self.db.refresh(document)
+            # 瀏覽次數先計入緩衝區，由後台任務批量寫回；返回值包含尚未寫回的增量
+            pending = self.view_counter.increment("document", document.id)
+            set_committed_value(document, "view_count", document.view_count + pending)
 
         return document
 
@@ -150,15 +157,21 @@ class DocumentService:
 
         # 記錄歷史
         if old_data or "content" in update_data:
-            history = DocumentHistory(
-                document_id=document.id,
-                user_id=update_data.get("user_id", document.creator_id),  # 假設更新者ID在請求中提供
-                content=document.content,
-                changes={"old": old_data, "new": update_data}
+            self.history.record(
+                document.id,
+                update_data.get("user_id", document.creator_id),  # 假設更新者ID在請求中提供
+                document.content,
+                {"old": old_data, "new": update_data}
             )
-            self.db.add(history)
             self.db.commit()
 
+        # 同步搜索索引並使搜索緩存失效
+        self.search_backend.index_document(document)
+        self.search_cache.invalidate_documents()
+        if "category_id" in old_data:
+            # 問題按所屬文檔的分類篩選
+            self.search_cache.invalidate_questions()
+
         return document
 
     def delete_document(self, document_id: uuid.UUID) -> bool:
@@ -178,6 +191,10 @@ class DocumentService:
         
         self.db.delete(document)
         self.db.commit()
+
+        # 同步搜索索引並使搜索緩存失效
+        self.search_backend.remove_document(document_id)
+        self.search_cache.invalidate_documents()
         return True
 
     def publish_document(self, document_id: uuid.UUID) -> Optional[Document]:
@@ -190,6 +207,8 @@ class DocumentService:
         document.published_at = datetime.now()
         self.db.commit()
         self.db.refresh(document)
+        self.search_backend.index_document(document)
+        self.search_cache.invalidate_documents()
         return document
 
     def unpublish_document(self, document_id: uuid.UUID) -> Optional[Document]:
@@ -201,6 +220,8 @@ class DocumentService:
         document.is_published = False
         self.db.commit()
         self.db.refresh(document)
+        self.search_backend.index_document(document)
+        self.search_cache.invalidate_documents()
         return document
 
     def add_comment(self, document_id: uuid.UUID, comment_data: DocumentCommentCreate) -> DocumentComment:
@@ -272,28 +293,77 @@ class DocumentService:
             DocumentAttachment.created_at.desc()
         ).all()
 
-    def get_history(self, document_id: uuid.UUID) -> List[Dict[str, Any]]:
-        """獲取文檔歷史記錄"""
-        history_records = self.db.query(DocumentHistory).options(
-            joinedload(DocumentHistory.user)
-        ).filter(DocumentHistory.document_id == document_id).order_by(
-            DocumentHistory.created_at.desc()
-        ).all()
+    def _history_query(self, document_id: uuid.UUID, content: str = "full", cursor: Optional[str] = None):
+        """構建歷史記錄的列查詢，按 (created_at, id) 倒序，傳入 cursor 時從游標之後開始
+
+        content 為 none 時不讀取內容快照。
+        """
+        columns = [
+            DocumentHistory.id,
+            DocumentHistory.user_id,
+            User.full_name.label("user_name"),
+            DocumentHistory.revision,
+            DocumentHistory.changes,
+            DocumentHistory.created_at
+        ]
+        if content in ("full", "diff"):
+            columns.append(DocumentHistory.content)
+
+        query = select(*columns).outerjoin(
+            User, DocumentHistory.user_id == User.id
+        ).where(DocumentHistory.document_id == document_id)
+
+        if cursor:
+            cursor_created_at, cursor_id = decode_cursor(cursor)
+            query = query.where(
+                tuple_(DocumentHistory.created_at, DocumentHistory.id) < tuple_(cursor_created_at, cursor_id)
+            )
+        return query.order_by(DocumentHistory.created_at.desc(), DocumentHistory.id.desc())
+
+    def get_history(self, document_id: uuid.UUID, limit: Optional[int] = None, cursor: Optional[str] = None,
+                    content: str = "full") -> List[Dict[str, Any]]:
+        """獲取文檔歷史記錄
+
+        傳入 limit 時按 (created_at, id) 鍵集分頁；content 可選 full（完整快照）、none（省略）、
+        diff（相對上一版本的差異）。增量存儲的版本按需重建內容。
+        """
+        query = self._history_query(document_id, content, cursor)
+        if limit:
+            # diff 模式需要本頁最後一條的上一版本，多讀一行
+            query = query.limit(limit + 1 if content == "diff" else limit)
+        items = list(self.history.items(document_id, self.db.execute(query), content))
+        return items[:limit] if limit else items
+
+    def stream_history(self, document_id: uuid.UUID, content: str = "full") -> Iterator[Dict[str, Any]]:
+        """以服務端游標逐批讀取文檔的全部歷史記錄，需在會話關閉前迭代完畢"""
+        query = self._history_query(document_id, content).execution_options(
+            stream_results=True, yield_per=settings.HISTORY_STREAM_BATCH_SIZE
+        )
+        return self.history.items(document_id, self.db.execute(query), content)
+
+    def get_revision(self, document_id: uuid.UUID, revision: int) -> Optional[Dict[str, Any]]:
+        """重建文檔指定版本的完整內容，版本不存在時返回 None"""
+        row = self.db.execute(
+            select(
+                DocumentHistory.id,
+                DocumentHistory.user_id,
+                User.full_name.label("user_name"),
+                DocumentHistory.revision,
+                DocumentHistory.changes,
+                DocumentHistory.created_at
+            ).outerjoin(
+                User, DocumentHistory.user_id == User.id
+            ).where(
+                DocumentHistory.document_id == document_id,
+                DocumentHistory.revision == revision
+            )
+        ).first()
+        if row is None:
+            return None
 
-        # 轉換為更易讀的格式
-        result = []
-        for record in history_records:
-            item = {
-                "id": record.id,
-                "user_id": record.user_id,
-                "user_name": record.user.full_name if record.user else None,
-                "content": record.content,
-                "changes": record.changes,
-                "created_at": record.created_at
-            }
-            result.append(item)
-
-        return result
+        item = dict(row._mapping)
+        item["content"] = RevisionReader(self.db, document_id).content(revision)
+        return item
 
     def get_tags(self, document_id: uuid.UUID) -> List[DocumentTag]:
         """獲取文檔標籤"""
@@ -0,0 +1,107 @@
+import html
+import re
+from functools import lru_cache
+from typing import Iterator, List, Optional, Pattern
+
+
+@lru_cache(maxsize=256)
+def compile_terms(query: str) -> Optional[Pattern]:
+    """將查詢詞編譯為單個不區分大小寫的正則，較長的詞優先匹配"""
+    terms = sorted({term for term in query.lower().split() if term}, key=len, reverse=True)
+    if not terms:
+        return None
+    return re.compile("|".join(re.escape(term) for term in terms), re.IGNORECASE)
+
+
+class Highlighter:
+    """單次掃描的高亮片段生成器
+
+    所有查詢詞合併為一個正則，對全文只掃描一次；同一段落中重疊的上下文窗口合併為一個片段，
+    生成 max_snippets 個片段後即停止掃描。片段文本經過 HTML 轉義，命中詞用高亮標籤包裹。
+    """
+
+    def __init__(
+        self,
+        tag_open: str = "<mark>",
+        tag_close: str = "</mark>",
+        context: int = 50,
+        max_snippets: int = 3,
+        short_paragraph: int = 100,
+    ):
+        self.tag_open = tag_open
+        self.tag_close = tag_close
+        self.context = context
+        self.max_snippets = max_snippets
+        self.short_paragraph = short_paragraph
+
+    def highlight(self, query: str, text: str) -> List[str]:
+        """生成高亮片段，沒有命中時返回文本開頭"""
+        if not text:
+            return []
+
+        pattern = compile_terms(query)
+        snippets = []
+        if pattern is not None:
+            longest = max(len(term) for term in query.split())
+            snippets = [self._render(text, window) for window in self._windows(pattern, text, longest)]
+
+        # 如果沒有找到高亮片段，返回文本的前100個字符
+        if not snippets:
+            head = html.escape(text[:self.short_paragraph])
+            return [head + "..." if len(text) > self.short_paragraph else head]
+
+        return snippets
+
+    def _windows(self, pattern: Pattern, text: str, longest: int) -> Iterator[List]:
+        """依次生成合併後的片段窗口，生成 max_snippets 個後即停止掃描
+
+        命中不長於最長的查詢詞，判斷下一個命中是否與窗口重疊只需掃描到窗口末尾之後 longest 個字符。
+        """
+        pos = 0
+        for _ in range(self.max_snippets):
+            match = pattern.search(text, pos)
+            if match is None:
+                return
+            window = self._open_window(text, *match.span())
+            pos = match.end()
+            while True:
+                following = pattern.search(text, pos, window[3] + longest)
+                if following is None or following.start() >= window[3]:
+                    break
+                # 與當前窗口重疊，擴展窗口
+                window[3] = max(window[3], min(window[1], following.end() + self.context))
+                window[4].append(following.span())
+                pos = following.end()
+            yield window
+
+    def _open_window(self, text: str, start: int, end: int) -> List:
+        """以命中位置開始一個窗口：[段落起點, 段落終點, 窗口起點, 窗口終點, 命中位置列表]"""
+        paragraph_start = text.rfind("\n", 0, start) + 1
+        paragraph_end = text.find("\n", end)
+        if paragraph_end < 0:
+            paragraph_end = len(text)
+
+        if paragraph_end - paragraph_start <= self.short_paragraph:
+            # 短段落整段作為片段
+            return [paragraph_start, paragraph_end, paragraph_start, paragraph_end, [(start, end)]]
+        return [
+            paragraph_start,
+            paragraph_end,
+            max(paragraph_start, start - self.context),
+            min(paragraph_end, end + self.context),
+            [(start, end)],
+        ]
+
+    def _render(self, text: str, window: List) -> str:
+        """渲染片段：轉義文本並包裹命中詞"""
+        paragraph_start, paragraph_end, start, end, hits = window
+        parts = ["..."] if start > paragraph_start else []
+        cursor = start
+        for hit_start, hit_end in hits:
+            parts.append(html.escape(text[cursor:hit_start]))
+            parts.append(self.tag_open + html.escape(text[hit_start:hit_end]) + self.tag_close)
+            cursor = hit_end
+        parts.append(html.escape(text[cursor:end]))
+        if end < paragraph_end:
+            parts.append("...")
+        return "".join(parts)
@@ -0,0 +1,76 @@
+import difflib
+import json
+from typing import Iterable, Iterator, Optional, Tuple
+
+# 文檔歷史的內容返回方式：完整快照、省略、相對上一版本的差異
+HISTORY_CONTENT_MODES = ("full", "none", "diff")
+
+# 文檔歷史的存儲方式：每個版本保存完整快照，或定期快照加行級增量
+HISTORY_STORAGE_MODES = ("full", "delta")
+
+
+def content_diff(previous: str, current: str, context: int = 3) -> str:
+    """返回從 previous 到 current 的 unified diff 文本，首個版本相對空文本計算"""
+    return "\n".join(difflib.unified_diff(
+        (previous or "").splitlines(),
+        (current or "").splitlines(),
+        fromfile="previous",
+        tofile="current",
+        n=context,
+        lineterm="",
+    ))
+
+
+def make_delta(base: str, target: str) -> str:
+    """計算從 base 到 target 的行級增量，返回緊湊的 JSON 文本
+
+    增量是操作列表：[start, end] 表示複製 base 的第 start 到 end 行（不含 end），
+    字符串表示插入的文本。行保留換行符，重建結果與 target 逐字節一致。
+    """
+    base_lines = base.splitlines(keepends=True)
+    target_lines = target.splitlines(keepends=True)
+    operations = []
+    matcher = difflib.SequenceMatcher(None, base_lines, target_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            operations.append([i1, i2])
+        elif j2 > j1:
+            operations.append("".join(target_lines[j1:j2]))
+    return json.dumps(operations, ensure_ascii=False, separators=(",", ":"))
+
+
+def apply_delta(base: str, delta: str) -> str:
+    """把 make_delta 生成的增量應用到 base 上"""
+    base_lines = base.splitlines(keepends=True)
+    return "".join(
+        "".join(base_lines[operation[0]:operation[1]]) if isinstance(operation, list) else operation
+        for operation in json.loads(delta)
+    )
+
+
+def rebuild(snapshot: str, deltas: Iterable[str]) -> Iterator[str]:
+    """從快照開始依次應用增量，逐個返回每個版本的內容（首個為快照本身）"""
+    content = snapshot
+    yield content
+    for delta in deltas:
+        content = apply_delta(content, delta)
+        yield content
+
+
+def is_snapshot_revision(revision: int, interval: int) -> bool:
+    """版本號是否落在快照間隔上：第 1、1 + interval、1 + 2 * interval ... 個版本保存快照"""
+    return interval <= 1 or (revision - 1) % interval == 0
+
+
+def encode_revision(revision: int, previous: Optional[str], content: str,
+                    interval: int) -> Tuple[Optional[str], Optional[str]]:
+    """決定一個版本的存儲形式，返回 (快照內容, 增量)，兩者恰有一個非空
+
+    沒有上一版本、到達快照間隔、或增量不比完整內容小時保存快照。
+    """
+    if previous is None or is_snapshot_revision(revision, interval):
+        return content, None
+    delta = make_delta(previous, content)
+    if len(delta) >= len(content):
+        return content, None
+    return None, delta
@@ -0,0 +1,142 @@
+import math
+import re
+import threading
+from collections import Counter
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+# 中日韓字符範圍：連續的 CJK 字符按二元組切分，其他文字按單詞切分
+_CJK_RANGES = "㐀-䶿一-鿿぀-ヿ가-힯豈-﫿"
+_TOKEN_PATTERN = re.compile(rf"[{_CJK_RANGES}]+|[^\W_{_CJK_RANGES}]+")
+_CJK_PATTERN = re.compile(rf"[{_CJK_RANGES}]")
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """將文本切分為詞項：拉丁文字按單詞小寫化，CJK 文字按相鄰二元組切分"""
+    if not text:
+        return []
+    tokens = []
+    for match in _TOKEN_PATTERN.finditer(text.lower()):
+        run = match.group()
+        if _CJK_PATTERN.match(run):
+            if len(run) == 1:
+                tokens.append(run)
+            else:
+                tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            tokens.append(run)
+    return tokens
+
+
+class InvertedIndex:
+    """進程內倒排索引，使用 BM25 計算相關性得分
+
+    每個條目由鍵、待索引文本和用於篩選的屬性組成；所有操作均為線程安全。
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self._postings: Dict[str, Dict[Hashable, int]] = {}
+        self._lengths: Dict[Hashable, int] = {}
+        self._terms: Dict[Hashable, List[str]] = {}
+        self._attrs: Dict[Hashable, Dict[str, Any]] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._lengths
+
+    def upsert(self, key: Hashable, text: str, attrs: Optional[Dict[str, Any]] = None) -> None:
+        """添加或替換一個條目"""
+        frequencies = Counter(tokenize(text))
+        with self._lock:
+            self._discard(key)
+            for term, count in frequencies.items():
+                self._postings.setdefault(term, {})[key] = count
+            length = sum(frequencies.values())
+            self._terms[key] = list(frequencies)
+            self._lengths[key] = length
+            self._total_length += length
+            self._attrs[key] = dict(attrs or {})
+
+    def remove(self, key: Hashable) -> bool:
+        """移除一個條目，條目不存在時返回 False"""
+        with self._lock:
+            return self._discard(key)
+
+    def clear(self) -> None:
+        """清空索引"""
+        with self._lock:
+            self._postings.clear()
+            self._lengths.clear()
+            self._terms.clear()
+            self._attrs.clear()
+            self._total_length = 0
+
+    def attrs(self, key: Hashable) -> Optional[Dict[str, Any]]:
+        """返回條目的篩選屬性"""
+        return self._attrs.get(key)
+
+    def search(
+        self,
+        query: str,
+        predicate: Optional[Callable[[Dict[str, Any]], bool]] = None,
+    ) -> List[Tuple[Hashable, float]]:
+        """返回包含全部查詢詞項的條目及其 BM25 得分，按得分降序排列
+
+        與 plainto_tsquery 的語義一致，查詢詞項之間為 AND 關係。
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+
+        with self._lock:
+            postings = [self._postings.get(term) for term in terms]
+            if not all(postings):
+                return []
+
+            # 從最短的倒排列表開始求交集
+            postings.sort(key=len)
+            candidates = set(postings[0])
+            for posting in postings[1:]:
+                candidates.intersection_update(posting)
+                if not candidates:
+                    return []
+
+            document_count = len(self._lengths)
+            average_length = self._total_length / document_count if document_count else 0.0
+            idf = [
+                math.log(1 + (document_count - len(posting) + 0.5) / (len(posting) + 0.5))
+                for posting in postings
+            ]
+
+            hits = []
+            for key in candidates:
+                if predicate is not None and not predicate(self._attrs[key]):
+                    continue
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[key] / average_length) if average_length else self.k1
+                score = 0.0
+                for weight, posting in zip(idf, postings):
+                    frequency = posting[key]
+                    score += weight * frequency * (self.k1 + 1) / (frequency + norm)
+                hits.append((key, score))
+
+        # 得分相同時按鍵排序，保證分頁穩定
+        hits.sort(key=lambda hit: (-hit[1], str(hit[0])))
+        return hits
+
+    def _discard(self, key: Hashable) -> bool:
+        """在已持有鎖的情況下移除條目"""
+        if key not in self._lengths:
+            return False
+        for term in self._terms.pop(key):
+            posting = self._postings[term]
+            del posting[key]
+            if not posting:
+                del self._postings[term]
+        self._total_length -= self._lengths.pop(key)
+        self._attrs.pop(key, None)
+        return True
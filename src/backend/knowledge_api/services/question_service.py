@@ -1,5 +1,6 @@
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func, or_, and_
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy import func, or_, and_, exists, select, update
 from fastapi import HTTPException, status
 from typing import List, Dict, Any, Optional
 import uuid
@@ -20,14 +21,23 @@ from ..schemas.question import (
     AnswerUpdate,
     AnswerVoteCreate
 )
+from .search_backend import get_search_backend
+from .search_cache import get_search_cache
+from .vote_tally import vote_change
+from database.trigram import contains_any
+from ....application.services.view_counter import ViewCounter
+from ....infrastructure.counters.view_counter_impl import get_view_counter
 
 # 配置日誌
 logger = logging.getLogger("question_service")
 
 
 class QuestionService:
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, view_counter: Optional[ViewCounter] = None):
         self.db = db
+        self.view_counter = view_counter or get_view_counter()
+        self.search_backend = get_search_backend()
+        self.search_cache = get_search_cache()
 
     def get_questions(self, skip: int = 0, limit: int = 100, filters: Dict[str, Any] = None) -> List[Question]:
         """獲取問題列表，支持分頁和篩選"""
@@ -42,13 +52,7 @@ class QuestionService:
             if filters.get("is_resolved") is not None:
                 query = query.filter(Question.is_resolved == filters["is_resolved"])
             if filters.get("search"):
-                search_term = f"%{filters['search']}%"
-                query = query.filter(
-                    or_(
-                        Question.title.ilike(search_term),
-                        Question.content.ilike(search_term)
-                    )
-                )
+                query = query.filter(contains_any([Question.title, Question.content], filters["search"]))
 
         # 加載關聯數據
         query = query.options(
@@ -76,6 +80,10 @@ class QuestionService:
         self.db.add(question)
         self.db.commit()
         self.db.refresh(question)
+
+        # 同步搜索索引並使搜索緩存失效
+        self.search_backend.index_question(question)
+        self.search_cache.invalidate_questions()
         return question
 
     def get_question(self, question_id: uuid.UUID) -> Optional[Question]:
@@ -87,10 +95,9 @@ class QuestionService:
         ).filter(Question.id == question_id).first()
 
         if question:
-            # 增加瀏覽次數
-            question.view_count += 1
-            self.db.commit()
-            self.db.refresh(question)
+            # 瀏覽次數先計入緩衝區，由後台任務批量寫回；返回值包含尚未寫回的增量
+            pending = self.view_counter.increment("question", question.id)
+            set_committed_value(question, "view_count", question.view_count + pending)
 
         return question
 
@@ -113,6 +120,10 @@ class QuestionService:
 
         self.db.commit()
         self.db.refresh(question)
+
+        # 同步搜索索引並使搜索緩存失效
+        self.search_backend.index_question(question)
+        self.search_cache.invalidate_questions()
         return question
 
     def delete_question(self, question_id: uuid.UUID) -> bool:
@@ -128,6 +139,10 @@ class QuestionService:
         
         self.db.delete(question)
         self.db.commit()
+
+        # 同步搜索索引並使搜索緩存失效
+        self.search_backend.remove_question(question_id)
+        self.search_cache.invalidate_questions()
         return True
 
     def resolve_question(self, question_id: uuid.UUID) -> Optional[Question]:
@@ -139,6 +154,7 @@ class QuestionService:
         question.is_resolved = True
         question.resolved_at = datetime.now()
         self.db.commit()
+        self.search_cache.invalidate_questions()
         self.db.refresh(question)
         return question
 
@@ -151,6 +167,7 @@ class QuestionService:
         question.is_resolved = False
         question.resolved_at = None
         self.db.commit()
+        self.search_cache.invalidate_questions()
         self.db.refresh(question)
         return question
 
@@ -167,17 +184,17 @@ class QuestionService:
         answer = Answer(**answer_data.dict())
         self.db.add(answer)
         self.db.commit()
+        self.search_cache.invalidate_questions()
         self.db.refresh(answer)
         return answer
 
     def get_answers(self, question_id: uuid.UUID, skip: int = 0, limit: int = 100) -> List[Answer]:
-        """獲取問題的回答列表"""
+        """獲取問題的回答列表，已接受的回答優先，其次按得分和時間倒序"""
         return self.db.query(Answer).options(
-            joinedload(Answer.user),
-            joinedload(Answer.votes)
+            joinedload(Answer.user)
         ).filter(Answer.question_id == question_id).order_by(
             Answer.is_accepted.desc(),
-            func.count(AnswerVote.id).filter(AnswerVote.is_upvote == True).desc(),
+            Answer.score.desc(),
             Answer.created_at.desc()
         ).offset(skip).limit(limit).all()
 
@@ -207,6 +224,7 @@ class QuestionService:
         
         self.db.delete(answer)
         self.db.commit()
+        self.search_cache.invalidate_questions()
         return True
 
     def accept_answer(self, question_id: uuid.UUID, answer_id: uuid.UUID) -> Optional[Answer]:
@@ -235,6 +253,7 @@ class QuestionService:
         question.resolved_at = datetime.now()
 
         self.db.commit()
+        self.search_cache.invalidate_questions()
         self.db.refresh(answer)
         return answer
 
@@ -266,6 +285,7 @@ class QuestionService:
             question.resolved_at = None
 
         self.db.commit()
+        self.search_cache.invalidate_questions()
         self.db.refresh(answer)
         return answer
 
@@ -281,19 +301,69 @@ class QuestionService:
             AnswerVote.user_id == vote_data.user_id
         ).first()
 
-        if existing_vote:
+        change = vote_change(existing_vote.is_upvote if existing_vote else None, vote_data.is_upvote)
+        if change.vote is None:
             # 如果投票類型相同，則刪除投票（取消投票）
-            if existing_vote.is_upvote == vote_data.is_upvote:
-                self.db.delete(existing_vote)
-            else:
-                # 如果投票類型不同，則更新投票類型
-                existing_vote.is_upvote = vote_data.is_upvote
-                existing_vote.updated_at = datetime.now()
+            self.db.delete(existing_vote)
+        elif existing_vote:
+            # 如果投票類型不同，則更新投票類型
+            existing_vote.is_upvote = vote_data.is_upvote
+            existing_vote.updated_at = datetime.now()
         else:
             # 創建新投票
             vote = AnswerVote(**vote_data.dict())
             self.db.add(vote)
 
+        # 在數據庫中原子地累加計數，並發投票不會互相覆蓋
+        self.db.query(Answer).filter(Answer.id == answer_id).update({
+            Answer.upvote_count: Answer.upvote_count + change.upvotes,
+            Answer.downvote_count: Answer.downvote_count + change.downvotes,
+            Answer.score: Answer.score + change.score
+        }, synchronize_session=False)
+
         self.db.commit()
         self.db.refresh(answer)
-        return answer
\ No newline at end of file
+        return answer
+
+    def reconcile_vote_tallies(self, question_id: Optional[uuid.UUID] = None) -> int:
+        """按 answer_votes 批量重算回答的投票計數和得分，只更新不一致的行，返回更新的行數"""
+        tallies = select(
+            AnswerVote.answer_id,
+            func.count(AnswerVote.id).filter(AnswerVote.is_upvote.is_(True)).label("upvotes"),
+            func.count(AnswerVote.id).filter(AnswerVote.is_upvote.is_(False)).label("downvotes")
+        ).group_by(AnswerVote.answer_id).subquery()
+
+        scope = [Answer.question_id == question_id] if question_id else []
+
+        # 有投票的回答：與匯總結果不一致時更新
+        voted = self.db.execute(
+            update(Answer).where(
+                Answer.id == tallies.c.answer_id,
+                or_(
+                    Answer.upvote_count != tallies.c.upvotes,
+                    Answer.downvote_count != tallies.c.downvotes,
+                    Answer.score != tallies.c.upvotes - tallies.c.downvotes
+                ),
+                *scope
+            ).values(
+                upvote_count=tallies.c.upvotes,
+                downvote_count=tallies.c.downvotes,
+                score=tallies.c.upvotes - tallies.c.downvotes
+            ).execution_options(synchronize_session=False)
+        ).rowcount
+
+        # 沒有投票的回答：計數歸零
+        unvoted = self.db.execute(
+            update(Answer).where(
+                ~exists().where(AnswerVote.answer_id == Answer.id),
+                or_(Answer.upvote_count != 0, Answer.downvote_count != 0, Answer.score != 0),
+                *scope
+            ).values(
+                upvote_count=0,
+                downvote_count=0,
+                score=0
+            ).execution_options(synchronize_session=False)
+        ).rowcount
+
+        self.db.commit()
+        return voted + unvoted
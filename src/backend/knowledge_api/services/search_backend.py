@@ -0,0 +1,306 @@
+from abc import ABC, abstractmethod
+from collections import namedtuple
+from sqlalchemy.orm import Session
+from sqlalchemy import func, literal, literal_column, select, union_all
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import threading
+import time
+import logging
+
+# 導入模型
+from ..models.knowledge import Document, Question
+from .category_service import CategoryService, category_filter
+from .inverted_index import InvertedIndex
+from src.config import settings
+
+# 配置日誌
+logger = logging.getLogger("search_backend")
+
+# 排名結果：實體類型、實體 ID 和相關性得分
+SearchHit = namedtuple("SearchHit", ["type", "id", "rank"])
+
+
+class SearchBackend(ABC):
+    """搜索後端接口：負責匹配和排名，返回一頁命中結果及總數"""
+
+    @abstractmethod
+    def rank(self, db: Session, query: str, search_types: Sequence[str], filters: Dict[str, Any] = None, skip: int = 0, limit: int = 20) -> Tuple[List[SearchHit], int]:
+        """按相關性降序返回指定類型的一頁命中結果及匹配總數"""
+
+    def is_estimated_total(self, total: int) -> bool:
+        """判斷總數是否為估算值"""
+        return False
+
+    def index_document(self, document: Document) -> None:
+        """文檔創建或更新後同步索引"""
+
+    def remove_document(self, document_id: Any) -> None:
+        """文檔刪除後同步索引"""
+
+    def index_question(self, question: Question) -> None:
+        """問題創建或更新後同步索引"""
+
+    def remove_question(self, question_id: Any) -> None:
+        """問題刪除後同步索引"""
+
+
+class PostgresSearchBackend(SearchBackend):
+    """基於 PostgreSQL 全文搜索的後端，search_vector 由數據庫維護，無需同步索引"""
+
+    def rank(self, db: Session, query: str, search_types: Sequence[str], filters: Dict[str, Any] = None, skip: int = 0, limit: int = 20) -> Tuple[List[SearchHit], int]:
+        streams = []
+        if "document" in search_types:
+            streams.append(self._document_stream(db, query, filters))
+        if "question" in search_types:
+            streams.append(self._question_stream(db, query, filters))
+        if not streams:
+            return [], 0
+
+        # 多種類型以 UNION ALL 合併為一個排名流，由數據庫統一排序和分頁
+        ranked = (union_all(*streams) if len(streams) > 1 else streams[0]).subquery()
+
+        capped = select(literal_column("1")).select_from(ranked).limit(
+            settings.SEARCH_TOTAL_ESTIMATE_THRESHOLD + 1
+        ).subquery()
+        if settings.SEARCH_TOTAL_MODE == "estimate":
+            # 封頂計數：最多數到閾值+1 行即停止，熱門詞不必為精確總數付出代價
+            total_column = select(func.count()).select_from(capped).scalar_subquery()
+        else:
+            total_column = func.count().over()
+
+        rows = db.execute(
+            select(ranked.c.type, ranked.c.id, ranked.c.rank, total_column.label("total"))
+            .order_by(ranked.c.rank.desc(), ranked.c.type, ranked.c.id)
+            .offset(skip)
+            .limit(limit)
+        ).all()
+
+        if rows:
+            total = rows[0].total
+        elif skip == 0:
+            total = 0
+        else:
+            # 頁碼超出結果範圍時沒有行攜帶總數，退回單獨計數
+            counted = capped if settings.SEARCH_TOTAL_MODE == "estimate" else ranked
+            total = db.scalar(select(func.count()).select_from(counted))
+
+        return [SearchHit(row.type, row.id, row.rank) for row in rows], total
+
+    def is_estimated_total(self, total: int) -> bool:
+        return settings.SEARCH_TOTAL_MODE == "estimate" and total > settings.SEARCH_TOTAL_ESTIMATE_THRESHOLD
+
+    def _rank(self, search_vector, query: str):
+        """相關性得分表達式"""
+        return func.ts_rank_cd(search_vector, func.plainto_tsquery('chinese', query))
+
+    def _document_stream(self, db: Session, query: str, filters: Dict[str, Any] = None):
+        """文檔匹配查詢，返回 (type, id, rank)"""
+        stream = select(
+            literal("document").label("type"),
+            Document.id.label("id"),
+            self._rank(Document.search_vector, query).label("rank")
+        ).where(
+            Document.search_vector.op('@@')(func.plainto_tsquery('chinese', query)),
+            Document.is_published.is_(True)  # 只搜索已發布的文檔
+        )
+
+        # 應用篩選條件
+        if filters:
+            if filters.get("category_id"):
+                stream = stream.where(
+                    category_filter(db, Document.category_id, filters["category_id"], filters.get("include_subcategories"))
+                )
+
+        return stream
+
+    def _question_stream(self, db: Session, query: str, filters: Dict[str, Any] = None):
+        """問題匹配查詢，返回 (type, id, rank)"""
+        stream = select(
+            literal("question").label("type"),
+            Question.id.label("id"),
+            self._rank(Question.search_vector, query).label("rank")
+        ).where(
+            Question.search_vector.op('@@')(func.plainto_tsquery('chinese', query))
+        )
+
+        # 應用篩選條件
+        if filters:
+            if filters.get("category_id"):
+                # 通過文檔關聯查詢分類
+                stream = stream.join(Document, Question.document_id == Document.id).where(
+                    category_filter(db, Document.category_id, filters["category_id"], filters.get("include_subcategories"))
+                )
+
+        return stream
+
+
+class InMemorySearchBackend(SearchBackend):
+    """進程內倒排索引後端，使用 BM25 排名和 CJK 二元組分詞
+
+    索引在首次搜索時從數據庫構建，之後由文檔和問題的寫操作增量維護；
+    每個工作進程持有獨立的索引，超過 SEARCH_INDEX_MAX_AGE_SECONDS 後整體重建，
+    以吸收其他進程的寫入。
+    """
+
+    def __init__(self, max_age_seconds: Optional[int] = None):
+        self.documents = InvertedIndex()
+        self.questions = InvertedIndex()
+        self.max_age_seconds = settings.SEARCH_INDEX_MAX_AGE_SECONDS if max_age_seconds is None else max_age_seconds
+        self._built_at: Optional[float] = None
+        self._lock = threading.Lock()
+        # 增量寫入與索引替換互斥；重建進行中時記錄寫入，構建完成後重放到新索引
+        self._write_lock = threading.Lock()
+        self._pending: Optional[List[Callable[[InvertedIndex, InvertedIndex], None]]] = None
+
+    def rank(self, db: Session, query: str, search_types: Sequence[str], filters: Dict[str, Any] = None, skip: int = 0, limit: int = 20) -> Tuple[List[SearchHit], int]:
+        self._ensure_fresh(db)
+        category_ids = None
+        if filters and filters.get("category_id"):
+            if filters.get("include_subcategories"):
+                category_ids = {str(i) for i in CategoryService(db).get_subtree_ids(filters["category_id"])}
+            else:
+                category_ids = {str(filters["category_id"])}
+
+        hits = []
+        if "document" in search_types:
+            def document_matches(attrs: Dict[str, Any]) -> bool:
+                # 只搜索已發布的文檔
+                return attrs["is_published"] and (category_ids is None or attrs["category_id"] in category_ids)
+
+            hits.extend(
+                SearchHit("document", key, score)
+                for key, score in self.documents.search(query, document_matches)
+            )
+        if "question" in search_types:
+            def question_matches(attrs: Dict[str, Any]) -> bool:
+                # 通過所屬文檔判斷分類
+                if category_ids is None:
+                    return True
+                document_attrs = self.documents.attrs(attrs["document_id"])
+                return document_attrs is not None and document_attrs["category_id"] in category_ids
+
+            hits.extend(
+                SearchHit("question", key, score)
+                for key, score in self.questions.search(query, question_matches)
+            )
+
+        # 與 Postgres 後端一致：按得分降序，類型和 ID 作為穩定排序鍵
+        hits.sort(key=lambda hit: (-hit.rank, hit.type, str(hit.id)))
+        return hits[skip:skip + limit], len(hits)
+
+    def index_document(self, document: Document) -> None:
+        entry = self._document_entry(document)
+        self._write(lambda documents, questions: documents.upsert(*entry))
+
+    def remove_document(self, document_id: Any) -> None:
+        self._write(lambda documents, questions: documents.remove(document_id))
+
+    def index_question(self, question: Question) -> None:
+        entry = self._question_entry(question)
+        self._write(lambda documents, questions: questions.upsert(*entry))
+
+    def remove_question(self, question_id: Any) -> None:
+        self._write(lambda documents, questions: questions.remove(question_id))
+
+    def _write(self, operation: Callable[[InvertedIndex, InvertedIndex], None]) -> None:
+        """寫入當前索引；重建進行中時同時記錄，避免寫入只落在即將被替換的舊索引上"""
+        with self._write_lock:
+            operation(self.documents, self.questions)
+            if self._pending is not None:
+                self._pending.append(operation)
+
+    def rebuild(self, db: Session) -> None:
+        """從數據庫全量重建索引"""
+        with self._lock:
+            self._rebuild(db)
+
+    def _ensure_fresh(self, db: Session) -> None:
+        """索引未構建或已過期時重建"""
+        if not self._is_stale():
+            return
+        with self._lock:
+            if self._is_stale():
+                self._rebuild(db)
+
+    def _is_stale(self) -> bool:
+        if self._built_at is None:
+            return True
+        return self.max_age_seconds > 0 and time.monotonic() - self._built_at > self.max_age_seconds
+
+    def _rebuild(self, db: Session) -> None:
+        started = time.monotonic()
+        with self._write_lock:
+            self._pending = []
+        documents = db.query(
+            Document.id, Document.title, Document.summary, Document.content,
+            Document.category_id, Document.is_published
+        ).all()
+        questions = db.query(Question.id, Question.title, Question.content, Question.document_id).all()
+
+        # 在新索引上構建完成後再替換，重建期間的搜索仍使用舊索引
+        document_index = InvertedIndex()
+        question_index = InvertedIndex()
+        try:
+            for document in documents:
+                document_index.upsert(*self._document_entry(document))
+            for question in questions:
+                question_index.upsert(*self._question_entry(question))
+        except Exception:
+            with self._write_lock:
+                self._pending = None
+            raise
+
+        # 重放重建期間的寫入（upsert 和 remove 可重複執行），再替換索引
+        with self._write_lock:
+            for operation in self._pending:
+                operation(document_index, question_index)
+            self._pending = None
+            self.documents, self.questions = document_index, question_index
+
+        self._built_at = time.monotonic()
+        logger.info(
+            f"Search index rebuilt: {len(documents)} documents, {len(questions)} questions "
+            f"in {self._built_at - started:.2f}s"
+        )
+
+    @classmethod
+    def _document_entry(cls, document: Any) -> Tuple[Any, str, Dict[str, Any]]:
+        """文檔的索引條目 (id, 文本, 屬性)；未分類文檔的 category_id 為 None"""
+        category_id = str(document.category_id) if document.category_id is not None else None
+        return (
+            document.id,
+            cls._join(document.title, document.summary, document.content),
+            {"category_id": category_id, "is_published": bool(document.is_published)}
+        )
+
+    @classmethod
+    def _question_entry(cls, question: Any) -> Tuple[Any, str, Dict[str, Any]]:
+        """問題的索引條目 (id, 文本, 屬性)"""
+        return (
+            question.id,
+            cls._join(question.title, question.content),
+            {"document_id": question.document_id}
+        )
+
+    @staticmethod
+    def _join(*parts: Optional[str]) -> str:
+        return "\n".join(part for part in parts if part)
+
+
+_backend: Optional[SearchBackend] = None
+_backend_lock = threading.Lock()
+
+
+def get_search_backend() -> SearchBackend:
+    """按 SEARCH_BACKEND 配置返回進程內共享的搜索後端"""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                if settings.SEARCH_BACKEND == "postgres":
+                    _backend = PostgresSearchBackend()
+                elif settings.SEARCH_BACKEND == "memory":
+                    _backend = InMemorySearchBackend()
+                else:
+                    raise ValueError(f"不支持的搜索後端: {settings.SEARCH_BACKEND}")
+    return _backend
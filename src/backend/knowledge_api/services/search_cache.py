@@ -0,0 +1,106 @@
+import hashlib
+import json
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import redis
+
+from ..schemas.search import SearchResult
+from ...shared.cache import GenerationCounter, TTLCache, get_redis_client, read_generations
+from src.config import settings
+
+# 配置日誌
+logger = logging.getLogger("search_cache")
+
+
+class SearchCache:
+    """搜索結果緩存：進程內 LRU+TTL 一級緩存，可選 Redis 二級緩存
+
+    緩存鍵包含文檔和問題的版本號，寫操作遞增版本後舊條目不再被命中，隨 TTL 自然淘汰。
+    """
+
+    def __init__(self, local: TTLCache, ttl: int, redis_client: Optional[Any] = None):
+        self.local = local
+        self.ttl = ttl
+        self.redis_client = redis_client
+        self.documents = GenerationCounter("search:documents", redis_client)
+        self.questions = GenerationCounter("search:questions", redis_client)
+
+    def key(self, query: str, search_types: Sequence[str], filters: Optional[Dict[str, Any]], skip: int, limit: int) -> str:
+        """根據規範化的查詢、類型、篩選條件、分頁和相關版本號生成緩存鍵"""
+        counters = [self.documents if search_type == "document" else self.questions for search_type in search_types]
+        payload = {
+            "q": " ".join(query.lower().split()),
+            "types": sorted(search_types),
+            "filters": sorted((name, str(value)) for name, value in (filters or {}).items() if value is not None),
+            "skip": skip,
+            "limit": limit,
+            "generations": read_generations(counters),
+        }
+        digest = hashlib.sha1(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+        return f"search:{digest}"
+
+    def get(self, key: str) -> Optional[Tuple[List[SearchResult], int]]:
+        """讀取緩存，依次查詢進程內緩存和 Redis"""
+        cached = self.local.get(key)
+        if cached is not None:
+            return cached
+
+        if self.redis_client is not None:
+            try:
+                raw = self.redis_client.get(key)
+            except redis.RedisError as e:
+                logger.warning(f"Failed to read search cache from Redis: {e}")
+                return None
+            if raw is not None:
+                data = json.loads(raw)
+                cached = ([SearchResult.parse_obj(item) for item in data["results"]], data["total"])
+                self.local.set(key, cached)
+                return cached
+
+        return None
+
+    def set(self, key: str, results: List[SearchResult], total: int) -> None:
+        """寫入兩級緩存"""
+        self.local.set(key, (results, total))
+
+        if self.redis_client is not None:
+            payload = json.dumps({"results": [json.loads(result.json()) for result in results], "total": total})
+            try:
+                self.redis_client.set(key, payload, ex=self.ttl)
+            except redis.RedisError as e:
+                logger.warning(f"Failed to write search cache to Redis: {e}")
+
+    def invalidate_documents(self) -> None:
+        """文檔寫入後使相關緩存失效"""
+        self.documents.bump()
+
+    def invalidate_questions(self) -> None:
+        """問題或回答寫入後使相關緩存失效"""
+        self.questions.bump()
+
+
+_search_cache: Optional[SearchCache] = None
+_search_cache_lock = threading.Lock()
+
+
+def search_cache_enabled() -> bool:
+    """是否緩存搜索結果：SEARCH_CACHE_ENABLED 未設置時只在開啟 Redis 時啟用"""
+    if settings.SEARCH_CACHE_ENABLED is None:
+        return settings.SEARCH_CACHE_REDIS_ENABLED
+    return settings.SEARCH_CACHE_ENABLED
+
+
+def get_search_cache() -> SearchCache:
+    """按 SEARCH_CACHE_* 配置返回進程內共享的搜索緩存"""
+    global _search_cache
+    if _search_cache is None:
+        with _search_cache_lock:
+            if _search_cache is None:
+                _search_cache = SearchCache(
+                    TTLCache(settings.SEARCH_CACHE_MAX_ENTRIES, settings.SEARCH_CACHE_TTL_SECONDS),
+                    settings.SEARCH_CACHE_TTL_SECONDS,
+                    get_redis_client() if settings.SEARCH_CACHE_REDIS_ENABLED else None,
+                )
+    return _search_cache
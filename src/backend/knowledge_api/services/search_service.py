@@ -1,82 +1,86 @@
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func, or_, and_, desc, text
-from typing import List, Dict, Any, Optional, Tuple
+from sqlalchemy import func, or_, and_
+from typing import List, Dict, Any, Iterable, Optional, Tuple
 import uuid
 import logging
 
 # 導入模型和架構
-from ..models.knowledge import Document, Question, Category, User
+from ..models.knowledge import Document, Question, Category, Answer
+from ...ticket_api.models.ticket import User
 from ..schemas.search import SearchResult
+from .search_backend import SearchBackend, get_search_backend
+from .highlighter import Highlighter
+from .search_cache import SearchCache, get_search_cache, search_cache_enabled
+from src.config import settings
 
 # 配置日誌
 logger = logging.getLogger("search_service")
 
 
 class SearchService:
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, backend: Optional[SearchBackend] = None, cache: Optional[SearchCache] = None):
         self.db = db
+        self.backend = backend or get_search_backend()
+        self.cache = cache or (get_search_cache() if search_cache_enabled() else None)
+        self.highlighter = Highlighter(settings.HIGHLIGHT_TAG_OPEN, settings.HIGHLIGHT_TAG_CLOSE)
 
     def search(self, query: str, search_type: str = "all", filters: Dict[str, Any] = None, skip: int = 0, limit: int = 20) -> Tuple[List[SearchResult], int]:
         """執行全文搜索"""
-        results = []
-        total = 0
-        
-        # 根據搜索類型執行不同的搜索
-        if search_type in ["all", "document"]:
-            doc_results, doc_total = self._search_documents(query, filters, skip, limit if search_type == "document" else limit // 2)
-            results.extend(doc_results)
-            total += doc_total
-            
-        if search_type in ["all", "question"]:
-            # 如果是混合搜索，調整問題搜索的分頁參數
-            q_skip = 0 if search_type == "question" else skip
-            q_limit = limit if search_type == "question" else limit - len(results)
-            
-            if q_limit > 0:
-                q_results, q_total = self._search_questions(query, filters, q_skip, q_limit)
-                results.extend(q_results)
-                if search_type == "question":
-                    total = q_total
-                else:
-                    total += q_total
-        
-        # 按相關性得分排序
-        results.sort(key=lambda x: x.score, reverse=True)
-        
+        # 根據搜索類型確定要搜索的實體
+        if search_type == "all":
+            search_types = ("document", "question")
+        elif search_type in ("document", "question"):
+            search_types = (search_type,)
+        else:
+            return [], 0
+
+        # 優先返回緩存結果
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache.key(query, search_types, filters, skip, limit)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        # 由搜索後端一次返回全局有序的一頁命中結果和總數
+        hits, total = self.backend.rank(self.db, query, search_types, filters, skip, limit)
+
+        # 按類型批量加載本頁實體
+        document_ids = [hit.id for hit in hits if hit.type == "document"]
+        question_ids = [hit.id for hit in hits if hit.type == "question"]
+        documents = {
+            doc.id: doc for doc in self.db.query(Document).filter(Document.id.in_(document_ids)).all()
+        } if document_ids else {}
+        questions = {
+            q.id: q for q in self.db.query(Question).filter(Question.id.in_(question_ids)).all()
+        } if question_ids else {}
+
+        built = {}
+        for result in self._build_document_results(
+            query, [(documents[hit.id], hit.rank) for hit in hits if hit.type == "document" and hit.id in documents]
+        ):
+            built[("document", result.id)] = result
+        for result in self._build_question_results(
+            query, [(questions[hit.id], hit.rank) for hit in hits if hit.type == "question" and hit.id in questions]
+        ):
+            built[("question", result.id)] = result
+
+        # 保持搜索後端返回的排名順序
+        results = [built[(hit.type, hit.id)] for hit in hits if (hit.type, hit.id) in built]
+
+        if cache_key is not None:
+            self.cache.set(cache_key, results, total)
         return results, total
 
-    def _search_documents(self, query: str, filters: Dict[str, Any] = None, skip: int = 0, limit: int = 20) -> Tuple[List[SearchResult], int]:
-        """搜索文檔"""
-        # 構建基本查詢
-        base_query = self.db.query(
-            Document,
-            func.ts_rank_cd(
-                Document.search_vector,
-                func.plainto_tsquery('chinese', query)
-            ).label('rank')
-        ).filter(
-            Document.search_vector.op('@@')(func.plainto_tsquery('chinese', query)),
-            Document.is_published == True  # 只搜索已發布的文檔
-        )
-        
-        # 應用篩選條件
-        if filters:
-            if filters.get("category_id"):
-                base_query = base_query.filter(Document.category_id == filters["category_id"])
-        
-        # 計算總數
-        total = base_query.count()
-        
-        # 獲取結果並排序
-        documents = base_query.order_by(desc('rank')).offset(skip).limit(limit).all()
+    def _build_document_results(self, query: str, documents: List[Tuple[Document, float]]) -> List[SearchResult]:
+        """由 (文檔, 得分) 列表構建搜索結果"""
+        # 批量加載關聯數據，每種實體類型一次查詢
+        user_names = self._load_mapping(User.id, User.full_name, (doc.creator_id for doc, _ in documents))
+        category_names = self._load_mapping(Category.id, Category.name, (doc.category_id for doc, _ in documents))
         
         # 構建結果列表
         results = []
         for doc, rank in documents:
-            # 獲取用戶和分類信息
-            user = self.db.query(User).filter(User.id == doc.user_id).first()
-            category = self.db.query(Category).filter(Category.id == doc.category_id).first() if doc.category_id else None
-            
             # 生成高亮片段
             highlights = self._generate_highlights(query, doc.content)
             
@@ -88,11 +92,11 @@ class SearchService:
                 content=doc.content[:200] + "..." if len(doc.content) > 200 else doc.content,
                 highlight={"content": highlights},
                 category_id=doc.category_id,
-                category_name=category.name if category else None,
+                category_name=category_names.get(doc.category_id),
                 created_at=doc.created_at,
                 updated_at=doc.updated_at,
-                user_id=doc.user_id,
-                user_name=user.full_name if user else "未知用戶",
+                user_id=doc.creator_id,
+                user_name=user_names.get(doc.creator_id, "未知用戶"),
                 score=rank,
                 is_published=doc.is_published,
                 published_at=doc.published_at,
@@ -100,47 +104,20 @@ class SearchService:
             )
             results.append(result)
         
-        return results, total
+        return results
 
-    def _search_questions(self, query: str, filters: Dict[str, Any] = None, skip: int = 0, limit: int = 20) -> Tuple[List[SearchResult], int]:
-        """搜索問題"""
-        # 構建基本查詢
-        base_query = self.db.query(
-            Question,
-            func.ts_rank_cd(
-                Question.search_vector,
-                func.plainto_tsquery('chinese', query)
-            ).label('rank')
-        ).filter(
-            Question.search_vector.op('@@')(func.plainto_tsquery('chinese', query))
-        )
-        
-        # 應用篩選條件
-        if filters:
-            if filters.get("category_id"):
-                # 通過文檔關聯查詢分類
-                base_query = base_query.join(Document).filter(Document.category_id == filters["category_id"])
-        
-        # 計算總數
-        total = base_query.count()
-        
-        # 獲取結果並排序
-        questions = base_query.order_by(desc('rank')).offset(skip).limit(limit).all()
+    def _build_question_results(self, query: str, questions: List[Tuple[Question, float]]) -> List[SearchResult]:
+        """由 (問題, 得分) 列表構建搜索結果"""
+        # 批量加載關聯數據，每種實體類型一次查詢
+        user_names = self._load_mapping(User.id, User.full_name, (q.user_id for q, _ in questions))
+        document_categories = self._load_mapping(Document.id, Document.category_id, (q.document_id for q, _ in questions))
+        category_names = self._load_mapping(Category.id, Category.name, document_categories.values())
+        answer_counts = self._count_answers([q.id for q, _ in questions])
         
         # 構建結果列表
         results = []
         for q, rank in questions:
-            # 獲取用戶信息
-            user = self.db.query(User).filter(User.id == q.user_id).first()
-            
-            # 獲取文檔和分類信息
-            document = self.db.query(Document).filter(Document.id == q.document_id).first() if q.document_id else None
-            category = None
-            if document and document.category_id:
-                category = self.db.query(Category).filter(Category.id == document.category_id).first()
-            
-            # 獲取回答數量
-            answer_count = self.db.query(func.count("*")).select_from(text("answers")).where(text(f"question_id = '{q.id}'")).scalar()
+            category_id = document_categories.get(q.document_id)
             
             # 生成高亮片段
             title_highlights = self._generate_highlights(query, q.title)
@@ -156,52 +133,41 @@ class SearchService:
                     "title": title_highlights,
                     "content": content_highlights
                 },
-                category_id=document.category_id if document else None,
-                category_name=category.name if category else None,
+                category_id=category_id,
+                category_name=category_names.get(category_id),
                 created_at=q.created_at,
                 updated_at=q.updated_at,
                 user_id=q.user_id,
-                user_name=user.full_name if user else "未知用戶",
+                user_name=user_names.get(q.user_id, "未知用戶"),
                 score=rank,
                 is_resolved=q.is_resolved,
                 resolved_at=q.resolved_at,
-                answer_count=answer_count
+                answer_count=answer_counts.get(q.id, 0)
             )
             results.append(result)
         
-        return results, total
+        return results
+
+    def is_estimated_total(self, total: int) -> bool:
+        """判斷總數是否為封頂估算值（實際匹配數超過閾值）"""
+        return self.backend.is_estimated_total(total)
+
+    def _load_mapping(self, key_column, value_column, keys: Iterable[Any]) -> Dict[Any, Any]:
+        """以單次 IN 查詢批量加載 key -> value 映射"""
+        keys = {key for key in keys if key is not None}
+        if not keys:
+            return {}
+        return dict(self.db.query(key_column, value_column).filter(key_column.in_(keys)).all())
+
+    def _count_answers(self, question_ids: List[Any]) -> Dict[Any, int]:
+        """以單次分組查詢統計多個問題的回答數量"""
+        if not question_ids:
+            return {}
+        rows = self.db.query(Answer.question_id, func.count(Answer.id)).filter(
+            Answer.question_id.in_(question_ids)
+        ).group_by(Answer.question_id).all()
+        return dict(rows)
 
     def _generate_highlights(self, query: str, text: str) -> List[str]:
         """生成高亮片段"""
-        # 簡單實現，實際項目中可以使用更複雜的高亮算法
-        highlights = []
-        words = query.lower().split()
-        
-        # 將文本分成段落
-        paragraphs = text.split("\n")
-        
-        for paragraph in paragraphs:
-            # 檢查段落是否包含查詢詞
-            if any(word.lower() in paragraph.lower() for word in words):
-                # 如果段落太長，截取包含查詢詞的部分
-                if len(paragraph) > 100:
-                    for word in words:
-                        word_lower = word.lower()
-                        pos = paragraph.lower().find(word_lower)
-                        if pos >= 0:
-                            start = max(0, pos - 50)
-                            end = min(len(paragraph), pos + len(word) + 50)
-                            snippet = paragraph[start:end]
-                            if start > 0:
-                                snippet = "..." + snippet
-                            if end < len(paragraph):
-                                snippet = snippet + "..."
-                            highlights.append(snippet)
-                else:
-                    highlights.append(paragraph)
-                    
-        # 如果沒有找到高亮片段，返回文本的前100個字符
-        if not highlights and text:
-            highlights = [text[:100] + "..." if len(text) > 100 else text]
-            
-        return highlights[:3]  # 最多返回3個高亮片段
\ No newline at end of file
+        return self.highlighter.highlight(query, text)
@@ -0,0 +1,24 @@
+from typing import NamedTuple, Optional
+
+
+class VoteChange(NamedTuple):
+    """一次投票操作的結果：投票的新狀態（None 表示已取消）和計數增量"""
+    vote: Optional[bool]
+    upvotes: int
+    downvotes: int
+
+    @property
+    def score(self) -> int:
+        return self.upvotes - self.downvotes
+
+
+def vote_change(existing: Optional[bool], is_upvote: bool) -> VoteChange:
+    """根據用戶已有的投票計算新狀態和計數增量
+
+    沒有投票時新增；與已有投票相同時取消；相反時改投。
+    """
+    if existing is None:
+        return VoteChange(is_upvote, int(is_upvote), int(not is_upvote))
+    if existing == is_upvote:
+        return VoteChange(None, -int(existing), -int(not existing))
+    return VoteChange(is_upvote, 1 if is_upvote else -1, -1 if is_upvote else 1)
@@ -0,0 +1,131 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Sequence
+
+import redis
+
+from src.config import settings
+
+# 配置日誌
+logger = logging.getLogger("cache")
+
+_MISSING = object()
+
+
+class TTLCache:
+    """進程內 LRU 緩存，條目超過 ttl 秒後過期；所有操作均為線程安全"""
+
+    def __init__(self, maxsize: int, ttl: float, clock: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """讀取條目，未命中或已過期時返回 default"""
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is _MISSING:
+                return default
+            expires_at, value = entry
+            if expires_at <= self._clock():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """寫入條目，超出容量時淘汰最久未使用的條目"""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (self._clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class GenerationCounter:
+    """單調遞增的版本計數器，用於使依賴某類數據的緩存整體失效
+
+    配置 Redis 客戶端時計數器保存在 Redis 中，所有工作進程共享；
+    Redis 不可用時退回進程內計數，保證至少本進程的寫入能使緩存失效。
+    """
+
+    def __init__(self, name: str, redis_client: Optional[Any] = None):
+        self.name = name
+        self.redis_key = f"generation:{name}"
+        self.redis_client = redis_client
+        self._local = 0
+        self._lock = threading.Lock()
+
+    def current(self) -> int:
+        """返回當前版本"""
+        if self.redis_client is not None:
+            try:
+                value = self.redis_client.get(self.redis_key)
+                return int(value) if value is not None else 0
+            except redis.RedisError as e:
+                logger.warning(f"Failed to read generation {self.name} from Redis: {e}")
+        return self._local
+
+    def bump(self) -> int:
+        """遞增版本並返回新值"""
+        with self._lock:
+            self._local += 1
+            local = self._local
+        if self.redis_client is not None:
+            try:
+                return int(self.redis_client.incr(self.redis_key))
+            except redis.RedisError as e:
+                logger.warning(f"Failed to bump generation {self.name} in Redis: {e}")
+        return local
+
+
+def read_generations(counters: Sequence[GenerationCounter]) -> Dict[str, int]:
+    """讀取多個計數器的當前版本，共用同一 Redis 客戶端時合併為一次 MGET"""
+    clients = {id(counter.redis_client) for counter in counters}
+    redis_client = counters[0].redis_client if counters and len(clients) == 1 else None
+    if redis_client is not None:
+        try:
+            values = redis_client.mget([counter.redis_key for counter in counters])
+            return {
+                counter.name: int(value) if value is not None else 0
+                for counter, value in zip(counters, values)
+            }
+        except redis.RedisError as e:
+            logger.warning(f"Failed to read generations from Redis: {e}")
+            return {counter.name: counter._local for counter in counters}
+    return {counter.name: counter.current() for counter in counters}
+
+
+_redis_client: Optional[redis.Redis] = None
+_redis_lock = threading.Lock()
+
+
+def get_redis_client() -> redis.Redis:
+    """返回基於 Settings.REDIS_URL 的共享 Redis 客戶端"""
+    global _redis_client
+    if _redis_client is None:
+        with _redis_lock:
+            if _redis_client is None:
+                _redis_client = redis.Redis.from_url(
+                    settings.REDIS_URL,
+                    socket_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+                    socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+                )
+    return _redis_client
@@ -0,0 +1,68 @@
+import csv
+import io
+import json
+import uuid
+from datetime import date, datetime
+from typing import Any, Iterable, Iterator, Mapping, Sequence
+
+# 支持的導出格式及其響應類型
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def export_value(value: Any) -> Any:
+    """把數據庫值轉換為可序列化的值：UUID 轉字符串，時間轉 ISO 8601"""
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def iter_csv(rows: Iterable[Sequence[Any]], columns: Sequence[str], batch_size: int = 500) -> Iterator[str]:
+    """把行流編碼為 CSV 文本塊：首塊為表頭，之後每 batch_size 行輸出一塊"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+
+    pending = 0
+    for row in rows:
+        writer.writerow(["" if value is None else export_value(value) for value in row])
+        pending += 1
+        if pending >= batch_size:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def iter_json_lines(records: Iterable[Mapping[str, Any]], batch_size: int = 500) -> Iterator[str]:
+    """把字典流編碼為 NDJSON 文本塊，每行一個 JSON 對象"""
+    lines = []
+    for record in records:
+        lines.append(json.dumps({key: export_value(value) for key, value in record.items()}, ensure_ascii=False))
+        if len(lines) >= batch_size:
+            yield "\n".join(lines) + "\n"
+            lines = []
+
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+def iter_ndjson(rows: Iterable[Sequence[Any]], columns: Sequence[str], batch_size: int = 500) -> Iterator[str]:
+    """把行流編碼為 NDJSON 文本塊，每行一個 JSON 對象"""
+    return iter_json_lines((dict(zip(columns, row)) for row in rows), batch_size)
+
+
+def iter_export(rows: Iterable[Sequence[Any]], columns: Sequence[str], fmt: str, batch_size: int = 500) -> Iterator[str]:
+    """按格式編碼行流"""
+    if fmt == "csv":
+        return iter_csv(rows, columns, batch_size)
+    if fmt == "ndjson":
+        return iter_ndjson(rows, columns, batch_size)
+    raise ValueError(f"不支持的導出格式: {fmt}")
@@ -0,0 +1,43 @@
+import base64
+import binascii
+import json
+import uuid
+from datetime import datetime
+from typing import Any, Mapping, Optional, Sequence, Tuple
+
+
+class InvalidCursorError(ValueError):
+    """分頁游標格式錯誤"""
+    pass
+
+
+def encode_cursor(created_at: datetime, record_id: uuid.UUID) -> str:
+    """將 (created_at, id) 編碼為不透明的游標字符串"""
+    payload = json.dumps(
+        {"created_at": created_at.isoformat(), "id": str(record_id)},
+        separators=(",", ":"),
+    )
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    """解碼游標字符串，返回 (created_at, id)"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(payload["created_at"]), uuid.UUID(payload["id"])
+    except (binascii.Error, UnicodeError, ValueError, KeyError, TypeError) as e:
+        raise InvalidCursorError(f"無效的分頁游標: {cursor}") from e
+
+
+def next_cursor(items: Sequence[Any], limit: int) -> Optional[str]:
+    """根據當前頁的最後一條記錄生成下一頁游標，沒有下一頁時返回 None
+
+    記錄可以是帶 created_at / id 屬性的對象，也可以是包含這兩個鍵的字典。
+    """
+    if limit <= 0 or len(items) < limit:
+        return None
+    last = items[-1]
+    if isinstance(last, Mapping):
+        return encode_cursor(last["created_at"], last["id"])
+    return encode_cursor(last.created_at, last.id)
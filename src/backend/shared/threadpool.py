@@ -0,0 +1,10 @@
+from anyio import to_thread
+
+
+def configure_threadpool(size: int) -> None:
+    """設置運行同步路由和依賴的線程池大小
+
+    FastAPI 在 anyio 默認線程池中執行 def 路由和同步依賴；將其大小與數據庫連接池對齊，
+    避免線程在等待連接時堆積。必須在事件循環中調用（例如 startup 事件）。
+    """
+    to_thread.current_default_thread_limiter().total_tokens = size
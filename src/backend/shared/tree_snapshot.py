@@ -0,0 +1,125 @@
+import hashlib
+import logging
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, Hashable, Iterable, List, NamedTuple, Optional, Tuple
+
+from fastapi import Request, Response, status
+
+from .cache import GenerationCounter, get_redis_client
+from src.config import settings
+
+# 配置日誌
+logger = logging.getLogger("tree_snapshot")
+
+
+class TreeSnapshot(NamedTuple):
+    """預先序列化的樹結構：構建時的版本號、JSON 響應體和 ETag"""
+    generation: int
+    body: bytes
+    etag: str
+    built_at: float
+
+
+def build_tree(nodes: Iterable[Any], key: Callable[[Any], Hashable],
+               parent: Callable[[Any], Optional[Hashable]]) -> Tuple[List[Any], Dict[Hashable, List[Any]]]:
+    """把扁平的節點列表組裝為樹，返回 (頂級節點, 節點鍵到子節點列表的映射)
+
+    子節點保持輸入順序；父節點不在列表中的節點視為頂級節點。
+    """
+    nodes = list(nodes)
+    keys = {key(node) for node in nodes}
+    roots = []
+    children: Dict[Hashable, List[Any]] = defaultdict(list)
+    for node in nodes:
+        parent_key = parent(node)
+        if parent_key is None or parent_key not in keys:
+            roots.append(node)
+        else:
+            children[parent_key].append(node)
+    return roots, children
+
+
+def make_etag(body: bytes) -> str:
+    """按響應體內容生成強 ETag，內容相同的快照在所有工作進程中 ETag 相同"""
+    return '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """判斷 If-None-Match 請求頭是否與 ETag 匹配（按弱比較，支持列表和 *）"""
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+
+class TreeSnapshotCache:
+    """進程內的樹結構快照，寫操作遞增版本號後在下次讀取時重建
+
+    配置 Redis 客戶端時版本號在所有工作進程間共享，其他進程的寫入在下一次請求即可生效；
+    未配置 Redis 時快照最多保留 max_age 秒，以吸收其他進程的寫入。
+    """
+
+    def __init__(self, name: str, max_age: float, redis_client: Optional[Any] = None):
+        self.name = name
+        self.max_age = max_age
+        self.generation = GenerationCounter(f"tree:{name}", redis_client)
+        self._snapshot: Optional[TreeSnapshot] = None
+        self._lock = threading.Lock()
+
+    def get(self, build: Callable[[], bytes]) -> TreeSnapshot:
+        """返回當前快照，版本號變化或過期時調用 build 重新構建"""
+        generation = self.generation.current()
+        snapshot = self._snapshot
+        if self._is_current(snapshot, generation):
+            return snapshot
+
+        with self._lock:
+            snapshot = self._snapshot
+            if self._is_current(snapshot, generation):
+                return snapshot
+            started = time.monotonic()
+            body = build()
+            snapshot = TreeSnapshot(generation, body, make_etag(body), time.monotonic())
+            self._snapshot = snapshot
+            logger.info(f"Tree snapshot {self.name} rebuilt at generation {generation} "
+                        f"({len(body)} bytes) in {snapshot.built_at - started:.3f}s")
+            return snapshot
+
+    def invalidate(self) -> None:
+        """樹結構寫入後使快照失效"""
+        self.generation.bump()
+        self._snapshot = None
+
+    def _is_current(self, snapshot: Optional[TreeSnapshot], generation: int) -> bool:
+        if snapshot is None or snapshot.generation != generation:
+            return False
+        return self.max_age <= 0 or time.monotonic() - snapshot.built_at <= self.max_age
+
+
+def snapshot_response(snapshot: TreeSnapshot, request: Request) -> Response:
+    """返回快照的 JSON 響應；請求的 If-None-Match 與 ETag 匹配時返回 304"""
+    headers = {"ETag": snapshot.etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), snapshot.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=snapshot.body, media_type="application/json", headers=headers)
+
+
+_tree_caches: Dict[str, TreeSnapshotCache] = {}
+_tree_caches_lock = threading.Lock()
+
+
+def get_tree_cache(name: str) -> TreeSnapshotCache:
+    """按 TREE_SNAPSHOT_* 配置返回進程內共享的指定樹結構快照"""
+    cache = _tree_caches.get(name)
+    if cache is None:
+        with _tree_caches_lock:
+            cache = _tree_caches.get(name)
+            if cache is None:
+                cache = _tree_caches[name] = TreeSnapshotCache(
+                    name,
+                    settings.TREE_SNAPSHOT_MAX_AGE_SECONDS,
+                    get_redis_client() if settings.TREE_SNAPSHOT_REDIS_ENABLED else None,
+                )
+    return cache
@@ -5,6 +5,11 @@ import os
 import logging
 from typing import List
 
+from src.config import settings
+from src.database.async_session import dispose_async_engine
+from src.database.db import get_pool_status
+from ..shared.threadpool import configure_threadpool
+
 # 配置日誌
 logging.basicConfig(
     level=logging.INFO,
@@ -33,6 +38,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # 包含路由 - 暫時註解掉避免導入錯誤
@@ -46,6 +52,8 @@ app.add_middleware(
 @app.on_event("startup")
 async def startup_event():
     logger.info("Starting up Ticket API")
+    # 同步路由在線程池中執行，線程數與數據庫連接池對齊
+    configure_threadpool(settings.DB_THREADPOOL_SIZE)
     # 初始化數據庫 - 暫時註解掉
     # init_db()
     logger.info("Database initialized")
@@ -55,6 +63,7 @@ async def startup_event():
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info("Shutting down Ticket API")
+    await dispose_async_engine()
 
 
 # 健康檢查端點
@@ -63,6 +72,12 @@ async def health_check():
     return {"status": "healthy", "service": "ticket_api"}
 
 
+# 連接池狀態端點，用於按工作進程數調整連接池大小
+@app.get("/health/db-pool")
+async def db_pool_health():
+    return get_pool_status()
+
+
 # 根路由
 @app.get("/")
 async def root():
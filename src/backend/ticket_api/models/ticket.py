@@ -1,9 +1,13 @@
-from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, String, Text, func
+from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Index, Integer, String, Text, func
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 import uuid
 
 from database.session import Base
+from database.trigram import enable_pg_trgm, trigram_index
+
+# 子串搜索使用的 pg_trgm 擴展
+enable_pg_trgm(Base.metadata)
 
 
 class Department(Base):
@@ -24,6 +28,12 @@ class Department(Base):
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        # 用戶列表子串搜索
+        trigram_index("ix_users_username_trgm", "username"),
+        trigram_index("ix_users_email_trgm", "email"),
+        trigram_index("ix_users_full_name_trgm", "full_name"),
+    )
     
     id = Column(UUID, primary_key=True, default=uuid.uuid4)
     username = Column(String(50), nullable=False, unique=True)
@@ -132,6 +142,13 @@ class TicketPriority(Base):
 
 class Ticket(Base):
     __tablename__ = "tickets"
+    __table_args__ = (
+        # 鍵集分頁索引，對應 ORDER BY created_at DESC, id DESC
+        Index("ix_tickets_created_at_id", "created_at", "id"),
+        # 工單列表子串搜索
+        trigram_index("ix_tickets_title_trgm", "title"),
+        trigram_index("ix_tickets_description_trgm", "description"),
+    )
     
     id = Column(UUID, primary_key=True, default=uuid.uuid4)
     title = Column(String(200), nullable=False)
@@ -195,6 +212,10 @@ class TicketComment(Base):
 
 class TicketHistory(Base):
     __tablename__ = "ticket_history"
+    __table_args__ = (
+        # 歷史記錄鍵集分頁索引，對應 WHERE ticket_id = ? ORDER BY created_at DESC, id DESC
+        Index("ix_ticket_history_ticket_id_created_at_id", "ticket_id", "created_at", "id"),
+    )
     
     id = Column(UUID, primary_key=True, default=uuid.uuid4)
     ticket_id = Column(UUID, ForeignKey("tickets.id"), nullable=False)
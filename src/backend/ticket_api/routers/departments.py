@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
 from sqlalchemy.orm import Session
 from typing import List, Optional
 import uuid
@@ -12,18 +12,20 @@ from ..schemas.department import (
     DepartmentCreate, 
     DepartmentUpdate, 
     DepartmentResponse, 
-    DepartmentListResponse
+    DepartmentListResponse,
+    DepartmentTreeResponse
 )
 
 # 導入服務
 from ..services.department_service import DepartmentService
+from ...shared.tree_snapshot import snapshot_response
 
 # 創建路由
 router = APIRouter(prefix="/departments", tags=["departments"])
 
 
 @router.get("/", response_model=DepartmentListResponse)
-async def get_departments(
+def get_departments(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
     search: Optional[str] = None,
@@ -50,7 +52,7 @@ async def get_departments(
 
 
 @router.post("/", response_model=DepartmentResponse, status_code=status.HTTP_201_CREATED)
-async def create_department(department: DepartmentCreate, db: Session = Depends(get_db)):
+def create_department(department: DepartmentCreate, db: Session = Depends(get_db)):
     """創建新部門"""
     department_service = DepartmentService(db)
     
@@ -65,8 +67,19 @@ async def create_department(department: DepartmentCreate, db: Session = Depends(
     return department_service.create_department(department)
 
 
+@router.get("/tree", response_model=List[DepartmentTreeResponse])
+def get_department_tree(request: Request, db: Session = Depends(get_db)):
+    """獲取部門樹結構
+
+    返回進程內緩存的序列化結果並附帶 ETag，請求頭 If-None-Match 匹配時返回 304。
+    快照從主庫重建：寫入遞增版本號後，副本可能尚未同步，從副本重建會把舊樹緩存在新版本下。
+    """
+    department_service = DepartmentService(db)
+    return snapshot_response(department_service.get_department_tree_snapshot(), request)
+
+
 @router.get("/{department_id}", response_model=DepartmentResponse)
-async def get_department(department_id: uuid.UUID, db: Session = Depends(get_db)):
+def get_department(department_id: uuid.UUID, db: Session = Depends(get_db)):
     """獲取部門詳情"""
     department_service = DepartmentService(db)
     department = department_service.get_department(department_id)
@@ -81,7 +94,7 @@ async def get_department(department_id: uuid.UUID, db: Session = Depends(get_db)
 
 
 @router.put("/{department_id}", response_model=DepartmentResponse)
-async def update_department(department_id: uuid.UUID, department_update: DepartmentUpdate, db: Session = Depends(get_db)):
+def update_department(department_id: uuid.UUID, department_update: DepartmentUpdate, db: Session = Depends(get_db)):
     """更新部門信息"""
     department_service = DepartmentService(db)
     
@@ -107,7 +120,7 @@ async def update_department(department_id: uuid.UUID, department_update: Departm
 
 
 @router.delete("/{department_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_department(department_id: uuid.UUID, db: Session = Depends(get_db)):
+def delete_department(department_id: uuid.UUID, db: Session = Depends(get_db)):
     """刪除部門"""
     department_service = DepartmentService(db)
     
@@ -137,7 +150,7 @@ async def delete_department(department_id: uuid.UUID, db: Session = Depends(get_
 
 
 @router.get("/by-name/{name}", response_model=DepartmentResponse)
-async def get_department_by_name(name: str, db: Session = Depends(get_db)):
+def get_department_by_name(name: str, db: Session = Depends(get_db)):
     """通過名稱獲取部門"""
     department_service = DepartmentService(db)
     department = department_service.get_department_by_name(name)
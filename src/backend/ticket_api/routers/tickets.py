@@ -1,11 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query, Path, Body, File, UploadFile
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Path, Body, File, UploadFile, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
 import uuid
+import io
 from datetime import datetime
 
 # 導入數據庫依賴
-from database.session import get_db
+from database.session import get_db, get_read_db
 
 # 導入模型和架構
 from ..models.ticket import Ticket, TicketAttachment, TicketComment, TicketHistory, WorkflowApproval
@@ -18,11 +20,18 @@ from ..schemas.ticket import (
     TicketCommentResponse,
     TicketAttachmentResponse,
     WorkflowApprovalCreate,
-    WorkflowApprovalResponse
+    WorkflowApprovalResponse,
+    TicketImportResponse,
+    TicketBulkUpdate,
+    TicketBulkUpdateResponse
 )
 
 # 導入服務
 from ..services.ticket_service import TicketService
+from ..services.ticket_import import IMPORT_FORMATS, detect_format
+from ..services.ticket_import_service import TicketImportService
+from ...shared.export import EXPORT_MEDIA_TYPES, iter_export, iter_json_lines
+from ...shared.pagination import InvalidCursorError, next_cursor
 
 # 創建路由
 router = APIRouter()
@@ -32,8 +41,14 @@ def get_ticket_service(db: Session = Depends(get_db)):
     return TicketService(db)
 
 
+# 只讀端點使用的工單服務實例（可讀取副本）
+def get_read_ticket_service(db: Session = Depends(get_read_db)):
+    return TicketService(db)
+
+
 @router.get("/", response_model=List[TicketListResponse])
-async def get_tickets(
+def get_tickets(
+    response: Response,
     skip: int = Query(0, description="跳過的記錄數"),
     limit: int = Query(100, description="返回的最大記錄數"),
     status_id: Optional[uuid.UUID] = Query(None, description="按狀態篩選"),
@@ -42,9 +57,13 @@ async def get_tickets(
     assignee_id: Optional[uuid.UUID] = Query(None, description="按負責人篩選"),
     creator_id: Optional[uuid.UUID] = Query(None, description="按創建者篩選"),
     search: Optional[str] = Query(None, description="搜索標題和描述"),
-    ticket_service: TicketService = Depends(get_ticket_service)
+    cursor: Optional[str] = Query(None, description="分頁游標，取自上一頁響應的 X-Next-Cursor 頭，傳入後忽略 skip"),
+    ticket_service: TicketService = Depends(get_read_ticket_service)
 ):
-    """獲取工單列表，支持分頁和篩選"""
+    """獲取工單列表，支持分頁和篩選
+
+    響應頭 X-Next-Cursor 攜帶下一頁游標，沒有下一頁時不返回。
+    """
     filters = {
         "status_id": status_id,
         "priority_id": priority_id,
@@ -53,11 +72,19 @@ async def get_tickets(
         "creator_id": creator_id,
         "search": search
     }
-    return ticket_service.get_tickets(skip=skip, limit=limit, filters=filters)
+    try:
+        tickets = ticket_service.get_tickets(skip=skip, limit=limit, filters=filters, cursor=cursor)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    cursor_for_next_page = next_cursor(tickets, limit)
+    if cursor_for_next_page:
+        response.headers["X-Next-Cursor"] = cursor_for_next_page
+    return tickets
 
 
 @router.post("/", response_model=TicketResponse, status_code=status.HTTP_201_CREATED)
-async def create_ticket(
+def create_ticket(
     ticket: TicketCreate,
     ticket_service: TicketService = Depends(get_ticket_service)
 ):
@@ -65,8 +92,83 @@ async def create_ticket(
     return ticket_service.create_ticket(ticket)
 
 
+@router.post("/import", response_model=TicketImportResponse)
+def import_tickets(
+    file: UploadFile = File(..., description="NDJSON 或 CSV 文件，每條記錄為一個工單創建請求"),
+    format: Optional[str] = Query(None, description="文件格式：ndjson 或 csv，默認根據文件名推斷"),
+    db: Session = Depends(get_db)
+):
+    """批量導入工單
+
+    記錄按塊驗證和寫入，無效行記入響應的 errors，不影響其他行的導入。
+    """
+    fmt = format or detect_format(file.filename, file.content_type)
+    if fmt not in IMPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="無法確定文件格式，請指定 format=ndjson 或 format=csv"
+        )
+
+    stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    try:
+        report = TicketImportService(db).import_stream(stream, fmt)
+    except UnicodeDecodeError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="文件必須使用 UTF-8 編碼"
+        )
+    return report.to_dict()
+
+
+@router.post("/bulk-update", response_model=TicketBulkUpdateResponse)
+def bulk_update_tickets(
+    bulk_update: TicketBulkUpdate,
+    ticket_service: TicketService = Depends(get_ticket_service)
+):
+    """把同一個補丁應用到多張工單，例如批量改派或關閉
+
+    ticket_ids 和 filters 同時提供時取交集；與補丁完全相同的工單不會被更新。
+    """
+    filters = bulk_update.filters.dict() if bulk_update.filters else None
+    ticket_ids = ticket_service.bulk_update_tickets(
+        bulk_update.patch,
+        ticket_ids=bulk_update.ticket_ids,
+        filters=filters,
+        updated_by=bulk_update.updated_by
+    )
+    return {"updated": len(ticket_ids), "ticket_ids": ticket_ids}
+
+
+@router.get("/export")
+def export_tickets(
+    format: str = Query("csv", regex="^(csv|ndjson)$", description="導出格式：csv 或 ndjson"),
+    status_id: Optional[uuid.UUID] = Query(None, description="按狀態篩選"),
+    priority_id: Optional[uuid.UUID] = Query(None, description="按優先級篩選"),
+    type_id: Optional[uuid.UUID] = Query(None, description="按類型篩選"),
+    assignee_id: Optional[uuid.UUID] = Query(None, description="按負責人篩選"),
+    creator_id: Optional[uuid.UUID] = Query(None, description="按創建者篩選"),
+    search: Optional[str] = Query(None, description="搜索標題和描述"),
+    ticket_service: TicketService = Depends(get_read_ticket_service)
+):
+    """以流式響應導出符合篩選條件的全部工單，篩選參數與工單列表相同"""
+    filters = {
+        "status_id": status_id,
+        "priority_id": priority_id,
+        "type_id": type_id,
+        "assignee_id": assignee_id,
+        "creator_id": creator_id,
+        "search": search
+    }
+    result = ticket_service.export_tickets(filters)
+    return StreamingResponse(
+        iter_export(result, list(result.keys()), format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="tickets.{format}"'}
+    )
+
+
 @router.get("/{ticket_id}", response_model=TicketResponse)
-async def get_ticket(
+def get_ticket(
     ticket_id: uuid.UUID = Path(..., description="工單ID"),
     ticket_service: TicketService = Depends(get_ticket_service)
 ):
@@ -81,7 +183,7 @@ async def get_ticket(
 
 
 @router.put("/{ticket_id}", response_model=TicketResponse)
-async def update_ticket(
+def update_ticket(
     ticket_id: uuid.UUID = Path(..., description="工單ID"),
     ticket_update: TicketUpdate = Body(...),
     ticket_service: TicketService = Depends(get_ticket_service)
@@ -97,7 +199,7 @@ async def update_ticket(
 
 
 @router.delete("/{ticket_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_ticket(
+def delete_ticket(
     ticket_id: uuid.UUID = Path(..., description="工單ID"),
     ticket_service: TicketService = Depends(get_ticket_service)
 ):
@@ -112,7 +214,7 @@ async def delete_ticket(
 
 
 @router.post("/{ticket_id}/comments", response_model=TicketCommentResponse, status_code=status.HTTP_201_CREATED)
-async def create_ticket_comment(
+def create_ticket_comment(
     ticket_id: uuid.UUID = Path(..., description="工單ID"),
     comment: TicketCommentCreate = Body(...),
     ticket_service: TicketService = Depends(get_ticket_service)
@@ -122,7 +224,7 @@ async def create_ticket_comment(
 
 
 @router.get("/{ticket_id}/comments", response_model=List[TicketCommentResponse])
-async def get_ticket_comments(
+def get_ticket_comments(
     ticket_id: uuid.UUID = Path(..., description="工單ID"),
     skip: int = Query(0, description="跳過的記錄數"),
     limit: int = Query(100, description="返回的最大記錄數"),
@@ -133,7 +235,7 @@ async def get_ticket_comments(
 
 
 @router.post("/{ticket_id}/attachments", response_model=TicketAttachmentResponse, status_code=status.HTTP_201_CREATED)
-async def upload_ticket_attachment(
+def upload_ticket_attachment(
     ticket_id: uuid.UUID = Path(..., description="工單ID"),
     file: UploadFile = File(...),
     user_id: uuid.UUID = Query(..., description="上傳用戶ID"),
@@ -144,7 +246,7 @@ async def upload_ticket_attachment(
 
 
 @router.get("/{ticket_id}/attachments", response_model=List[TicketAttachmentResponse])
-async def get_ticket_attachments(
+def get_ticket_attachments(
     ticket_id: uuid.UUID = Path(..., description="工單ID"),
     ticket_service: TicketService = Depends(get_ticket_service)
 ):
@@ -153,7 +255,7 @@ async def get_ticket_attachments(
 
 
 @router.post("/{ticket_id}/approvals", response_model=WorkflowApprovalResponse, status_code=status.HTTP_201_CREATED)
-async def create_workflow_approval(
+def create_workflow_approval(
     ticket_id: uuid.UUID = Path(..., description="工單ID"),
     approval: WorkflowApprovalCreate = Body(...),
     ticket_service: TicketService = Depends(get_ticket_service)
@@ -163,7 +265,7 @@ async def create_workflow_approval(
 
 
 @router.get("/{ticket_id}/approvals", response_model=List[WorkflowApprovalResponse])
-async def get_workflow_approvals(
+def get_workflow_approvals(
     ticket_id: uuid.UUID = Path(..., description="工單ID"),
     ticket_service: TicketService = Depends(get_ticket_service)
 ):
@@ -172,9 +274,35 @@ async def get_workflow_approvals(
 
 
 @router.get("/{ticket_id}/history", response_model=List[dict])
-async def get_ticket_history(
+def get_ticket_history(
+    response: Response,
     ticket_id: uuid.UUID = Path(..., description="工單ID"),
-    ticket_service: TicketService = Depends(get_ticket_service)
+    limit: Optional[int] = Query(None, ge=1, description="每頁記錄數，不指定時返回全部"),
+    cursor: Optional[str] = Query(None, description="分頁游標，取自上一頁響應的 X-Next-Cursor 頭"),
+    ticket_service: TicketService = Depends(get_read_ticket_service)
+):
+    """獲取工單歷史記錄，按時間倒序
+
+    指定 limit 時分頁返回，響應頭 X-Next-Cursor 攜帶下一頁游標，沒有下一頁時不返回。
+    """
+    try:
+        history = ticket_service.get_history(ticket_id, limit=limit, cursor=cursor)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    cursor_for_next_page = next_cursor(history, limit) if limit else None
+    if cursor_for_next_page:
+        response.headers["X-Next-Cursor"] = cursor_for_next_page
+    return history
+
+
+@router.get("/{ticket_id}/history/stream")
+def stream_ticket_history(
+    ticket_id: uuid.UUID = Path(..., description="工單ID"),
+    ticket_service: TicketService = Depends(get_read_ticket_service)
 ):
-    """獲取工單歷史記錄"""
-    return ticket_service.get_history(ticket_id)
\ No newline at end of file
+    """以 NDJSON 流式返回工單的全部歷史記錄，按時間倒序"""
+    return StreamingResponse(
+        iter_json_lines(ticket_service.stream_history(ticket_id)),
+        media_type=EXPORT_MEDIA_TYPES["ndjson"]
+    )
\ No newline at end of file
@@ -23,7 +23,7 @@ router = APIRouter(prefix="/users", tags=["users"])
 
 
 @router.get("/", response_model=UserListResponse)
-async def get_users(
+def get_users(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
     department_id: Optional[uuid.UUID] = None,
@@ -53,7 +53,7 @@ async def get_users(
 
 
 @router.post("/", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-async def create_user(user: UserCreate, db: Session = Depends(get_db)):
+def create_user(user: UserCreate, db: Session = Depends(get_db)):
     """創建新用戶"""
     user_service = UserService(db)
     
@@ -78,7 +78,7 @@ async def create_user(user: UserCreate, db: Session = Depends(get_db)):
 
 
 @router.get("/{user_id}", response_model=UserResponse)
-async def get_user(user_id: uuid.UUID, db: Session = Depends(get_db)):
+def get_user(user_id: uuid.UUID, db: Session = Depends(get_db)):
     """獲取用戶詳情"""
     user_service = UserService(db)
     user = user_service.get_user(user_id)
@@ -93,7 +93,7 @@ async def get_user(user_id: uuid.UUID, db: Session = Depends(get_db)):
 
 
 @router.put("/{user_id}", response_model=UserResponse)
-async def update_user(user_id: uuid.UUID, user_update: UserUpdate, db: Session = Depends(get_db)):
+def update_user(user_id: uuid.UUID, user_update: UserUpdate, db: Session = Depends(get_db)):
     """更新用戶信息"""
     user_service = UserService(db)
     
@@ -128,7 +128,7 @@ async def update_user(user_id: uuid.UUID, user_update: UserUpdate, db: Session =
 
 
 @router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_user(user_id: uuid.UUID, db: Session = Depends(get_db)):
+def delete_user(user_id: uuid.UUID, db: Session = Depends(get_db)):
     """刪除用戶"""
     user_service = UserService(db)
     
@@ -151,7 +151,7 @@ async def delete_user(user_id: uuid.UUID, db: Session = Depends(get_db)):
 
 
 @router.get("/by-username/{username}", response_model=UserResponse)
-async def get_user_by_username(username: str, db: Session = Depends(get_db)):
+def get_user_by_username(username: str, db: Session = Depends(get_db)):
     """通過用戶名獲取用戶"""
     user_service = UserService(db)
     user = user_service.get_user_by_username(username)
@@ -26,7 +26,7 @@ router = APIRouter(prefix="/workflows", tags=["workflows"])
 
 
 @router.get("/", response_model=WorkflowListResponse)
-async def get_workflows(
+def get_workflows(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
     search: Optional[str] = None,
@@ -53,7 +53,7 @@ async def get_workflows(
 
 
 @router.post("/", response_model=WorkflowResponse, status_code=status.HTTP_201_CREATED)
-async def create_workflow(workflow: WorkflowCreate, db: Session = Depends(get_db)):
+def create_workflow(workflow: WorkflowCreate, db: Session = Depends(get_db)):
     """創建新工作流"""
     workflow_service = WorkflowService(db)
     
@@ -69,7 +69,7 @@ async def create_workflow(workflow: WorkflowCreate, db: Session = Depends(get_db
 
 
 @router.get("/{workflow_id}", response_model=WorkflowResponse)
-async def get_workflow(workflow_id: uuid.UUID, db: Session = Depends(get_db)):
+def get_workflow(workflow_id: uuid.UUID, db: Session = Depends(get_db)):
     """獲取工作流詳情"""
     workflow_service = WorkflowService(db)
     workflow = workflow_service.get_workflow(workflow_id)
@@ -84,7 +84,7 @@ async def get_workflow(workflow_id: uuid.UUID, db: Session = Depends(get_db)):
 
 
 @router.put("/{workflow_id}", response_model=WorkflowResponse)
-async def update_workflow(workflow_id: uuid.UUID, workflow_update: WorkflowUpdate, db: Session = Depends(get_db)):
+def update_workflow(workflow_id: uuid.UUID, workflow_update: WorkflowUpdate, db: Session = Depends(get_db)):
     """更新工作流信息"""
     workflow_service = WorkflowService(db)
     
@@ -110,7 +110,7 @@ async def update_workflow(workflow_id: uuid.UUID, workflow_update: WorkflowUpdat
 
 
 @router.delete("/{workflow_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_workflow(workflow_id: uuid.UUID, db: Session = Depends(get_db)):
+def delete_workflow(workflow_id: uuid.UUID, db: Session = Depends(get_db)):
     """刪除工作流"""
     workflow_service = WorkflowService(db)
     
@@ -140,7 +140,7 @@ async def delete_workflow(workflow_id: uuid.UUID, db: Session = Depends(get_db))
 
 
 @router.post("/{workflow_id}/steps", response_model=WorkflowStepResponse, status_code=status.HTTP_201_CREATED)
-async def create_workflow_step(workflow_id: uuid.UUID, step: WorkflowStepCreate, db: Session = Depends(get_db)):
+def create_workflow_step(workflow_id: uuid.UUID, step: WorkflowStepCreate, db: Session = Depends(get_db)):
     """為工作流添加步驟"""
     workflow_service = WorkflowService(db)
     
@@ -163,7 +163,7 @@ async def create_workflow_step(workflow_id: uuid.UUID, step: WorkflowStepCreate,
 
 
 @router.get("/{workflow_id}/steps", response_model=List[WorkflowStepResponse])
-async def get_workflow_steps(workflow_id: uuid.UUID, db: Session = Depends(get_db)):
+def get_workflow_steps(workflow_id: uuid.UUID, db: Session = Depends(get_db)):
     """獲取工作流的所有步驟"""
     workflow_service = WorkflowService(db)
     
@@ -179,7 +179,7 @@ async def get_workflow_steps(workflow_id: uuid.UUID, db: Session = Depends(get_d
 
 
 @router.put("/{workflow_id}/steps/{step_id}", response_model=WorkflowStepResponse)
-async def update_workflow_step(workflow_id: uuid.UUID, step_id: uuid.UUID, step_update: WorkflowStepUpdate, db: Session = Depends(get_db)):
+def update_workflow_step(workflow_id: uuid.UUID, step_id: uuid.UUID, step_update: WorkflowStepUpdate, db: Session = Depends(get_db)):
     """更新工作流步驟"""
     workflow_service = WorkflowService(db)
     
@@ -212,7 +212,7 @@ async def update_workflow_step(workflow_id: uuid.UUID, step_id: uuid.UUID, step_
 
 
 @router.delete("/{workflow_id}/steps/{step_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_workflow_step(workflow_id: uuid.UUID, step_id: uuid.UUID, db: Session = Depends(get_db)):
+def delete_workflow_step(workflow_id: uuid.UUID, step_id: uuid.UUID, db: Session = Depends(get_db)):
     """刪除工作流步驟"""
     workflow_service = WorkflowService(db)
     
@@ -33,6 +33,16 @@ class DepartmentResponse(BaseModel):
         orm_mode = True
 
 
+class DepartmentTreeResponse(DepartmentResponse):
+    """部門樹節點響應模型"""
+    parent_id: Optional[uuid.UUID] = None
+    children: List['DepartmentTreeResponse'] = []
+
+
+# 解決循環引用問題
+DepartmentTreeResponse.update_forward_refs()
+
+
 class DepartmentListResponse(BaseModel):
     """部門列表響應模型"""
     items: List[DepartmentResponse]
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field, validator, UUID4
+from pydantic import BaseModel, Field, validator, root_validator, UUID4
 from typing import List, Optional, Dict, Any, Union
 from datetime import datetime
 import uuid
@@ -118,4 +118,53 @@ class WorkflowApprovalResponse(BaseSchema):
     is_approved: bool
     comment: Optional[str] = None
     created_at: datetime
-    updated_at: datetime
\ No newline at end of file
+    updated_at: datetime
+
+
+# 批量導入錯誤明細
+class TicketImportError(BaseSchema):
+    row: int
+    error: str
+
+
+# 批量導入響應
+class TicketImportResponse(BaseSchema):
+    imported: int
+    failed: int
+    errors: List[TicketImportError] = []
+    errors_truncated: bool = False
+
+
+# 批量更新的篩選條件，與工單列表的篩選參數一致
+class TicketBulkFilter(BaseSchema):
+    status_id: Optional[UUID4] = None
+    priority_id: Optional[UUID4] = None
+    type_id: Optional[UUID4] = None
+    assignee_id: Optional[UUID4] = None
+    creator_id: Optional[UUID4] = None
+    search: Optional[str] = None
+
+
+# 批量更新請求：把同一個補丁應用到 ID 列表或篩選結果（同時提供時取交集）
+class TicketBulkUpdate(BaseSchema):
+    ticket_ids: Optional[List[UUID4]] = Field(None, max_items=10000)
+    filters: Optional[TicketBulkFilter] = None
+    patch: TicketUpdate
+    updated_by: Optional[UUID4] = None
+
+    @root_validator(skip_on_failure=True)
+    def check_selection(cls, values):
+        """必須指定更新範圍和至少一個更新字段，避免誤更新全部工單"""
+        filters = values.get("filters")
+        has_filters = filters is not None and any(value is not None for value in filters.dict().values())
+        if values.get("ticket_ids") is None and not has_filters:
+            raise ValueError('必須提供 ticket_ids 或至少一個篩選條件')
+        if not values["patch"].dict(exclude_unset=True):
+            raise ValueError('patch 至少需要包含一個字段')
+        return values
+
+
+# 批量更新響應
+class TicketBulkUpdateResponse(BaseSchema):
+    updated: int
+    ticket_ids: List[UUID4]
@@ -0,0 +1 @@
+# 腳本模塊初始化文件
@@ -0,0 +1,53 @@
+"""
+批量導入工單
+
+從 NDJSON 或 CSV 文件（或標準輸入）讀取工單創建記錄，按塊驗證並寫入數據庫。
+導入結果以 JSON 輸出到標準輸出；存在失敗行時退出碼為 1。
+
+用法：
+    python -m src.backend.ticket_api.scripts.import_tickets legacy.ndjson
+    python -m src.backend.ticket_api.scripts.import_tickets legacy.csv --chunk-size 5000
+    cat legacy.ndjson | python -m src.backend.ticket_api.scripts.import_tickets - --format ndjson
+"""
+import argparse
+import json
+import sys
+
+from src.database.db import SessionLocal
+from ..services.ticket_import import IMPORT_FORMATS, detect_format
+from ..services.ticket_import_service import TicketImportService
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="導入文件路徑，- 表示標準輸入")
+    parser.add_argument("--format", choices=IMPORT_FORMATS, help="文件格式，默認根據文件擴展名推斷")
+    parser.add_argument("--chunk-size", type=int, default=None, help="每個事務寫入的記錄數")
+    parser.add_argument("--max-errors", type=int, default=None, help="報告中保留的錯誤明細上限")
+    args = parser.parse_args()
+
+    fmt = args.format or detect_format(args.path)
+    if fmt is None:
+        parser.error("無法根據文件名確定格式，請指定 --format")
+
+    if args.path == "-":
+        sys.stdin.reconfigure(encoding="utf-8-sig", newline="")
+        stream = sys.stdin
+    else:
+        stream = open(args.path, encoding="utf-8-sig", newline="")
+
+    db = SessionLocal()
+    try:
+        report = TicketImportService(db, chunk_size=args.chunk_size, max_errors=args.max_errors).import_stream(stream, fmt)
+    finally:
+        db.close()
+        if stream is not sys.stdin:
+            stream.close()
+
+    json.dump(report.to_dict(), sys.stdout, ensure_ascii=False, indent=2)
+    sys.stdout.write("\n")
+    return 1 if report.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,5 @@
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
 from sqlalchemy import func, or_
 from typing import List, Dict, Any, Optional
 import uuid
@@ -7,7 +8,8 @@ import logging
 
 # 導入模型和架構
 from ..models.ticket import Department, User
-from ..schemas.department import DepartmentCreate, DepartmentUpdate
+from ..schemas.department import DepartmentCreate, DepartmentTreeResponse, DepartmentUpdate
+from ...shared.tree_snapshot import TreeSnapshot, build_tree, get_tree_cache
 
 # 配置日誌
 logger = logging.getLogger("department_service")
@@ -16,6 +18,7 @@ logger = logging.getLogger("department_service")
 class DepartmentService:
     def __init__(self, db: Session):
         self.db = db
+        self.tree_cache = get_tree_cache("departments")
 
     def get_departments(self, skip: int = 0, limit: int = 100, filters: Dict[str, Any] = None) -> List[Department]:
         """獲取部門列表，支持分頁和篩選"""
@@ -57,6 +60,7 @@ class DepartmentService:
         department = Department(**department_data.dict())
         self.db.add(department)
         self.db.commit()
+        self.tree_cache.invalidate()
         self.db.refresh(department)
         return department
 
@@ -81,6 +85,7 @@ class DepartmentService:
 
         department.updated_at = datetime.now()
         self.db.commit()
+        self.tree_cache.invalidate()
         self.db.refresh(department)
         return department
 
@@ -93,8 +98,28 @@ class DepartmentService:
         # 刪除部門
         self.db.delete(department)
         self.db.commit()
+        self.tree_cache.invalidate()
         return True
 
     def has_users(self, department_id: uuid.UUID) -> bool:
         """檢查部門是否有關聯用戶"""
-        return self.db.query(User).filter(User.department_id == department_id).count() > 0
\ No newline at end of file
+        return self.db.query(User).filter(User.department_id == department_id).count() > 0
+
+    def get_department_tree(self) -> List[Department]:
+        """獲取部門樹結構，一次查詢讀取全部部門後在內存中組裝"""
+        departments = self.db.query(Department).order_by(Department.name).all()
+        roots, children = build_tree(departments, key=lambda d: d.id, parent=lambda d: d.parent_id)
+
+        # 直接設置已加載的子部門，不觸發延遲加載，也不標記為待寫入
+        for department in departments:
+            set_committed_value(department, "children", children.get(department.id, []))
+
+        return roots
+
+    def get_department_tree_snapshot(self) -> TreeSnapshot:
+        """獲取預先序列化的部門樹，部門寫入後重建"""
+        return self.tree_cache.get(self._serialize_tree)
+
+    def _serialize_tree(self) -> bytes:
+        roots = self.get_department_tree()
+        return ("[" + ",".join(DepartmentTreeResponse.from_orm(root).json() for root in roots) + "]").encode("utf-8")
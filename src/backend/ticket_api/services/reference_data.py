@@ -0,0 +1,211 @@
+import uuid
+from collections import defaultdict, namedtuple
+from typing import Any, Dict, FrozenSet, Iterable, List, Mapping, Optional, Set
+
+# 參考數據的字段快照，與會話無關，可在請求間共享
+TypeInfo = namedtuple("TypeInfo", ["id", "name", "workflow_id"])
+StatusInfo = namedtuple("StatusInfo", ["id", "name"])
+PriorityInfo = namedtuple("PriorityInfo", ["id", "name"])
+StepInfo = namedtuple("StepInfo", ["id", "workflow_id", "name", "order", "is_final", "department_id"])
+
+# 審批通過後的流轉結果：進入 to_step，或在最後一個步驟完成並切換到 status_id
+Transition = namedtuple("Transition", ["from_step", "to_step", "status_id", "completes"])
+
+# 工作流完成時工單使用的狀態名稱
+COMPLETED_STATUS_NAME = "completed"
+
+# 切換到這些狀態時記錄工單關閉時間
+CLOSED_STATUS_NAMES = ("closed", "resolved", "completed")
+
+
+def _by_name(items: Iterable) -> Dict[str, tuple]:
+    """按名稱（不區分大小寫）索引，重名時保留第一個"""
+    index: Dict[str, tuple] = {}
+    for item in items:
+        index.setdefault(item.name.lower(), item)
+    return index
+
+
+class CompiledWorkflow:
+    """一個工作流編譯後的狀態機
+
+    構建時預先計算每個步驟的後繼步驟、是否為最終步驟、負責部門和完成時的目標狀態，
+    審批流轉只做字典查找。同一順序有多個步驟時按 ID 取第一個。
+    """
+
+    def __init__(self, workflow_id: uuid.UUID, steps: Iterable[StepInfo],
+                 completed_status_id: Optional[uuid.UUID] = None, version: Any = None):
+        self.workflow_id = workflow_id
+        # 編譯時工作流的版本（updated_at），用於與主庫比對
+        self.version = version
+        ordered = sorted(steps, key=lambda s: (s.order, str(s.id)))
+        self.steps: Dict[uuid.UUID, StepInfo] = {step.id: step for step in ordered}
+
+        self._by_order: Dict[int, StepInfo] = {}
+        for step in ordered:
+            self._by_order.setdefault(step.order, step)
+
+        self.transitions: Dict[uuid.UUID, Optional[StepInfo]] = {
+            step.id: self._by_order.get(step.order + 1) for step in ordered
+        }
+        self.final_steps: FrozenSet[uuid.UUID] = frozenset(step.id for step in ordered if step.is_final)
+        self.departments: Dict[uuid.UUID, Optional[uuid.UUID]] = {step.id: step.department_id for step in ordered}
+        # 沒有後繼的最終步驟審批通過後工單切換到完成狀態
+        self.target_statuses: Dict[uuid.UUID, Optional[uuid.UUID]] = {
+            step.id: completed_status_id
+            for step in ordered
+            if step.is_final and self.transitions[step.id] is None
+        }
+
+    @property
+    def first_step(self) -> Optional[StepInfo]:
+        return self._by_order.get(1)
+
+    def step(self, step_id: uuid.UUID) -> Optional[StepInfo]:
+        return self.steps.get(step_id)
+
+    def step_at(self, order: int) -> Optional[StepInfo]:
+        return self._by_order.get(order)
+
+    def next_step(self, step_id: uuid.UUID) -> Optional[StepInfo]:
+        """返回順序緊接其後的步驟，沒有則返回 None"""
+        return self.transitions.get(step_id)
+
+    def is_final(self, step_id: uuid.UUID) -> bool:
+        return step_id in self.final_steps
+
+    def department(self, step_id: uuid.UUID) -> Optional[uuid.UUID]:
+        """返回負責步驟的部門 ID"""
+        return self.departments.get(step_id)
+
+    def advance(self, step_id: uuid.UUID) -> Optional[Transition]:
+        """返回步驟審批通過後的流轉，沒有可執行的流轉時返回 None"""
+        step = self.steps.get(step_id)
+        if step is None:
+            return None
+        next_step = self.transitions[step_id]
+        if next_step is not None:
+            return Transition(step, next_step, None, False)
+        status_id = self.target_statuses.get(step_id)
+        if status_id is not None:
+            return Transition(step, None, status_id, True)
+        return None
+
+
+class ReferenceData:
+    """工單類型、狀態、優先級和工作流步驟的快照
+
+    按 ID 和名稱建立索引，並把每個工作流的步驟編譯為 CompiledWorkflow，所有查找都在內存中完成。
+    """
+
+    def __init__(self, types: Iterable[TypeInfo], statuses: Iterable[StatusInfo],
+                 priorities: Iterable[PriorityInfo], steps: Iterable[StepInfo],
+                 workflow_versions: Optional[Mapping[uuid.UUID, Any]] = None):
+        self.types: Dict[uuid.UUID, TypeInfo] = {item.id: item for item in types}
+        self.statuses: Dict[uuid.UUID, StatusInfo] = {item.id: item for item in statuses}
+        self.priorities: Dict[uuid.UUID, PriorityInfo] = {item.id: item for item in priorities}
+        self.steps: Dict[uuid.UUID, StepInfo] = {item.id: item for item in steps}
+
+        self._types_by_name = _by_name(self.types.values())
+        self._statuses_by_name = _by_name(self.statuses.values())
+        self._priorities_by_name = _by_name(self.priorities.values())
+
+        self.workflow_versions: Dict[uuid.UUID, Any] = dict(workflow_versions or {})
+        self.workflows: Dict[uuid.UUID, CompiledWorkflow] = {}
+        self._compile({step.workflow_id for step in self.steps.values()})
+
+    def add(self, kind: str, items: Iterable[tuple]) -> None:
+        """加入快照加載後才寫入數據庫的條目，並重新編譯受影響的工作流
+
+        kind 為 ticket_type、status、priority 或 step；已存在的條目不會被覆蓋。
+        """
+        items = list(items)
+        if kind == "step":
+            for item in items:
+                self.steps.setdefault(item.id, item)
+            self._compile({item.workflow_id for item in items})
+            return
+
+        by_id, by_name = {
+            "ticket_type": (self.types, self._types_by_name),
+            "status": (self.statuses, self._statuses_by_name),
+            "priority": (self.priorities, self._priorities_by_name),
+        }[kind]
+        for item in items:
+            by_id.setdefault(item.id, item)
+            by_name.setdefault(item.name.lower(), item)
+        if kind == "status" and any(item.name.lower() == COMPLETED_STATUS_NAME for item in items):
+            # 完成狀態是最終步驟的目標狀態
+            self._compile(set(self.workflows))
+
+    def replace_workflow(self, workflow_id: uuid.UUID, steps: Iterable[StepInfo], version: Any) -> None:
+        """用主庫的最新步驟替換一個工作流的步驟並重新編譯"""
+        steps = list(steps)
+        for step_id in [step.id for step in self.steps.values() if step.workflow_id == workflow_id]:
+            del self.steps[step_id]
+        self.steps.update((step.id, step) for step in steps)
+        self.workflow_versions[workflow_id] = version
+        if steps:
+            self._compile({workflow_id})
+        else:
+            self.workflows.pop(workflow_id, None)
+
+    def _compile(self, workflow_ids: Set[uuid.UUID]) -> None:
+        """按當前步驟編譯指定的工作流"""
+        steps_by_workflow: Dict[uuid.UUID, List[StepInfo]] = defaultdict(list)
+        for step in self.steps.values():
+            if step.workflow_id in workflow_ids:
+                steps_by_workflow[step.workflow_id].append(step)
+        completed_status_id = self.completed_status_id()
+        for workflow_id, workflow_steps in steps_by_workflow.items():
+            self.workflows[workflow_id] = CompiledWorkflow(
+                workflow_id, workflow_steps, completed_status_id, self.workflow_versions.get(workflow_id)
+            )
+
+    def ticket_type(self, type_id: uuid.UUID) -> Optional[TypeInfo]:
+        return self.types.get(type_id)
+
+    def status(self, status_id: uuid.UUID) -> Optional[StatusInfo]:
+        return self.statuses.get(status_id)
+
+    def priority(self, priority_id: uuid.UUID) -> Optional[PriorityInfo]:
+        return self.priorities.get(priority_id)
+
+    def step(self, step_id: uuid.UUID) -> Optional[StepInfo]:
+        return self.steps.get(step_id)
+
+    def type_by_name(self, name: str) -> Optional[TypeInfo]:
+        return self._types_by_name.get(name.lower())
+
+    def status_by_name(self, name: str) -> Optional[StatusInfo]:
+        return self._statuses_by_name.get(name.lower())
+
+    def priority_by_name(self, name: str) -> Optional[PriorityInfo]:
+        return self._priorities_by_name.get(name.lower())
+
+    def workflow(self, workflow_id: uuid.UUID) -> Optional[CompiledWorkflow]:
+        """返回編譯後的工作流，沒有步驟的工作流返回 None"""
+        return self.workflows.get(workflow_id)
+
+    def step_at(self, workflow_id: uuid.UUID, order: int) -> Optional[StepInfo]:
+        """返回工作流中指定順序的步驟"""
+        workflow = self.workflows.get(workflow_id)
+        return workflow.step_at(order) if workflow else None
+
+    def first_step(self, workflow_id: uuid.UUID) -> Optional[StepInfo]:
+        return self.step_at(workflow_id, 1)
+
+    def next_step(self, step: StepInfo) -> Optional[StepInfo]:
+        """返回順序緊接其後的步驟，沒有則返回 None"""
+        workflow = self.workflows.get(step.workflow_id)
+        return workflow.next_step(step.id) if workflow else None
+
+    def is_closed_status(self, status_id: uuid.UUID) -> bool:
+        """狀態是否表示工單已關閉"""
+        status = self.statuses.get(status_id)
+        return status is not None and status.name.lower() in CLOSED_STATUS_NAMES
+
+    def completed_status_id(self) -> Optional[uuid.UUID]:
+        """返回「已完成」工單狀態的 ID，不存在時返回 None"""
+        status = self.status_by_name(COMPLETED_STATUS_NAME)
+        return status.id if status else None
@@ -0,0 +1,153 @@
+import logging
+import threading
+import time
+import uuid
+from typing import Any, Iterable, List, Optional
+
+from sqlalchemy.orm import Session
+
+from ..models.ticket import TicketPriority, TicketStatus, TicketType, Workflow, WorkflowStep
+from .reference_data import CompiledWorkflow, PriorityInfo, ReferenceData, StatusInfo, StepInfo, TypeInfo
+from ...shared.cache import GenerationCounter, get_redis_client
+from src.config import settings
+
+# 配置日誌
+logger = logging.getLogger("reference_registry")
+
+
+# 每種參考數據的條目類型和查詢列
+REFERENCE_COLUMNS = {
+    "ticket_type": (TypeInfo, (TicketType.id, TicketType.name, TicketType.workflow_id)),
+    "status": (StatusInfo, (TicketStatus.id, TicketStatus.name)),
+    "priority": (PriorityInfo, (TicketPriority.id, TicketPriority.name)),
+    "step": (StepInfo, (
+        WorkflowStep.id,
+        WorkflowStep.workflow_id,
+        WorkflowStep.name,
+        WorkflowStep.order,
+        WorkflowStep.is_final,
+        WorkflowStep.department_id,
+    )),
+}
+
+
+class ReferenceDataRegistry:
+    """工單參考數據的進程內快照
+
+    首次使用時一次性加載四張小表；工作流或步驟寫入後遞增版本號，下次讀取時重新加載。
+    配置 Redis 客戶端時版本號在所有工作進程間共享，工作流流轉完全在內存中完成；未配置時
+    current_workflow 按工作流版本與主庫比對。按 ID 查找未命中時從傳入的會話（主庫）
+    查詢該行並加入快照，其他進程剛創建的條目不會被誤判為不存在。
+
+    類型、狀態和優先級沒有經過服務層的寫入路徑，對已有條目的修改（如 init_db 或直接執行 SQL
+    重命名狀態）只在快照過期後生效，最多延遲 max_age 秒。
+    """
+
+    def __init__(self, max_age: float, redis_client: Optional[Any] = None):
+        self.max_age = max_age
+        self.generation = GenerationCounter("reference:data", redis_client)
+        self._snapshot: Optional[ReferenceData] = None
+        self._snapshot_generation: Optional[int] = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self, db: Session) -> ReferenceData:
+        """返回當前快照，版本號變化或過期時重新加載"""
+        generation = self.generation.current()
+        if self._is_current(generation):
+            return self._snapshot
+
+        with self._lock:
+            if not self._is_current(generation):
+                self._load(db, generation)
+            return self._snapshot
+
+    def lookup(self, db: Session, kind: str, item_ids: Iterable[uuid.UUID]) -> ReferenceData:
+        """確保快照包含指定 ID 的條目：未命中的 ID 一次查詢主庫，查到的加入快照，返回快照
+
+        kind 為 ticket_type、status、priority 或 step；數據庫中也不存在的 ID 仍然查不到。
+        """
+        snapshot = self.get(db)
+        index = getattr(snapshot, {"ticket_type": "types", "status": "statuses",
+                                   "priority": "priorities", "step": "steps"}[kind])
+        missing = {item_id for item_id in item_ids if item_id is not None and item_id not in index}
+        if not missing:
+            return snapshot
+
+        items = self._query(db, kind, REFERENCE_COLUMNS[kind][1][0].in_(missing))
+        if items:
+            with self._lock:
+                snapshot.add(kind, items)
+        return snapshot
+
+    def current_workflow(self, db: Session, workflow_id: uuid.UUID) -> Optional[CompiledWorkflow]:
+        """返回編譯好的工作流，工作流不存在或沒有步驟時返回 None
+
+        版本號通過 Redis 共享時，任何進程的步驟寫入都會使快照失效，直接返回快照中的工作流，
+        不訪問數據庫。版本號只在進程內時，以工作流的 updated_at（WorkflowService 寫入步驟時
+        同步更新）與主庫比對，其他進程修改過的工作流只重新加載並編譯該工作流。
+        """
+        snapshot = self.get(db)
+        if self.generation.redis_client is not None:
+            return snapshot.workflow(workflow_id)
+
+        version = db.query(Workflow.updated_at).filter(Workflow.id == workflow_id).scalar()
+        if version is None:
+            return None
+        if snapshot.workflow_versions.get(workflow_id) != version:
+            steps = self._query(db, "step", WorkflowStep.workflow_id == workflow_id)
+            with self._lock:
+                snapshot.replace_workflow(workflow_id, steps, version)
+        return snapshot.workflow(workflow_id)
+
+    def invalidate(self) -> None:
+        """參考數據寫入後使快照失效"""
+        self.generation.bump()
+        self._snapshot_generation = None
+
+    def _is_current(self, generation: int) -> bool:
+        if self._snapshot is None or self._snapshot_generation != generation:
+            return False
+        return self.max_age <= 0 or time.monotonic() - self._loaded_at <= self.max_age
+
+    @staticmethod
+    def _query(db: Session, kind: str, condition: Any = None) -> List[tuple]:
+        """查詢一種參考數據，可附加篩選條件"""
+        info, columns = REFERENCE_COLUMNS[kind]
+        query = db.query(*columns)
+        if condition is not None:
+            query = query.filter(condition)
+        return [info(*row) for row in query]
+
+    def _load(self, db: Session, generation: int) -> None:
+        started = time.monotonic()
+        # REFERENCE_COLUMNS 的順序與 ReferenceData 的參數順序一致
+        snapshot = ReferenceData(
+            *(self._query(db, kind) for kind in REFERENCE_COLUMNS),
+            workflow_versions=dict(db.query(Workflow.id, Workflow.updated_at).all()),
+        )
+        self._snapshot = snapshot
+        self._snapshot_generation = generation
+        self._loaded_at = time.monotonic()
+        logger.info(
+            f"Reference data loaded at generation {generation}: {len(snapshot.types)} types, "
+            f"{len(snapshot.statuses)} statuses, {len(snapshot.priorities)} priorities, "
+            f"{len(snapshot.steps)} steps in {self._loaded_at - started:.3f}s"
+        )
+
+
+_reference_registry: Optional[ReferenceDataRegistry] = None
+_reference_registry_lock = threading.Lock()
+
+
+def get_reference_registry() -> ReferenceDataRegistry:
+    """按 REFERENCE_DATA_* 配置返回進程內共享的參考數據快照"""
+    global _reference_registry
+    if _reference_registry is None:
+        with _reference_registry_lock:
+            if _reference_registry is None:
+                _reference_registry = ReferenceDataRegistry(
+                    settings.REFERENCE_DATA_MAX_AGE_SECONDS,
+                    get_redis_client() if settings.REFERENCE_DATA_REDIS_ENABLED else None,
+                )
+    return _reference_registry
@@ -0,0 +1,112 @@
+import csv
+import json
+from collections import namedtuple
+from itertools import islice
+from typing import Any, Dict, IO, Iterable, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+
+from ..schemas.ticket import TicketCreate
+
+# 支持的導入格式
+IMPORT_FORMATS = ("ndjson", "csv")
+
+# 導入失敗的行：行號從 1 開始（CSV 不計表頭）
+ImportRowError = namedtuple("ImportRowError", ["row", "error"])
+
+# 解析結果：行號及記錄字典，解析失敗時 record 為 None、error 為原因
+ParsedRecord = namedtuple("ParsedRecord", ["row", "record", "error"])
+
+
+def detect_format(filename: Optional[str], content_type: Optional[str] = None) -> Optional[str]:
+    """根據文件名或內容類型推斷導入格式，無法判斷時返回 None"""
+    name = (filename or "").lower()
+    if name.endswith(".csv") or content_type == "text/csv":
+        return "csv"
+    if name.endswith((".ndjson", ".jsonl")) or content_type in ("application/x-ndjson", "application/jsonl"):
+        return "ndjson"
+    return None
+
+
+def parse_records(stream: IO[str], fmt: str) -> Iterator[ParsedRecord]:
+    """逐行解析 NDJSON 或 CSV 文本流，不把整個文件讀入內存"""
+    if fmt == "ndjson":
+        return _parse_ndjson(stream)
+    if fmt == "csv":
+        return _parse_csv(stream)
+    raise ValueError(f"不支持的導入格式: {fmt}")
+
+
+def _parse_ndjson(stream: IO[str]) -> Iterator[ParsedRecord]:
+    for row, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield ParsedRecord(row, None, f"JSON 格式錯誤: {e}")
+            continue
+        if not isinstance(record, dict):
+            yield ParsedRecord(row, None, "每行必須是一個 JSON 對象")
+            continue
+        yield ParsedRecord(row, record, None)
+
+
+def _parse_csv(stream: IO[str]) -> Iterator[ParsedRecord]:
+    for row, record in enumerate(csv.DictReader(stream), start=1):
+        # 空單元格視為未提供，交給架構使用默認值
+        yield ParsedRecord(row, {key: value for key, value in record.items() if key and value != ""}, None)
+
+
+def format_validation_error(error: ValidationError) -> str:
+    """把架構驗證錯誤壓縮為一行"""
+    return "; ".join(
+        f"{'.'.join(str(part) for part in item['loc'])}: {item['msg']}" for item in error.errors()
+    )
+
+
+def validate_chunks(
+    records: Iterable[ParsedRecord], chunk_size: int
+) -> Iterator[Tuple[List[Tuple[int, TicketCreate]], List[ImportRowError]]]:
+    """按塊驗證記錄，每塊返回 (有效記錄列表, 錯誤列表)，有效記錄附帶行號"""
+    iterator = iter(records)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+
+        valid: List[Tuple[int, TicketCreate]] = []
+        errors: List[ImportRowError] = []
+        for parsed in chunk:
+            if parsed.error:
+                errors.append(ImportRowError(parsed.row, parsed.error))
+                continue
+            try:
+                valid.append((parsed.row, TicketCreate.parse_obj(parsed.record)))
+            except ValidationError as e:
+                errors.append(ImportRowError(parsed.row, format_validation_error(e)))
+        yield valid, errors
+
+
+class ImportReport:
+    """導入結果匯總，錯誤明細最多保留 max_errors 條"""
+
+    def __init__(self, max_errors: int):
+        self.max_errors = max_errors
+        self.imported = 0
+        self.failed = 0
+        self.errors: List[ImportRowError] = []
+
+    def add_errors(self, errors: Iterable[ImportRowError]) -> None:
+        for error in errors:
+            self.failed += 1
+            if len(self.errors) < self.max_errors:
+                self.errors.append(error)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "imported": self.imported,
+            "failed": self.failed,
+            "errors": [error._asdict() for error in sorted(self.errors)],
+            "errors_truncated": self.failed > len(self.errors),
+        }
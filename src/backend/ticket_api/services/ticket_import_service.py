@@ -0,0 +1,192 @@
+import csv
+import io
+import json
+import logging
+import uuid
+from datetime import datetime
+from typing import Any, Dict, IO, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+# 導入模型和架構
+from ..models.ticket import Ticket, TicketHistory, User
+from ..schemas.ticket import TicketCreate
+from .reference_data import ReferenceData
+from .reference_registry import ReferenceDataRegistry, get_reference_registry
+from .ticket_import import ImportReport, ImportRowError, parse_records, validate_chunks
+from database.read_routing import mark_written
+from src.config import settings
+
+# 配置日誌
+logger = logging.getLogger("ticket_import_service")
+
+TICKET_COLUMNS = (
+    "id",
+    "title",
+    "description",
+    "creator_id",
+    "assignee_id",
+    "ticket_type_id",
+    "ticket_status_id",
+    "ticket_priority_id",
+    "current_workflow_step_id",
+    "due_date",
+)
+HISTORY_COLUMNS = ("id", "ticket_id", "user_id", "action", "changes")
+
+
+def _copy_value(value: Any) -> Any:
+    """轉換為 COPY CSV 格式的字段值，None 輸出為未加引號的空字段（NULL）"""
+    if value is None:
+        return None
+    if isinstance(value, dict):
+        return json.dumps(value, ensure_ascii=False)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+class TicketImportService:
+    """批量導入工單
+
+    記錄按塊驗證並寫入，每塊一個事務：PostgreSQL（psycopg2）上使用 COPY，
+    其他數據庫使用 executemany。「created」歷史記錄隨工單批量生成。
+    單行錯誤只記入報告，不中止整批導入；整塊寫入失敗時逐行重試以定位出錯的行。
+    """
+
+    def __init__(self, db: Session, chunk_size: Optional[int] = None, max_errors: Optional[int] = None,
+                 reference_data: Optional[ReferenceDataRegistry] = None):
+        self.db = db
+        self.reference_data = reference_data or get_reference_registry()
+        self.chunk_size = chunk_size or settings.TICKET_IMPORT_CHUNK_SIZE
+        self.max_errors = settings.TICKET_IMPORT_MAX_ERRORS if max_errors is None else max_errors
+
+        dialect = db.get_bind().dialect
+        self.use_copy = dialect.name == "postgresql" and dialect.driver == "psycopg2"
+        self._dbapi_error = dialect.loaded_dbapi.Error
+
+        # 本次導入中已確認存在的用戶，避免每塊重複查詢；類型、狀態和優先級取自參考數據快照
+        self._known_users: Set[uuid.UUID] = set()
+
+    def import_stream(self, stream: IO[str], fmt: str) -> ImportReport:
+        """導入 NDJSON 或 CSV 文本流，返回導入報告"""
+        report = ImportReport(self.max_errors)
+
+        for valid, errors in validate_chunks(parse_records(stream, fmt), self.chunk_size):
+            report.add_errors(errors)
+            rows, reference_errors = self._resolve_references(valid)
+            report.add_errors(reference_errors)
+            if not rows:
+                continue
+
+            try:
+                self._write_chunk([ticket for _, ticket in rows])
+                self.db.commit()
+            except (SQLAlchemyError, self._dbapi_error) as e:
+                # 整塊回滾後逐行重試，只把真正寫入失敗的行記入報告
+                self.db.rollback()
+                logger.warning(f"Failed to import chunk of {len(rows)} tickets, retrying row by row: {e}")
+                self._write_rows(rows, report)
+                continue
+            report.imported += len(rows)
+
+        return report
+
+    def _write_rows(self, rows: Sequence[Tuple[int, Dict[str, Any]]], report: ImportReport) -> None:
+        """逐行寫入，每行一個事務"""
+        for row, ticket in rows:
+            try:
+                self._write_chunk([ticket])
+                self.db.commit()
+            except (SQLAlchemyError, self._dbapi_error) as e:
+                self.db.rollback()
+                report.add_errors([ImportRowError(row, f"寫入失敗: {e}")])
+                continue
+            report.imported += 1
+
+    def _resolve_references(
+        self, valid: Sequence[Tuple[int, TicketCreate]]
+    ) -> Tuple[List[Tuple[int, Dict[str, Any]]], List[ImportRowError]]:
+        """批量檢查外鍵引用並補全工作流步驟，返回可寫入的工單字典和引用錯誤"""
+        self._load_known(
+            self._known_users,
+            User.id,
+            {ticket.creator_id for _, ticket in valid} | {ticket.assignee_id for _, ticket in valid if ticket.assignee_id},
+        )
+        # 快照可能落後於剛寫入的參考數據，未命中的 ID 查詢主庫補充
+        self.reference_data.lookup(self.db, "ticket_type", {ticket.ticket_type_id for _, ticket in valid})
+        self.reference_data.lookup(self.db, "status", {ticket.ticket_status_id for _, ticket in valid})
+        refs = self.reference_data.lookup(self.db, "priority", {ticket.ticket_priority_id for _, ticket in valid})
+
+        rows: List[Tuple[int, Dict[str, Any]]] = []
+        errors: List[ImportRowError] = []
+        for row, ticket in valid:
+            error = self._reference_error(ticket, refs)
+            if error:
+                errors.append(ImportRowError(row, error))
+                continue
+            first_step = refs.first_step(refs.ticket_type(ticket.ticket_type_id).workflow_id)
+            ticket_dict = ticket.dict()
+            ticket_dict["id"] = uuid.uuid4()
+            ticket_dict["current_workflow_step_id"] = first_step.id if first_step else None
+            rows.append((row, ticket_dict))
+        return rows, errors
+
+    def _reference_error(self, ticket: TicketCreate, refs: ReferenceData) -> Optional[str]:
+        if refs.ticket_type(ticket.ticket_type_id) is None:
+            return f"工單類型 {ticket.ticket_type_id} 不存在"
+        if ticket.creator_id not in self._known_users:
+            return f"用戶 {ticket.creator_id} 不存在"
+        if ticket.assignee_id and ticket.assignee_id not in self._known_users:
+            return f"用戶 {ticket.assignee_id} 不存在"
+        if refs.status(ticket.ticket_status_id) is None:
+            return f"工單狀態 {ticket.ticket_status_id} 不存在"
+        if refs.priority(ticket.ticket_priority_id) is None:
+            return f"工單優先級 {ticket.ticket_priority_id} 不存在"
+        return None
+
+    def _load_known(self, known: Set[uuid.UUID], column: Any, ids: Set[uuid.UUID]) -> None:
+        missing = ids - known
+        if missing:
+            known.update(value for (value,) in self.db.query(column).filter(column.in_(missing)))
+
+    def _write_chunk(self, tickets: List[Dict[str, Any]]) -> None:
+        history = [
+            {
+                "id": uuid.uuid4(),
+                "ticket_id": ticket["id"],
+                "user_id": ticket["creator_id"],
+                "action": "created",
+                "changes": {"ticket": "created"},
+            }
+            for ticket in tickets
+        ]
+
+        if self.use_copy:
+            self._copy(Ticket.__table__.name, TICKET_COLUMNS, tickets)
+            self._copy(TicketHistory.__table__.name, HISTORY_COLUMNS, history)
+        else:
+            self.db.execute(insert(Ticket), tickets)
+            self.db.execute(insert(TicketHistory), history)
+
+    def _copy(self, table: str, columns: Sequence[str], rows: List[Dict[str, Any]]) -> None:
+        """通過 COPY ... FROM STDIN 寫入，與會話共用同一連接和事務"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow([_copy_value(row.get(column)) for column in columns])
+        buffer.seek(0)
+
+        preparer = self.db.get_bind().dialect.identifier_preparer
+        statement = "COPY {} ({}) FROM STDIN WITH (FORMAT csv)".format(
+            preparer.quote(table), ", ".join(preparer.quote(column) for column in columns)
+        )
+        cursor = self.db.connection().connection.cursor()
+        try:
+            cursor.copy_expert(statement, buffer)
+        finally:
+            cursor.close()
+        # COPY 繞過了 ORM，手動標記寫入以保證讀己之寫
+        mark_written(self.db)
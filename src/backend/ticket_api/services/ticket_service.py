@@ -1,11 +1,13 @@
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func, or_, and_
+from sqlalchemy.orm import Session, joinedload, aliased
+from sqlalchemy.engine import Result
+from sqlalchemy import func, or_, and_, tuple_, insert, select, update
 from fastapi import UploadFile, HTTPException, status
-from typing import List, Dict, Any, Optional
+from fastapi.encoders import jsonable_encoder
+from typing import List, Dict, Any, Iterator, Optional
 import uuid
 import os
 import shutil
-from datetime import datetime
+from datetime import datetime, timedelta
 import logging
 
 # 導入模型和架構
@@ -29,41 +31,63 @@ from ..schemas.ticket import (
     TicketCommentCreate,
     WorkflowApprovalCreate
 )
+from .reference_data import ReferenceData
+from .reference_registry import ReferenceDataRegistry, get_reference_registry
+from ...shared.pagination import decode_cursor
+from database.trigram import contains_any
+from src.config import settings
 
 # 配置日誌
 logger = logging.getLogger("ticket_service")
 
 
 class TicketService:
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, reference_data: Optional[ReferenceDataRegistry] = None):
         self.db = db
+        self.reference_data = reference_data or get_reference_registry()
         self.upload_dir = os.path.join("static", "uploads", "tickets")
         os.makedirs(self.upload_dir, exist_ok=True)
 
-    def get_tickets(self, skip: int = 0, limit: int = 100, filters: Dict[str, Any] = None) -> List[Ticket]:
-        """獲取工單列表，支持分頁和篩選"""
-        query = self.db.query(Ticket)
+    def _reference(self, kind: str, item_id: Optional[uuid.UUID]) -> Optional[tuple]:
+        """從參考數據快照按 ID 查找類型、狀態、優先級或步驟，未命中時查詢主庫"""
+        if item_id is None:
+            return None
+        return getattr(self.reference_data.lookup(self.db, kind, [item_id]), kind)(item_id)
 
-        # 應用篩選條件
+    def _refs(self) -> ReferenceData:
+        return self.reference_data.get(self.db)
+
+    def _is_closed_status(self, status_id: uuid.UUID) -> bool:
+        """狀態是否表示工單已關閉"""
+        return self._reference("status", status_id) is not None and self._refs().is_closed_status(status_id)
+
+    @staticmethod
+    def _filter_clauses(filters: Optional[Dict[str, Any]]) -> List[Any]:
+        """把列表篩選條件轉換為 WHERE 子句，供列表查詢和批量更新共用"""
+        clauses = []
         if filters:
             if filters.get("status_id"):
-                query = query.filter(Ticket.ticket_status_id == filters["status_id"])
+                clauses.append(Ticket.ticket_status_id == filters["status_id"])
             if filters.get("priority_id"):
-                query = query.filter(Ticket.ticket_priority_id == filters["priority_id"])
+                clauses.append(Ticket.ticket_priority_id == filters["priority_id"])
             if filters.get("type_id"):
-                query = query.filter(Ticket.ticket_type_id == filters["type_id"])
+                clauses.append(Ticket.ticket_type_id == filters["type_id"])
             if filters.get("assignee_id"):
-                query = query.filter(Ticket.assignee_id == filters["assignee_id"])
+                clauses.append(Ticket.assignee_id == filters["assignee_id"])
             if filters.get("creator_id"):
-                query = query.filter(Ticket.creator_id == filters["creator_id"])
+                clauses.append(Ticket.creator_id == filters["creator_id"])
             if filters.get("search"):
-                search_term = f"%{filters['search']}%"
-                query = query.filter(
-                    or_(
-                        Ticket.title.ilike(search_term),
-                        Ticket.description.ilike(search_term)
-                    )
-                )
+                clauses.append(contains_any([Ticket.title, Ticket.description], filters["search"]))
+        return clauses
+
+    def get_tickets(self, skip: int = 0, limit: int = 100, filters: Dict[str, Any] = None,
+                    cursor: Optional[str] = None) -> List[Ticket]:
+        """獲取工單列表，支持分頁和篩選
+
+        傳入 cursor 時使用 (created_at, id) 鍵集分頁並忽略 skip，深頁查詢成本與第一頁相同。
+        """
+        # 應用篩選條件
+        query = self.db.query(Ticket).filter(*self._filter_clauses(filters))
 
         # 加載關聯數據
         query = query.options(
@@ -76,14 +100,62 @@ class TicketService:
         )
 
         # 應用分頁
-        query = query.order_by(Ticket.created_at.desc()).offset(skip).limit(limit)
+        if cursor:
+            cursor_created_at, cursor_id = decode_cursor(cursor)
+            query = query.filter(
+                tuple_(Ticket.created_at, Ticket.id) < tuple_(cursor_created_at, cursor_id)
+            )
+            skip = 0
+        query = query.order_by(Ticket.created_at.desc(), Ticket.id.desc()).offset(skip).limit(limit)
 
         return query.all()
 
+    def export_tickets(self, filters: Dict[str, Any] = None) -> Result:
+        """按列表篩選條件導出工單
+
+        只查詢導出需要的列（關聯名稱通過連接取得），並使用服務端游標按批讀取，
+        內存佔用與導出行數無關。返回的結果需在會話關閉前迭代完畢。
+        """
+        creator = aliased(User)
+        assignee = aliased(User)
+        query = select(
+            Ticket.id,
+            Ticket.title,
+            Ticket.description,
+            TicketType.name.label("type"),
+            TicketStatus.name.label("status"),
+            TicketPriority.name.label("priority"),
+            creator.full_name.label("creator"),
+            assignee.full_name.label("assignee"),
+            WorkflowStep.name.label("workflow_step"),
+            Ticket.due_date,
+            Ticket.created_at,
+            Ticket.updated_at,
+            Ticket.closed_at
+        ).join(
+            TicketType, Ticket.ticket_type_id == TicketType.id
+        ).join(
+            TicketStatus, Ticket.ticket_status_id == TicketStatus.id
+        ).join(
+            TicketPriority, Ticket.ticket_priority_id == TicketPriority.id
+        ).join(
+            creator, Ticket.creator_id == creator.id
+        ).outerjoin(
+            assignee, Ticket.assignee_id == assignee.id
+        ).outerjoin(
+            WorkflowStep, Ticket.current_workflow_step_id == WorkflowStep.id
+        ).where(
+            *self._filter_clauses(filters)
+        ).order_by(
+            Ticket.created_at.desc(), Ticket.id.desc()
+        ).execution_options(stream_results=True, yield_per=settings.TICKET_EXPORT_BATCH_SIZE)
+
+        return self.db.execute(query)
+
     def create_ticket(self, ticket_data: TicketCreate) -> Ticket:
         """創建新工單"""
         # 獲取工單類型對應的工作流
-        ticket_type = self.db.query(TicketType).filter(TicketType.id == ticket_data.ticket_type_id).first()
+        ticket_type = self._reference("ticket_type", ticket_data.ticket_type_id)
         if not ticket_type:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -91,10 +163,8 @@ class TicketService:
             )
 
         # 獲取工作流的第一個步驟
-        first_step = self.db.query(WorkflowStep).filter(
-            WorkflowStep.workflow_id == ticket_type.workflow_id,
-            WorkflowStep.order == 1
-        ).first()
+        workflow = self.reference_data.current_workflow(self.db, ticket_type.workflow_id)
+        first_step = workflow.first_step if workflow else None
 
         # 創建工單
         ticket_dict = ticket_data.dict()
@@ -102,10 +172,9 @@ class TicketService:
         
         ticket = Ticket(**ticket_dict)
         self.db.add(ticket)
-        self.db.commit()
-        self.db.refresh(ticket)
+        self.db.flush()
 
-        # 記錄歷史
+        # 記錄歷史，與工單在同一事務中提交
         history = TicketHistory(
             ticket_id=ticket.id,
             user_id=ticket_data.creator_id,
@@ -114,6 +183,7 @@ class TicketService:
         )
         self.db.add(history)
         self.db.commit()
+        self.db.refresh(ticket)
 
         return ticket
 
@@ -145,26 +215,97 @@ class TicketService:
 
         # 如果狀態變為已關閉，設置關閉時間
         if "ticket_status_id" in update_data:
-            status = self.db.query(TicketStatus).filter(TicketStatus.id == update_data["ticket_status_id"]).first()
-            if status and status.name.lower() in ["closed", "resolved", "completed"]:
+            if self._is_closed_status(update_data["ticket_status_id"]):
                 ticket.closed_at = datetime.now()
 
-        self.db.commit()
-        self.db.refresh(ticket)
-
-        # 記錄歷史
+        # 記錄歷史，與變更在同一事務中提交
         if old_data:
             history = TicketHistory(
                 ticket_id=ticket.id,
                 user_id=update_data.get("user_id", ticket.creator_id),  # 假設更新者ID在請求中提供
                 action="updated",
-                changes={"old": old_data, "new": update_data}
+                changes=jsonable_encoder({"old": old_data, "new": update_data})
             )
             self.db.add(history)
-            self.db.commit()
+
+        self.db.commit()
+        self.db.refresh(ticket)
 
         return ticket
 
+    def bulk_update_tickets(self, ticket_update: TicketUpdate, ticket_ids: Optional[List[uuid.UUID]] = None,
+                            filters: Optional[Dict[str, Any]] = None,
+                            updated_by: Optional[uuid.UUID] = None) -> List[uuid.UUID]:
+        """把同一個補丁批量應用到 ID 列表和/或篩選結果，返回實際更新的工單 ID
+
+        只更新至少一個字段與補丁不同的工單；PostgreSQL 上一條 UPDATE ... FROM ... RETURNING
+        完成更新並取回舊值，所有歷史記錄一次批量插入，整個操作只提交一次。
+        """
+        update_data = ticket_update.dict(exclude_unset=True)
+        clauses = self._filter_clauses(filters)
+        if ticket_ids is not None:
+            clauses.append(Ticket.id.in_(ticket_ids))
+        if not update_data or not clauses:
+            return []
+
+        columns = {key: getattr(Ticket, key) for key in update_data}
+
+        # 待更新工單的舊值：鎖定匹配的行，跳過與補丁完全相同的工單
+        old_values = select(
+            Ticket.id,
+            Ticket.creator_id,
+            *[column.label(f"old_{key}") for key, column in columns.items()]
+        ).where(
+            *clauses,
+            or_(*[column.is_distinct_from(update_data[key]) for key, column in columns.items()])
+        ).with_for_update()
+
+        values = dict(update_data)
+        # 如果狀態變為已關閉，設置關閉時間
+        if update_data.get("ticket_status_id"):
+            if self._is_closed_status(update_data["ticket_status_id"]):
+                values["closed_at"] = datetime.now()
+
+        if self.db.get_bind().dialect.name == "postgresql":
+            old = old_values.subquery("old")
+            rows = self.db.execute(
+                update(Ticket)
+                .where(Ticket.id == old.c.id)
+                .values(**values)
+                .returning(*old.c)
+                .execution_options(synchronize_session=False)
+            ).all()
+        else:
+            # SQLite 等的 RETURNING 不能引用 FROM 中的其他表：先讀取舊值，再按 ID 集合更新
+            rows = self.db.execute(old_values).all()
+            if rows:
+                self.db.execute(
+                    update(Ticket)
+                    .where(Ticket.id.in_([row.id for row in rows]))
+                    .values(**values)
+                    .execution_options(synchronize_session=False)
+                )
+
+        # 每張工單只記錄實際變化的字段
+        history_rows = []
+        for row in rows:
+            old_data = {
+                key: row._mapping[f"old_{key}"]
+                for key in columns
+                if row._mapping[f"old_{key}"] != update_data[key]
+            }
+            history_rows.append({
+                "ticket_id": row.id,
+                "user_id": updated_by or row.creator_id,
+                "action": "updated",
+                "changes": jsonable_encoder({"old": old_data, "new": update_data})
+            })
+        if history_rows:
+            self.db.execute(insert(TicketHistory), history_rows)
+
+        self.db.commit()
+        return [row.id for row in rows]
+
     def delete_ticket(self, ticket_id: uuid.UUID) -> bool:
         """刪除工單"""
         ticket = self.db.query(Ticket).filter(Ticket.id == ticket_id).first()
@@ -193,10 +334,9 @@ class TicketService:
 
         comment = TicketComment(**comment_data.dict())
         self.db.add(comment)
-        self.db.commit()
-        self.db.refresh(comment)
+        self.db.flush()
 
-        # 記錄歷史
+        # 記錄歷史，與評論在同一事務中提交
         history = TicketHistory(
             ticket_id=ticket_id,
             user_id=comment_data.user_id,
@@ -205,6 +345,7 @@ class TicketService:
         )
         self.db.add(history)
         self.db.commit()
+        self.db.refresh(comment)
 
         return comment
 
@@ -248,19 +389,25 @@ class TicketService:
             file_type=file_type,
             file_size=file_size
         )
-        self.db.add(attachment)
-        self.db.commit()
-        self.db.refresh(attachment)
+        try:
+            self.db.add(attachment)
+            self.db.flush()
 
-        # 記錄歷史
-        history = TicketHistory(
-            ticket_id=ticket_id,
-            user_id=user_id,
-            action="attached_file",
-            changes={"attachment_id": str(attachment.id), "filename": file.filename}
-        )
-        self.db.add(history)
-        self.db.commit()
+            # 記錄歷史，與附件記錄在同一事務中提交
+            history = TicketHistory(
+                ticket_id=ticket_id,
+                user_id=user_id,
+                action="attached_file",
+                changes={"attachment_id": str(attachment.id), "filename": file.filename}
+            )
+            self.db.add(history)
+            self.db.commit()
+        except Exception:
+            # 事務失敗時刪除已保存的文件，避免留下孤立文件
+            self.db.rollback()
+            os.remove(file_path)
+            raise
+        self.db.refresh(attachment)
 
         return attachment
 
@@ -273,7 +420,12 @@ class TicketService:
         ).all()
 
     def submit_approval(self, ticket_id: uuid.UUID, approval_data: WorkflowApprovalCreate) -> WorkflowApproval:
-        """提交工作流審批"""
+        """提交工作流審批
+
+        審批記錄、工單流轉和所有歷史記錄在同一事務中寫入，只提交一次；
+        流轉取自參考數據快照中編譯好的工作流狀態機，不查詢步驟表和狀態表；
+        版本號未通過 Redis 共享時，先按 updated_at 與主庫比對工作流版本，不一致時只重新編譯該工作流。
+        """
         # 檢查工單是否存在
         ticket = self.db.query(Ticket).filter(Ticket.id == ticket_id).first()
         if not ticket:
@@ -282,86 +434,76 @@ class TicketService:
                 detail=f"工單 {ticket_id} 不存在"
             )
 
-        # 檢查工作流步驟是否存在
-        step = self.db.query(WorkflowStep).filter(WorkflowStep.id == approval_data.workflow_step_id).first()
+        # 檢查工作流步驟是否存在；編譯的工作流與其他進程的步驟寫入保持一致，已刪除的步驟不會被流轉
+        step = self._reference("step", approval_data.workflow_step_id)
+        workflow = self.reference_data.current_workflow(self.db, step.workflow_id) if step else None
+        step = workflow.step(step.id) if workflow else None
         if not step:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"工作流步驟 {approval_data.workflow_step_id} 不存在"
             )
 
-        # 創建審批記錄
+        # 創建審批記錄，flush 以取得主鍵
         approval = WorkflowApproval(**approval_data.dict())
         self.db.add(approval)
-        self.db.commit()
-        self.db.refresh(approval)
+        self.db.flush()
+
+        history_rows = []
 
         # 如果審批通過，且當前工單的工作流步驟與審批的步驟相同，則更新工單的工作流步驟
         if approval.is_approved and ticket.current_workflow_step_id == approval_data.workflow_step_id:
-            # 獲取下一個工作流步驟
-            next_step = self.db.query(WorkflowStep).filter(
-                WorkflowStep.workflow_id == step.workflow_id,
-                WorkflowStep.order == step.order + 1
-            ).first()
+            transition = workflow.advance(step.id)
 
-            if next_step:
+            if transition and transition.to_step:
+                next_step = transition.to_step
                 ticket.current_workflow_step_id = next_step.id
-                self.db.commit()
-                self.db.refresh(ticket)
-
-                # 記錄歷史
-                history = TicketHistory(
-                    ticket_id=ticket_id,
-                    user_id=approval_data.approver_id,
-                    action="workflow_advanced",
-                    changes={
+                history_rows.append({
+                    "ticket_id": ticket_id,
+                    "user_id": approval_data.approver_id,
+                    "action": "workflow_advanced",
+                    "changes": {
                         "from_step_id": str(step.id),
                         "from_step_name": step.name,
                         "to_step_id": str(next_step.id),
                         "to_step_name": next_step.name
                     }
-                )
-                self.db.add(history)
-                self.db.commit()
-            elif step.is_final:
+                })
+            elif transition and transition.completes:
                 # 如果是最後一個步驟，將工單標記為已完成
-                closed_status = self.db.query(TicketStatus).filter(
-                    TicketStatus.name.ilike("completed")
-                ).first()
-                
-                if closed_status:
-                    ticket.ticket_status_id = closed_status.id
-                    ticket.closed_at = datetime.now()
-                    self.db.commit()
-                    self.db.refresh(ticket)
-
-                    # 記錄歷史
-                    history = TicketHistory(
-                        ticket_id=ticket_id,
-                        user_id=approval_data.approver_id,
-                        action="workflow_completed",
-                        changes={
-                            "final_step_id": str(step.id),
-                            "final_step_name": step.name
-                        }
-                    )
-                    self.db.add(history)
-                    self.db.commit()
+                ticket.ticket_status_id = transition.status_id
+                ticket.closed_at = datetime.now()
+                history_rows.append({
+                    "ticket_id": ticket_id,
+                    "user_id": approval_data.approver_id,
+                    "action": "workflow_completed",
+                    "changes": {
+                        "final_step_id": str(step.id),
+                        "final_step_name": step.name
+                    }
+                })
 
         # 記錄審批歷史
-        history = TicketHistory(
-            ticket_id=ticket_id,
-            user_id=approval_data.approver_id,
-            action="approval_submitted",
-            changes={
+        history_rows.append({
+            "ticket_id": ticket_id,
+            "user_id": approval_data.approver_id,
+            "action": "approval_submitted",
+            "changes": {
                 "approval_id": str(approval.id),
                 "step_id": str(step.id),
                 "step_name": step.name,
                 "is_approved": approval.is_approved
             }
-        )
-        self.db.add(history)
+        })
+
+        # 所有歷史記錄一次批量插入，與審批和工單變更一起提交；
+        # 同一批次的 now() 相同，顯式設置遞增的 created_at，保證按 (created_at, id) 排序時順序穩定
+        created_at = datetime.now()
+        for offset, history_row in enumerate(history_rows):
+            history_row["created_at"] = created_at + timedelta(microseconds=offset)
+        self.db.execute(insert(TicketHistory), history_rows)
         self.db.commit()
+        self.db.refresh(approval)
 
         return approval
 
@@ -374,25 +516,37 @@ class TicketService:
             WorkflowApproval.created_at.desc()
         ).all()
 
-    def get_history(self, ticket_id: uuid.UUID) -> List[Dict[str, Any]]:
-        """獲取工單歷史記錄"""
-        history_records = self.db.query(TicketHistory).options(
-            joinedload(TicketHistory.user)
-        ).filter(TicketHistory.ticket_id == ticket_id).order_by(
-            TicketHistory.created_at.desc()
-        ).all()
-
-        # 轉換為更易讀的格式
-        result = []
-        for record in history_records:
-            item = {
-                "id": record.id,
-                "user_id": record.user_id,
-                "user_name": record.user.full_name if record.user else None,
-                "action": record.action,
-                "changes": record.changes,
-                "created_at": record.created_at
-            }
-            result.append(item)
-
-        return result
\ No newline at end of file
+    def _history_query(self, ticket_id: uuid.UUID, cursor: Optional[str] = None):
+        """構建歷史記錄的列查詢，按 (created_at, id) 倒序，傳入 cursor 時從游標之後開始"""
+        query = select(
+            TicketHistory.id,
+            TicketHistory.user_id,
+            User.full_name.label("user_name"),
+            TicketHistory.action,
+            TicketHistory.changes,
+            TicketHistory.created_at
+        ).outerjoin(
+            User, TicketHistory.user_id == User.id
+        ).where(TicketHistory.ticket_id == ticket_id)
+
+        if cursor:
+            cursor_created_at, cursor_id = decode_cursor(cursor)
+            query = query.where(
+                tuple_(TicketHistory.created_at, TicketHistory.id) < tuple_(cursor_created_at, cursor_id)
+            )
+        return query.order_by(TicketHistory.created_at.desc(), TicketHistory.id.desc())
+
+    def get_history(self, ticket_id: uuid.UUID, limit: Optional[int] = None,
+                    cursor: Optional[str] = None) -> List[Dict[str, Any]]:
+        """獲取工單歷史記錄，傳入 limit 時按 (created_at, id) 鍵集分頁"""
+        query = self._history_query(ticket_id, cursor)
+        if limit:
+            query = query.limit(limit)
+        return [dict(row._mapping) for row in self.db.execute(query)]
+
+    def stream_history(self, ticket_id: uuid.UUID) -> Iterator[Dict[str, Any]]:
+        """以服務端游標逐批讀取工單的全部歷史記錄，需在會話關閉前迭代完畢"""
+        query = self._history_query(ticket_id).execution_options(
+            stream_results=True, yield_per=settings.HISTORY_STREAM_BATCH_SIZE
+        )
+        return (dict(row._mapping) for row in self.db.execute(query))
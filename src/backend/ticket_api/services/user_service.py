@@ -1,5 +1,5 @@
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func, or_
+from sqlalchemy import func
 from fastapi import HTTPException, status
 from typing import List, Dict, Any, Optional
 import uuid
@@ -10,6 +10,7 @@ from passlib.context import CryptContext
 # 導入模型和架構
 from ..models.ticket import User, Department
 from ..schemas.user import UserCreate, UserUpdate
+from database.trigram import contains_any
 
 # 配置日誌
 logger = logging.getLogger("user_service")
@@ -31,14 +32,7 @@ class UserService:
             if filters.get("department_id"):
                 query = query.filter(User.department_id == filters["department_id"])
             if filters.get("search"):
-                search_term = f"%{filters['search']}%"
-                query = query.filter(
-                    or_(
-                        User.username.ilike(search_term),
-                        User.email.ilike(search_term),
-                        User.full_name.ilike(search_term)
-                    )
-                )
+                query = query.filter(contains_any([User.username, User.email, User.full_name], filters["search"]))
 
         # 加載關聯數據
         query = query.options(joinedload(User.department))
@@ -57,14 +51,7 @@ class UserService:
             if filters.get("department_id"):
                 query = query.filter(User.department_id == filters["department_id"])
             if filters.get("search"):
-                search_term = f"%{filters['search']}%"
-                query = query.filter(
-                    or_(
-                        User.username.ilike(search_term),
-                        User.email.ilike(search_term),
-                        User.full_name.ilike(search_term)
-                    )
-                )
+                query = query.filter(contains_any([User.username, User.email, User.full_name], filters["search"]))
 
         return query.scalar()
 
@@ -8,14 +8,16 @@ import logging
 # 導入模型和架構
 from ..models.ticket import Workflow, WorkflowStep, Ticket
 from ..schemas.workflow import WorkflowCreate, WorkflowUpdate, WorkflowStepCreate, WorkflowStepUpdate
+from .reference_registry import ReferenceDataRegistry, get_reference_registry
 
 # 配置日誌
 logger = logging.getLogger("workflow_service")
 
 
 class WorkflowService:
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, reference_data: Optional[ReferenceDataRegistry] = None):
         self.db = db
+        self.reference_data = reference_data or get_reference_registry()
 
     def get_workflows(self, skip: int = 0, limit: int = 100, filters: Dict[str, Any] = None) -> List[Workflow]:
         """獲取工作流列表，支持分頁和篩選"""
@@ -86,6 +88,7 @@ class WorkflowService:
 
         workflow.updated_at = datetime.now()
         self.db.commit()
+        self.reference_data.invalidate()
         self.db.refresh(workflow)
         return workflow
 
@@ -101,6 +104,7 @@ class WorkflowService:
         # 刪除工作流
         self.db.delete(workflow)
         self.db.commit()
+        self.reference_data.invalidate()
         return True
 
     def has_tickets(self, workflow_id: uuid.UUID) -> bool:
@@ -111,7 +115,9 @@ class WorkflowService:
         """為工作流添加步驟"""
         step = WorkflowStep(**step_data.dict(), workflow_id=workflow_id)
         self.db.add(step)
+        self._touch_workflow(workflow_id)
         self.db.commit()
+        self.reference_data.invalidate()
         self.db.refresh(step)
         return step
 
@@ -137,7 +143,9 @@ class WorkflowService:
             setattr(step, key, value)
 
         step.updated_at = datetime.now()
+        self._touch_workflow(step.workflow_id)
         self.db.commit()
+        self.reference_data.invalidate()
         self.db.refresh(step)
         return step
 
@@ -149,9 +157,17 @@ class WorkflowService:
 
         # 刪除步驟
         self.db.delete(step)
+        self._touch_workflow(step.workflow_id)
         self.db.commit()
+        self.reference_data.invalidate()
         return True
 
+    def _touch_workflow(self, workflow_id: uuid.UUID) -> None:
+        """更新工作流的 updated_at，作為編譯狀態機的版本號，讓其他進程發現步驟變更"""
+        self.db.query(Workflow).filter(Workflow.id == workflow_id).update(
+            {Workflow.updated_at: datetime.now()}, synchronize_session=False
+        )
+
     def step_order_exists(self, workflow_id: uuid.UUID, order: int, exclude_step_id: uuid.UUID = None) -> bool:
         """檢查工作流步驟順序是否已存在"""
         query = self.db.query(WorkflowStep).filter(
@@ -0,0 +1,60 @@
+from typing import AsyncGenerator, Optional
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+
+from src.config import settings
+
+_async_engine: Optional[AsyncEngine] = None
+_async_session_factory: Optional[async_sessionmaker] = None
+
+
+def to_async_url(url: str) -> str:
+    """將同步 PostgreSQL 連接串轉換為 asyncpg 驅動的連接串"""
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "postgresql":
+        parsed = parsed.set(drivername="postgresql+asyncpg")
+    return parsed.render_as_string(hide_password=False)
+
+
+def get_async_engine() -> AsyncEngine:
+    """返回共享的異步引擎，首次調用時創建"""
+    global _async_engine
+    if _async_engine is None:
+        _async_engine = create_async_engine(
+            to_async_url(settings.DATABASE_URL),
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+            pool_pre_ping=settings.DB_POOL_PRE_PING,  # 確保連接池中的連接是有效的
+            echo=settings.DEBUG,  # 在開發環境中輸出SQL語句
+        )
+    return _async_engine
+
+
+def get_async_session_factory() -> async_sessionmaker:
+    """返回綁定到異步引擎的會話工廠"""
+    global _async_session_factory
+    if _async_session_factory is None:
+        _async_session_factory = async_sessionmaker(
+            get_async_engine(), class_=AsyncSession, autoflush=False, expire_on_commit=False
+        )
+    return _async_session_factory
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    獲取異步數據庫會話的依賴函數，用於 async def 路由
+    """
+    async with get_async_session_factory()() as session:
+        yield session
+
+
+async def dispose_async_engine() -> None:
+    """關閉異步引擎的連接池（應用關閉時調用）"""
+    global _async_engine, _async_session_factory
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
+        _async_session_factory = None
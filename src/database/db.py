@@ -1,31 +1,159 @@
-from typing import Generator
+import threading
+import time
+from typing import Any, Dict, Generator, Optional
 
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import QueuePool
+from fastapi import Request
 
 from src.config import settings
+from src.database.read_routing import ReadWriteRouter, RecentWriteTracker, client_key
+
+
+class PoolWaitStats:
+    """連接池取連接的等待統計"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.checkouts = 0
+            self.timeouts = 0
+            self.total_wait = 0.0
+            self.max_wait = 0.0
+
+    def record(self, seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait += seconds
+            self.max_wait = max(self.max_wait, seconds)
+            if timed_out:
+                self.timeouts += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_avg_ms": round(self.total_wait / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                "wait_max_ms": round(self.max_wait * 1000, 3),
+            }
+
+
+class InstrumentedQueuePool(QueuePool):
+    """記錄每次取連接等待時間的 QueuePool（包括新建連接的耗時）"""
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.wait_stats = PoolWaitStats()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.wait_stats.record(time.perf_counter() - started, timed_out=True)
+            raise
+        self.wait_stats.record(time.perf_counter() - started)
+        return connection
+
+
+def create_db_engine(url: Optional[str] = None, **overrides: Any) -> Engine:
+    """
+    按 Settings 中的連接池配置創建數據庫引擎，所有模塊共用此工廠
+    """
+    url = url or settings.DATABASE_URL
+    options: Dict[str, Any] = {
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,  # 確保連接池中的連接是有效的
+        "echo": settings.DEBUG,  # 在開發環境中輸出SQL語句
+    }
+
+    if make_url(url).get_backend_name() != "sqlite":
+        options.update(
+            poolclass=InstrumentedQueuePool,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+        )
+    if make_url(url).get_backend_name() == "postgresql" and settings.DB_STATEMENT_TIMEOUT_MS > 0:
+        # 在服務端限制單條語句的執行時間
+        options["connect_args"] = {"options": f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"}
+
+    options.update(overrides)
+    return create_engine(url, **options)
+
+
+def get_pool_status(bind: Optional[Engine] = None) -> Dict[str, Any]:
+    """
+    返回連接池狀態：容量、已借出、溢出連接數和取連接等待統計；未指定引擎時包含副本連接池
+    """
+    pool = (bind or engine).pool
+    status: Dict[str, Any] = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update(
+            size=pool.size(),
+            max_overflow=pool._max_overflow,
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=max(pool.overflow(), 0),
+        )
+    if isinstance(pool, InstrumentedQueuePool):
+        status.update(pool.wait_stats.snapshot())
+    if bind is None and read_engine is not engine:
+        status["replica"] = get_pool_status(read_engine)
+    return status
+
 
 # 創建SQLAlchemy引擎
-engine = create_engine(
-    settings.DATABASE_URL,
-    pool_pre_ping=True,  # 確保連接池中的連接是有效的
-    echo=settings.DEBUG,  # 在開發環境中輸出SQL語句
-)
+engine = create_db_engine()
+
+# 只讀副本引擎，未配置副本時與主庫共用同一引擎
+read_engine = create_db_engine(settings.DATABASE_REPLICA_URL) if settings.DATABASE_REPLICA_URL else engine
 
 # 創建會話工廠
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = (
+    sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+    if read_engine is not engine else SessionLocal
+)
+
+# 讀寫路由：客戶端寫入後的窗口期內，其讀請求固定走主庫
+session_router = ReadWriteRouter(
+    SessionLocal,
+    ReadSessionLocal,
+    RecentWriteTracker(settings.READ_YOUR_WRITES_WINDOW_SECONDS),
+)
 
 # 創建Base類，所有模型類都將繼承此類
 Base = declarative_base()
 
 
-def get_db() -> Generator[Session, None, None]:
+def get_db(request: Request = None) -> Generator[Session, None, None]:
     """
     獲取數據庫會話的依賴函數，用於FastAPI依賴注入
     """
-    db = SessionLocal()
+    db = session_router.write_session(client_key(request))
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def get_read_db(request: Request = None) -> Generator[Session, None, None]:
+    """
+    獲取只讀數據庫會話的依賴函數，用於列表和搜索等只讀端點
+
+    配置了 DATABASE_REPLICA_URL 時讀取副本；當前客戶端剛寫入過則仍使用主庫。
+    """
+    db = session_router.read_session(client_key(request))
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
@@ -1,5 +1,6 @@
 import os
 import sys
+import uuid
 from pathlib import Path
 
 # 添加項目根目錄到Python路徑
@@ -23,6 +24,7 @@ from src.backend.ticket_api.models.ticket import Ticket, TicketComment, TicketAt
 from src.backend.knowledge_api.models.category import Category
 from src.backend.knowledge_api.models.document import Document, DocumentVersion, DocumentAttachment
 from src.backend.knowledge_api.models.question import Question, Answer, Vote
+from src.backend.knowledge_api.services.category_tree import category_path
 
 # 創建日誌記錄器
 logger = get_logger(__name__)
@@ -111,9 +113,12 @@ def create_initial_data():
             # 檢查是否已有根分類
             root_category = session.query(Category).filter_by(name="根分類", parent_id=None).first()
             if not root_category:
+                root_category_id = uuid.uuid4()
                 root_category = Category(
+                    id=root_category_id,
                     name="根分類",
                     description="知識庫根分類",
+                    path=category_path(None, root_category_id),
                 )
                 session.add(root_category)
                 logger.info("創建根分類")
@@ -0,0 +1,117 @@
+import hashlib
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, sessionmaker
+
+
+class ReadOnlySessionError(RuntimeError):
+    """在只讀（副本）會話中嘗試寫入"""
+    pass
+
+
+class RecentWriteTracker:
+    """記錄客戶端最近一次寫入的時間，用於讀己之寫保證
+
+    只保存在進程內；多進程部署時依賴負載均衡的會話保持，或者把窗口設得足以覆蓋副本延遲。
+    """
+
+    def __init__(self, window: float, clock: Callable[[], float] = time.monotonic, max_entries: int = 100_000):
+        self.window = window
+        self.max_entries = max_entries
+        self._clock = clock
+        self._writes: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def mark(self, key: str) -> None:
+        """記錄一次寫入"""
+        now = self._clock()
+        with self._lock:
+            self._writes[key] = now
+            if len(self._writes) > self.max_entries:
+                # 清理已過窗口的記錄
+                cutoff = now - self.window
+                self._writes = {k: t for k, t in self._writes.items() if t > cutoff}
+
+    def is_recent(self, key: str) -> bool:
+        """客戶端是否在窗口內寫入過"""
+        with self._lock:
+            written_at = self._writes.get(key)
+        return written_at is not None and self._clock() - written_at < self.window
+
+
+def client_key(request: Any) -> Optional[str]:
+    """根據請求識別客戶端：優先使用 Authorization 頭，其次使用客戶端地址"""
+    if request is None:
+        return None
+    authorization = request.headers.get("authorization")
+    if authorization:
+        return "auth:" + hashlib.sha256(authorization.encode("utf-8")).hexdigest()[:32]
+    if request.client:
+        return f"host:{request.client.host}"
+    return None
+
+
+def mark_written(session: Session) -> None:
+    """標記會話已有寫入；繞過 ORM 的寫入（如 COPY）需要手動調用，提交後才會開啟讀己之寫窗口"""
+    session.info["has_writes"] = True
+
+
+class ReadWriteRouter:
+    """在主庫和只讀副本之間分配會話
+
+    寫會話提交了實際寫入後記錄客戶端，該客戶端在窗口期內的讀請求固定走主庫，
+    避免讀到副本尚未同步的舊數據。未配置副本時兩者為同一個會話工廠。
+    """
+
+    def __init__(self, primary: sessionmaker, replica: sessionmaker, tracker: RecentWriteTracker):
+        self.primary = primary
+        self.replica = replica
+        self.tracker = tracker
+
+        event.listen(primary, "after_flush", self._record_flush)
+        event.listen(primary, "do_orm_execute", self._record_bulk_write)
+        event.listen(primary, "after_commit", self._mark_write)
+        event.listen(primary, "after_rollback", self._clear_pending)
+        if replica is not primary:
+            event.listen(replica, "before_flush", self._reject_write)
+
+    @property
+    def has_replica(self) -> bool:
+        return self.replica is not self.primary
+
+    def write_session(self, key: Optional[str] = None) -> Session:
+        """創建主庫會話，提交寫入後為 key 開啟讀己之寫窗口"""
+        session = self.primary()
+        session.info["client_key"] = key
+        return session
+
+    def read_session(self, key: Optional[str] = None) -> Session:
+        """創建讀會話：有副本且客戶端不在寫入窗口內時使用副本"""
+        if not self.has_replica or (key is not None and self.tracker.is_recent(key)):
+            return self.write_session(key)
+        return self.replica()
+
+    @staticmethod
+    def _record_flush(session: Session, flush_context: Any) -> None:
+        mark_written(session)
+
+    @staticmethod
+    def _record_bulk_write(orm_execute_state: Any) -> None:
+        if orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert:
+            mark_written(orm_execute_state.session)
+
+    def _mark_write(self, session: Session) -> None:
+        if session.info.pop("has_writes", False) and session.info.get("client_key"):
+            self.tracker.mark(session.info["client_key"])
+
+    @staticmethod
+    def _clear_pending(session: Session) -> None:
+        session.info.pop("has_writes", None)
+
+    @staticmethod
+    def _reject_write(session: Session, flush_context: Any, instances: Any) -> None:
+        if session.new or session.dirty or session.deleted:
+            raise ReadOnlySessionError("只讀副本會話不能寫入數據")
@@ -1,48 +1,21 @@
-from sqlalchemy import create_engine
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-import os
-from dotenv import load_dotenv
-
-# 加載環境變量
-load_dotenv()
-
-# 獲取數據庫連接信息
-DB_HOST = os.getenv("DB_HOST", "localhost")
-DB_PORT = os.getenv("DB_PORT", "5432")
-DB_NAME = os.getenv("DB_NAME", "ticketknowledge")
-DB_USER = os.getenv("DB_USER", "postgres")
-DB_PASSWORD = os.getenv("DB_PASSWORD", "postgres")
-
-# 構建數據庫URL
-DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
-
-# 創建數據庫引擎
-engine = create_engine(
-    DATABASE_URL,
-    pool_size=10,
-    max_overflow=20,
-    pool_timeout=30,
-    pool_recycle=1800,
-    echo=False,  # 設置為True可以查看SQL語句，用於調試
-)
-
-# 創建會話工廠
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
-# 創建基礎模型類
-Base = declarative_base()
-
-
-def get_db():
-    """獲取數據庫會話的依賴函數"""
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# 引擎、會話工廠和 Base 統一由 src.database.db 創建，此模塊僅為兼容舊的導入路徑。
+# 使用絕對導入，保證無論以 database.session 還是 src.database.session 導入，
+# 進程內都只有一個引擎和連接池。
+from src.database.db import Base, ReadSessionLocal, SessionLocal, engine, get_db, get_pool_status, get_read_db, read_engine
+
+__all__ = [
+    "Base",
+    "ReadSessionLocal",
+    "SessionLocal",
+    "engine",
+    "get_db",
+    "get_pool_status",
+    "get_read_db",
+    "init_db",
+    "read_engine",
+]
 
 
 def init_db():
     """初始化數據庫，創建所有表"""
-    Base.metadata.create_all(bind=engine)
\ No newline at end of file
+    Base.metadata.create_all(bind=engine)
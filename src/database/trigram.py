@@ -0,0 +1,50 @@
+from typing import Any
+
+from sqlalchemy import DDL, Index, MetaData, event, or_
+
+from src.config import settings
+
+# LIKE 模式中需要轉義的字符
+_LIKE_ESCAPE = "\\"
+_LIKE_SPECIAL = str.maketrans({"\\": "\\\\", "%": "\\%", "_": "\\_"})
+
+
+def _trigram_enabled(ddl: Any, target: Any, bind: Any, **kw: Any) -> bool:
+    return settings.TRIGRAM_INDEXES_ENABLED
+
+
+# pg_trgm 擴展需要在建表之前創建
+_create_pg_trgm = DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(
+    dialect="postgresql", callable_=_trigram_enabled
+)
+
+
+def enable_pg_trgm(metadata: MetaData) -> None:
+    """在 metadata.create_all 時先創建 pg_trgm 擴展（僅 PostgreSQL）"""
+    if not event.contains(metadata, "before_create", _create_pg_trgm):
+        event.listen(metadata, "before_create", _create_pg_trgm)
+
+
+def trigram_index(name: str, column: str) -> Index:
+    """聲明 pg_trgm GIN 索引，支持 ILIKE '%term%' 走索引
+
+    只在 PostgreSQL 且開啟 TRIGRAM_INDEXES_ENABLED 時創建，SQLite 等其他數據庫會跳過。
+    """
+    index = Index(name, column, postgresql_using="gin", postgresql_ops={column: "gin_trgm_ops"})
+    index.ddl_if(dialect="postgresql", callable_=_trigram_enabled)
+    return index
+
+
+def escape_like(term: str) -> str:
+    """轉義 LIKE 模式中的通配符"""
+    return term.translate(_LIKE_SPECIAL)
+
+
+def contains_any(columns: Any, term: str):
+    """任一列包含 term（不區分大小寫）的篩選條件
+
+    生成 col ILIKE '%term%'，在 PostgreSQL 上由 pg_trgm GIN 索引支持，
+    在 SQLite 上退化為 lower(col) LIKE lower('%term%')。term 中的 % 和 _ 按字面匹配。
+    """
+    pattern = f"%{escape_like(term)}%"
+    return or_(*(column.ilike(pattern, escape=_LIKE_ESCAPE) for column in columns))
@@ -0,0 +1,191 @@
+from collections import defaultdict
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+import uuid
+
+from ..entities.document import Document
+from ..entities.document_approval_workflow import DocumentApprovalWorkflow
+from ..events.base_event import DomainEvent
+
+
+def _value_keys(criteria: Optional[Dict[str, Any]]) -> Optional[FrozenSet[str]]:
+    """把分類或創建者條件轉換為允許的值集合，None 表示不限制（與 _matches_criteria 一致）"""
+    if not criteria:
+        return None
+    if 'equals' in criteria:
+        return frozenset([str(criteria['equals'])])
+    if 'in' in criteria:
+        return frozenset(str(value) for value in criteria['in'])
+    return None
+
+
+def _parse_tags(values: Iterable[Any]) -> Tuple[FrozenSet[uuid.UUID], bool]:
+    """解析標籤 ID，返回 (有效的標籤集合, 是否含無法解析的值)"""
+    tags = set()
+    invalid = False
+    for value in values:
+        try:
+            tags.add(value if isinstance(value, uuid.UUID) else uuid.UUID(str(value)))
+        except ValueError:
+            invalid = True
+    return frozenset(tags), invalid
+
+
+def _tag_keys(criteria: Optional[Dict[str, Any]]) -> Tuple[Optional[str], FrozenSet[uuid.UUID], int]:
+    """把標籤條件轉換為 (匹配方式, 標籤集合, contains_all 需命中的數量)
+
+    匹配方式為 None 表示不限制（與 _matches_tag_criteria 一致）；無法解析的標籤不可能命中，
+    contains_all 中出現時需命中的數量多於集合大小，工作流永不匹配。
+    """
+    if not criteria:
+        return None, frozenset(), 0
+    if 'contains_any' in criteria:
+        tags, _ = _parse_tags(criteria['contains_any'])
+        return 'contains_any', tags, 0
+    if 'contains_all' in criteria:
+        tags, invalid = _parse_tags(criteria['contains_all'])
+        if not tags and not invalid:
+            return None, frozenset(), 0
+        return 'contains_all', tags, len(tags) + int(invalid)
+    return None, frozenset(), 0
+
+
+class _ValueIndex:
+    """單個條件維度的索引：值 -> 工作流 ID 集合，加上不限制該維度的工作流"""
+
+    def __init__(self):
+        self.by_value: Dict[str, Set[uuid.UUID]] = defaultdict(set)
+        self.unrestricted: Set[uuid.UUID] = set()
+
+    def add(self, workflow_id: uuid.UUID, keys: Optional[FrozenSet[str]]) -> None:
+        if keys is None:
+            self.unrestricted.add(workflow_id)
+            return
+        for key in keys:
+            self.by_value[key].add(workflow_id)
+
+    def remove(self, workflow_id: uuid.UUID, keys: Optional[FrozenSet[str]]) -> None:
+        if keys is None:
+            self.unrestricted.discard(workflow_id)
+            return
+        for key in keys:
+            bucket = self.by_value.get(key)
+            if bucket is not None:
+                bucket.discard(workflow_id)
+                if not bucket:
+                    del self.by_value[key]
+
+    def matches(self, value: Any) -> Set[uuid.UUID]:
+        return self.unrestricted | self.by_value.get(str(value), set())
+
+
+class ApprovalWorkflowRouter:
+    """按分類、標籤和創建者預先索引活躍的審批工作流，為文檔選擇適用的工作流
+
+    與逐個調用 DocumentApprovalWorkflow.get_applicable_documents 結果一致：
+    條件在加入索引時解析一次，查找只做哈希集合運算，標籤部分的開銷與文檔標籤數成正比。
+    工作流的條件、啟用狀態或步驟變化後調用 reindex（或把 handle 註冊為事件處理器）增量更新。
+    """
+
+    def __init__(self, workflows: Iterable[DocumentApprovalWorkflow] = ()):
+        self._workflows: Dict[uuid.UUID, DocumentApprovalWorkflow] = {}
+        # 已索引工作流的解析結果，用於增量移除
+        self._indexed: Dict[uuid.UUID, Tuple[Optional[FrozenSet[str]], Optional[str], FrozenSet[uuid.UUID],
+                                             Optional[FrozenSet[str]]]] = {}
+        self._sequence: Dict[uuid.UUID, int] = {}
+        self._categories = _ValueIndex()
+        self._creators = _ValueIndex()
+        self._tags_any: Dict[uuid.UUID, Set[uuid.UUID]] = defaultdict(set)
+        self._tags_all: Dict[uuid.UUID, Set[uuid.UUID]] = defaultdict(set)
+        self._tags_all_required: Dict[uuid.UUID, int] = {}
+        self._tags_unrestricted: Set[uuid.UUID] = set()
+        for workflow in workflows:
+            self.add(workflow)
+
+    def __len__(self) -> int:
+        return len(self._indexed)
+
+    def add(self, workflow: DocumentApprovalWorkflow) -> None:
+        """加入或替換工作流；非活躍或沒有步驟的工作流只記錄，不進入索引"""
+        if workflow.id not in self._sequence:
+            self._sequence[workflow.id] = len(self._sequence)
+        self._workflows[workflow.id] = workflow
+        self.reindex(workflow.id)
+
+    def remove(self, workflow_id: uuid.UUID) -> None:
+        """移除工作流"""
+        self._unindex(workflow_id)
+        self._workflows.pop(workflow_id, None)
+        self._sequence.pop(workflow_id, None)
+
+    def reindex(self, workflow_id: uuid.UUID) -> None:
+        """按工作流的當前狀態重建它的索引條目"""
+        self._unindex(workflow_id)
+        workflow = self._workflows.get(workflow_id)
+        if workflow is None or not workflow.is_active or not workflow.steps:
+            return
+
+        categories = _value_keys(workflow.category_criteria)
+        mode, tag_ids, required = _tag_keys(workflow.tag_criteria)
+        creators = _value_keys(workflow.creator_criteria)
+        self._categories.add(workflow_id, categories)
+        self._creators.add(workflow_id, creators)
+        if mode is None:
+            self._tags_unrestricted.add(workflow_id)
+        elif mode == 'contains_any':
+            for tag_id in tag_ids:
+                self._tags_any[tag_id].add(workflow_id)
+        else:
+            for tag_id in tag_ids:
+                self._tags_all[tag_id].add(workflow_id)
+            self._tags_all_required[workflow_id] = required
+        self._indexed[workflow_id] = (categories, mode, tag_ids, creators)
+
+    def handle(self, event: DomainEvent) -> None:
+        """工作流事件處理器：ApprovalWorkflowUpdated / Activated / Deactivated 觸發增量重建"""
+        workflow_id = getattr(event, 'workflow_id', None)
+        if workflow_id in self._workflows:
+            self.reindex(workflow_id)
+
+    def route(self, document: Document) -> List[DocumentApprovalWorkflow]:
+        """返回適用於文檔的全部工作流，按加入順序排列"""
+        candidates = self._categories.matches(document.category_id)
+        if candidates:
+            candidates &= self._creators.matches(document.creator_id)
+        if candidates:
+            candidates &= self._tag_matches(document.tags)
+        return [self._workflows[workflow_id] for workflow_id in sorted(candidates, key=self._sequence.__getitem__)]
+
+    def first(self, document: Document) -> Optional[DocumentApprovalWorkflow]:
+        """返回第一個適用於文檔的工作流"""
+        matches = self.route(document)
+        return matches[0] if matches else None
+
+    def _tag_matches(self, tags: Iterable[uuid.UUID]) -> Set[uuid.UUID]:
+        matched = set(self._tags_unrestricted)
+        hits: Dict[uuid.UUID, int] = defaultdict(int)
+        for tag_id in set(tags):
+            matched |= self._tags_any.get(tag_id, set())
+            for workflow_id in self._tags_all.get(tag_id, ()):
+                hits[workflow_id] += 1
+        matched.update(workflow_id for workflow_id, count in hits.items()
+                       if count == self._tags_all_required[workflow_id])
+        return matched
+
+    def _unindex(self, workflow_id: uuid.UUID) -> None:
+        indexed = self._indexed.pop(workflow_id, None)
+        if indexed is None:
+            return
+        categories, mode, tag_ids, creators = indexed
+        self._categories.remove(workflow_id, categories)
+        self._creators.remove(workflow_id, creators)
+        if mode is None:
+            self._tags_unrestricted.discard(workflow_id)
+            return
+        index = self._tags_any if mode == 'contains_any' else self._tags_all
+        for tag_id in tag_ids:
+            bucket = index.get(tag_id)
+            if bucket is not None:
+                bucket.discard(workflow_id)
+                if not bucket:
+                    del index[tag_id]
+        self._tags_all_required.pop(workflow_id, None)
@@ -0,0 +1,108 @@
+from typing import Callable, Dict, Optional
+import logging
+import threading
+import uuid
+
+from sqlalchemy import Integer, column, table, update
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Session
+
+from ...application.services.view_counter import ViewCounter
+from ...database.db import SessionLocal
+from .view_counter_impl import get_view_counter, group_increments
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+# 實體類型對應的數據表，只聲明寫回需要的列
+VIEW_COUNT_TABLES = {
+    "document": table("documents", column("id", UUID(as_uuid=True)), column("view_count", Integer)),
+    "question": table("questions", column("id", UUID(as_uuid=True)), column("view_count", Integer)),
+}
+
+
+def flush_view_counts(view_counter: ViewCounter, session_factory: Callable[[], Session] = SessionLocal) -> int:
+    """把緩衝的瀏覽增量批量寫回數據庫，返回寫回的瀏覽次數
+
+    相同增量的實體合併為一條 UPDATE ... SET view_count = view_count + n，全部語句在一個事務中提交；
+    寫回失敗時增量放回緩衝區，下次重試。
+    """
+    counts = {}
+    db = None
+    try:
+        counts = view_counter.drain()
+        if not counts:
+            return 0
+
+        db = session_factory()
+        for kind, entities in counts.items():
+            table = VIEW_COUNT_TABLES[kind]
+            for amount, entity_ids in group_increments(entities):
+                db.execute(
+                    update(table)
+                    .where(table.c.id.in_(entity_ids))
+                    .values(view_count=table.c.view_count + amount)
+                )
+        db.commit()
+    except Exception as e:
+        logger.error(f"Failed to flush view counts: {e}")
+        _restore(view_counter, counts)
+        if db is not None:
+            db.rollback()
+        return 0
+    finally:
+        if db is not None:
+            db.close()
+
+    return sum(sum(entities.values()) for entities in counts.values())
+
+
+def _restore(view_counter: ViewCounter, counts: Dict[str, Dict[uuid.UUID, int]]) -> None:
+    """把未寫回的增量放回緩衝區；放回也失敗時記錄丟失的瀏覽次數"""
+    if not counts:
+        return
+    try:
+        view_counter.restore(counts)
+    except Exception as e:
+        lost = sum(sum(entities.values()) for entities in counts.values())
+        logger.error(f"Failed to restore {lost} buffered views: {e}")
+
+
+class ViewCountFlusher:
+    """後台線程，每隔 interval 秒寫回一次瀏覽增量，停止時做最後一次寫回"""
+
+    def __init__(self, view_counter: ViewCounter, interval: float,
+                 session_factory: Callable[[], Session] = SessionLocal):
+        self.view_counter = view_counter
+        self.interval = interval
+        self.session_factory = session_factory
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="view-count-flusher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stopped.set()
+        self._thread.join()
+        self._thread = None
+        flush_view_counts(self.view_counter, self.session_factory)
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            try:
+                flush_view_counts(self.view_counter, self.session_factory)
+            except Exception:
+                # 任何異常都不能終止線程，否則之後的瀏覽增量不再寫回
+                logger.exception("View count flush failed")
+
+
+def create_view_count_flusher() -> ViewCountFlusher:
+    """按 VIEW_COUNTER_* 配置創建共享瀏覽計數緩衝的寫回任務"""
+    return ViewCountFlusher(get_view_counter(), settings.VIEW_COUNTER_FLUSH_INTERVAL_SECONDS)
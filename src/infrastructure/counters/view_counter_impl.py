@@ -0,0 +1,122 @@
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import logging
+import threading
+import uuid
+
+import redis
+
+from ...application.services.view_counter import VIEW_COUNT_KINDS, ViewCounter
+from ...backend.shared.cache import get_redis_client
+from ...domain.events.document_events import DocumentViewed
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class InMemoryViewCounter(ViewCounter):
+    """進程內瀏覽計數緩衝，多個工作進程各自累加、各自寫回"""
+
+    def __init__(self):
+        self._counts: Dict[str, Dict[uuid.UUID, int]] = defaultdict(lambda: defaultdict(int))
+        self._lock = threading.Lock()
+
+    def increment(self, kind: str, entity_id: uuid.UUID, amount: int = 1) -> int:
+        with self._lock:
+            self._counts[kind][entity_id] += amount
+            return self._counts[kind][entity_id]
+
+    def drain(self) -> Dict[str, Dict[uuid.UUID, int]]:
+        with self._lock:
+            counts = self._counts
+            self._counts = defaultdict(lambda: defaultdict(int))
+        return {kind: dict(entities) for kind, entities in counts.items() if entities}
+
+    def restore(self, counts: Dict[str, Dict[uuid.UUID, int]]) -> None:
+        with self._lock:
+            for kind, entities in counts.items():
+                for entity_id, amount in entities.items():
+                    self._counts[kind][entity_id] += amount
+
+
+class RedisViewCounter(ViewCounter):
+    """Redis 瀏覽計數緩衝，每種實體一個 Hash，所有工作進程共用
+
+    Redis 不可用時丟棄本次計數並記錄警告，不影響讀取請求。
+    """
+
+    def __init__(self, redis_client: Any, prefix: str = "views"):
+        self.redis_client = redis_client
+        self.prefix = prefix
+
+    def _key(self, kind: str) -> str:
+        return f"{self.prefix}:{kind}"
+
+    def increment(self, kind: str, entity_id: uuid.UUID, amount: int = 1) -> int:
+        try:
+            return int(self.redis_client.hincrby(self._key(kind), str(entity_id), amount))
+        except redis.RedisError as e:
+            logger.warning(f"Failed to buffer view count in Redis: {e}")
+            return 0
+
+    def drain(self) -> Dict[str, Dict[uuid.UUID, int]]:
+        # HGETALL 和 DEL 在同一事務中執行，取出期間的新增量不會丟失
+        pipeline = self.redis_client.pipeline(transaction=True)
+        for kind in VIEW_COUNT_KINDS:
+            pipeline.hgetall(self._key(kind))
+            pipeline.delete(self._key(kind))
+        results = pipeline.execute()
+
+        counts = {}
+        for kind, entities in zip(VIEW_COUNT_KINDS, results[::2]):
+            if entities:
+                counts[kind] = {uuid.UUID(_text(entity_id)): int(amount) for entity_id, amount in entities.items()}
+        return counts
+
+    def restore(self, counts: Dict[str, Dict[uuid.UUID, int]]) -> None:
+        pipeline = self.redis_client.pipeline(transaction=False)
+        for kind, entities in counts.items():
+            for entity_id, amount in entities.items():
+                pipeline.hincrby(self._key(kind), str(entity_id), amount)
+        pipeline.execute()
+
+
+def _text(value: Any) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def group_increments(counts: Dict[uuid.UUID, int]) -> List[Tuple[int, List[uuid.UUID]]]:
+    """按增量分組實體，每組對應一條 UPDATE ... WHERE id IN (...) 語句
+
+    瀏覽增量大多是很小的整數，分組後語句數遠少於實體數；組內 ID 排序，
+    多個進程同時寫回時按相同順序加鎖，避免死鎖。
+    """
+    groups: Dict[int, List[uuid.UUID]] = defaultdict(list)
+    for entity_id, amount in counts.items():
+        if amount:
+            groups[amount].append(entity_id)
+    return [(amount, sorted(groups[amount])) for amount in sorted(groups)]
+
+
+def view_count_handler(view_counter: ViewCounter) -> Callable[[DocumentViewed], None]:
+    """返回把 DocumentViewed 事件計入瀏覽緩衝的事件處理器"""
+    def handle(event: DocumentViewed) -> None:
+        view_counter.increment("document", event.document_id)
+    return handle
+
+
+_view_counter: Optional[ViewCounter] = None
+_view_counter_lock = threading.Lock()
+
+
+def get_view_counter() -> ViewCounter:
+    """按 VIEW_COUNTER_BACKEND 配置返回進程內共享的瀏覽計數緩衝"""
+    global _view_counter
+    if _view_counter is None:
+        with _view_counter_lock:
+            if _view_counter is None:
+                if settings.VIEW_COUNTER_BACKEND == "redis":
+                    _view_counter = RedisViewCounter(get_redis_client())
+                else:
+                    _view_counter = InMemoryViewCounter()
+    return _view_counter
@@ -1,4 +1,4 @@
-from typing import List, Dict, Type, Callable, Any
+from typing import List, Dict, Type, Callable, Any, Optional
 import logging
 
 from ...domain.events.base_event import DomainEvent
@@ -8,6 +8,12 @@ from ...domain.events.document_events import (
     DocumentViewed, DocumentTagAdded, DocumentTagRemoved,
     DocumentCommentAdded
 )
+from ...domain.events.document_approval_events import (
+    ApprovalWorkflowUpdated, ApprovalWorkflowActivated, ApprovalWorkflowDeactivated
+)
+from ...domain.services.approval_workflow_router import ApprovalWorkflowRouter
+from ...application.services.view_counter import ViewCounter
+from ..counters.view_counter_impl import view_count_handler
 
 
 class InMemoryEventPublisher(EventPublisher):
@@ -123,9 +129,20 @@ def document_viewed_handler(event: DocumentViewed) -> None:
 
 
 # 註冊事件處理器的示例
-def register_event_handlers(publisher: InMemoryEventPublisher) -> None:
-    """註冊事件處理器"""
+def register_event_handlers(publisher: InMemoryEventPublisher, view_counter: Optional[ViewCounter] = None,
+                            workflow_router: Optional[ApprovalWorkflowRouter] = None) -> None:
+    """註冊事件處理器
+
+    傳入 view_counter 時 DocumentViewed 事件計入瀏覽計數緩衝，用於消費其他服務發布的瀏覽事件；
+    已由 GetDocumentUseCase 直接計數的進程不應再傳入，否則會重複計數。
+    傳入 workflow_router 時審批工作流的條件更新、啟用和停用事件觸發其增量重建索引。
+    """
     publisher.register_handler(DocumentCreated, document_created_handler)
     publisher.register_handler(DocumentPublished, document_published_handler)
     publisher.register_handler(DocumentViewed, document_viewed_handler)
+    if view_counter is not None:
+        publisher.register_handler(DocumentViewed, view_count_handler(view_counter))
+    if workflow_router is not None:
+        for event_type in (ApprovalWorkflowUpdated, ApprovalWorkflowActivated, ApprovalWorkflowDeactivated):
+            publisher.register_handler(event_type, workflow_router.handle)
     # 可以註冊更多事件處理器
\ No newline at end of file
@@ -9,6 +9,7 @@ from ...domain.value_objects.document_status import DocumentStatus
 # 假設這些是現有的 SQLAlchemy 模型
 from ....backend.knowledge_api.models.knowledge import Document as DocumentModel
 from ....backend.knowledge_api.models.knowledge import DocumentTag, Category
+from ...database.trigram import contains_any
 
 
 class SQLAlchemyDocumentRepository(DocumentRepository):
@@ -131,11 +132,7 @@ class SQLAlchemyDocumentRepository(DocumentRepository):
     def search(self, query: str, skip: int = 0, limit: int = 100) -> List[Document]:
         """搜索文檔"""
         db_documents = self.session.query(DocumentModel)\
-            .filter(
-                DocumentModel.title.ilike(f'%{query}%') | 
-                DocumentModel.content.ilike(f'%{query}%') | 
-                DocumentModel.summary.ilike(f'%{query}%')
-            )\
+            .filter(contains_any([DocumentModel.title, DocumentModel.content, DocumentModel.summary], query))\
             .offset(skip).limit(limit).all()
         return [self._map_to_entity(doc) for doc in db_documents]
     
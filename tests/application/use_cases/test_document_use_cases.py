@@ -80,6 +80,34 @@ class TestGetDocumentUseCase:
         assert event.document_id == document_id
         assert event.viewer_id == viewer_id
     
+    def test_execute_with_view_counter(self):
+        # Arrange
+        mock_repo = Mock()
+        mock_event_publisher = Mock()
+        mock_view_counter = Mock()
+        mock_view_counter.increment.return_value = 3
+        
+        document = Document.create(
+            title="Test Document",
+            content="content",
+            category_id=uuid.uuid4(),
+            creator_id=uuid.uuid4()
+        )
+        document.view_count = 10
+        mock_repo.get_by_id.return_value = document
+        
+        use_case = GetDocumentUseCase(mock_repo, mock_event_publisher, mock_view_counter)
+        document_id = uuid.uuid4()
+        
+        # Act
+        result = use_case.execute(document_id)
+        
+        # Assert：只計入緩衝區，不保存文檔，返回值包含未寫回的增量
+        mock_view_counter.increment.assert_called_once_with("document", document_id)
+        mock_repo.save.assert_not_called()
+        assert result.view_count == 13
+        mock_event_publisher.publish.assert_called_once()
+    
     def test_execute_document_not_found(self):
         # Arrange
         mock_repo = Mock()
@@ -0,0 +1,42 @@
+import uuid
+
+from src.backend.knowledge_api.services.category_tree import (
+    build_paths,
+    category_path,
+    path_has_ancestor,
+)
+
+ROOT = uuid.UUID("00000000-0000-0000-0000-000000000001")
+CHILD = uuid.UUID("00000000-0000-0000-0000-000000000002")
+GRANDCHILD = uuid.UUID("00000000-0000-0000-0000-000000000003")
+OTHER = uuid.UUID("00000000-0000-0000-0000-000000000004")
+
+
+class TestCategoryPath:
+    """分類物化路徑測試"""
+
+    def test_nested_path(self):
+        """子分類路徑以父分類路徑為前綴"""
+        root_path = category_path(None, ROOT)
+        child_path = category_path(root_path, CHILD)
+        assert root_path == f"/{ROOT.hex}/"
+        assert child_path == f"/{ROOT.hex}/{CHILD.hex}/"
+        assert child_path.startswith(root_path)
+
+    def test_ancestry(self):
+        """路徑包含祖先和自身，不包含其他分類"""
+        path = category_path(category_path(None, ROOT), CHILD)
+        assert path_has_ancestor(path, ROOT)
+        assert path_has_ancestor(path, CHILD)
+        assert not path_has_ancestor(path, OTHER)
+
+    def test_build_paths(self):
+        """由 parent_id 計算全部路徑，與輸入順序無關"""
+        paths = build_paths([(GRANDCHILD, CHILD), (CHILD, ROOT), (ROOT, None)])
+        assert paths[GRANDCHILD] == f"/{ROOT.hex}/{CHILD.hex}/{GRANDCHILD.hex}/"
+        assert paths[ROOT] == f"/{ROOT.hex}/"
+
+    def test_build_paths_skips_cycles(self):
+        """環上的分類沒有路徑，不影響其他分類"""
+        paths = build_paths([(ROOT, None), (CHILD, GRANDCHILD), (GRANDCHILD, CHILD)])
+        assert set(paths) == {ROOT}
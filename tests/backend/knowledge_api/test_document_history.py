@@ -0,0 +1,196 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from src.database.db import Base
+from src.backend.ticket_api.models.ticket import User
+from src.backend.knowledge_api.models.knowledge import Category, Document, DocumentHistory
+from src.backend.knowledge_api.services.document_history import DocumentHistoryStore, RevisionReader
+from src.backend.knowledge_api.services.document_service import DocumentService
+from src.backend.shared.pagination import next_cursor
+
+TABLES = ("departments", "users", "categories", "documents", "document_history")
+
+# 30 行的文檔，每個版本修改一行，增量遠小於完整內容
+VERSIONS = ["\n".join(f"第 {line} 行" for line in range(30))]
+for _changed in range(1, 8):
+    VERSIONS.append(VERSIONS[-1].replace(f"第 {_changed} 行", f"第 {_changed} 行（已修訂）"))
+
+STARTED_AT = datetime(2024, 1, 1)
+
+
+@compiles(TSVECTOR, "sqlite")
+def _compile_tsvector(type_, compiler, **kw):
+    return "TEXT"
+
+
+@compiles(JSONB, "sqlite")
+def _compile_jsonb(type_, compiler, **kw):
+    return "JSON"
+
+
+@pytest.fixture
+def history_db():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    tables = [Base.metadata.tables[name] for name in TABLES]
+    Base.metadata.create_all(engine, tables=tables)
+    session = sessionmaker(bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(engine, tables=tables)
+
+
+@pytest.fixture
+def document(history_db):
+    user = User(username="editor", email="editor@example.com", full_name="編輯", password_hash="x", role="user")
+    category = Category(name="操作手冊", path="")
+    history_db.add_all([user, category])
+    history_db.flush()
+    category.path = str(category.id)
+    document = Document(title="VPN 設定", content=VERSIONS[-1], category_id=category.id, creator_id=user.id)
+    history_db.add(document)
+    history_db.commit()
+    return document
+
+
+def _record_versions(db, document, store):
+    """依次記錄所有版本，每個版本間隔一分鐘"""
+    for index, content in enumerate(VERSIONS):
+        history = store.record(document.id, document.creator_id, content, {"version": index})
+        history.created_at = STARTED_AT + timedelta(minutes=index)
+        db.flush()
+    db.commit()
+
+
+def _count_statements(db, action):
+    """統計執行操作期間發送到數據庫的語句數量"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = db.get_bind()
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        result = action()
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    return result, len(statements)
+
+
+def _stored(db, document):
+    """按版本號返回 (版本號, 是否快照, 是否增量)"""
+    return [
+        (revision, content is not None, delta is not None)
+        for revision, content, delta in db.query(
+            DocumentHistory.revision, DocumentHistory.content, DocumentHistory.delta
+        ).filter(DocumentHistory.document_id == document.id).order_by(DocumentHistory.revision)
+    ]
+
+
+class TestDocumentHistoryStore:
+    """文檔歷史存儲測試"""
+
+    def test_record_full_storage(self, history_db, document):
+        """full 模式下每個版本都保存完整內容"""
+        _record_versions(history_db, document, DocumentHistoryStore(history_db, storage="full"))
+        assert _stored(history_db, document) == [(revision, True, False) for revision in range(1, 9)]
+
+    def test_record_delta_storage(self, history_db, document):
+        """delta 模式下按快照間隔保存快照，其餘版本保存增量"""
+        _record_versions(history_db, document, DocumentHistoryStore(history_db, storage="delta", snapshot_interval=3))
+        assert _stored(history_db, document) == [
+            (revision, revision in (1, 4, 7), revision not in (1, 4, 7)) for revision in range(1, 9)
+        ]
+
+        reader = RevisionReader(history_db, document.id)
+        assert [reader.content(revision) for revision in range(1, 9)] == VERSIONS
+        assert reader.content(9) is None
+
+    def test_compact_numbers_legacy_rows(self, history_db, document):
+        """沒有版本號的舊記錄按時間排在最前並重新編號，內容按新的存儲方式重寫"""
+        for index, content in enumerate(VERSIONS[:3]):
+            history_db.add(DocumentHistory(document_id=document.id, user_id=document.creator_id,
+                                           content=content, changes={"version": index},
+                                           created_at=STARTED_AT + timedelta(minutes=index)))
+        history_db.commit()
+        store = DocumentHistoryStore(history_db, storage="delta", snapshot_interval=3)
+        for index, content in enumerate(VERSIONS[3:], start=3):
+            history = store.record(document.id, document.creator_id, content, {"version": index})
+            history.created_at = STARTED_AT + timedelta(minutes=index)
+            history_db.flush()
+        history_db.commit()
+
+        revisions, size_before, size_after = store.compact(document.id)
+        history_db.commit()
+
+        assert revisions == len(VERSIONS)
+        assert size_after < size_before
+        assert [
+            changes["version"] for changes, in history_db.query(DocumentHistory.changes).filter(
+                DocumentHistory.document_id == document.id
+            ).order_by(DocumentHistory.revision)
+        ] == list(range(len(VERSIONS)))
+        reader = RevisionReader(history_db, document.id)
+        assert [reader.content(revision) for revision in range(1, 9)] == VERSIONS
+
+
+class TestRevisionReader:
+    """歷史版本重建測試"""
+
+    def test_descending_reads_load_each_segment_once(self, history_db, document):
+        """按版本倒序讀取時，每段（快照及其後的增量）只查詢一次"""
+        _record_versions(history_db, document, DocumentHistoryStore(history_db, storage="delta", snapshot_interval=3))
+        reader = RevisionReader(history_db, document.id)
+
+        contents, statements = _count_statements(
+            history_db, lambda: [reader.content(revision) for revision in range(8, 0, -1)]
+        )
+        assert contents == VERSIONS[::-1]
+        # 段 7-8、4-6、1-3 各一次快照定位和一次行讀取
+        assert statements == 6
+
+
+class TestDocumentServiceHistory:
+    """文檔服務的歷史讀取測試"""
+
+    @pytest.fixture
+    def service(self, history_db, document, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        service = DocumentService(history_db)
+        service.history = DocumentHistoryStore(history_db, storage="delta", snapshot_interval=3)
+        _record_versions(history_db, document, service.history)
+        return service
+
+    def test_diff_pages_cover_every_revision(self, service, document):
+        """diff 模式每頁多讀一行，跨頁時每個版本都相對上一版本計算差異"""
+        first = service.get_history(document.id, limit=3, content="diff")
+        assert [item["revision"] for item in first] == [8, 7, 6]
+        assert all("content" not in item for item in first)
+
+        items = list(first)
+        cursor = next_cursor(first, 3)
+        while cursor:
+            page = service.get_history(document.id, limit=3, cursor=cursor, content="diff")
+            items += page
+            cursor = next_cursor(page, 3)
+
+        full = service.get_history(document.id, content="diff")
+        assert [item["revision"] for item in items] == list(range(8, 0, -1))
+        assert [item["content_diff"] for item in items] == [item["content_diff"] for item in full]
+        assert "+第 1 行（已修訂）" in items[-2]["content_diff"]
+        assert items[-1]["content_diff"].count("\n+第") == 30
+
+    def test_get_revision(self, service, document):
+        """按版本號重建完整內容，版本不存在時返回 None"""
+        item = service.get_revision(document.id, 5)
+        assert item["content"] == VERSIONS[4]
+        assert item["changes"] == {"version": 4}
+        assert service.get_revision(document.id, 9) is None
@@ -0,0 +1,52 @@
+from src.backend.knowledge_api.services.highlighter import Highlighter
+
+
+class TestHighlighter:
+    """高亮片段生成測試"""
+
+    def setup_method(self):
+        self.highlighter = Highlighter("<mark>", "</mark>")
+
+    def test_short_paragraph_is_returned_whole(self):
+        """短段落整段返回並標記所有命中詞"""
+        text = "第一段無關\nVPN 連線失敗時請重設 vpn 設定"
+        assert self.highlighter.highlight("vpn", text) == [
+            "<mark>VPN</mark> 連線失敗時請重設 <mark>vpn</mark> 設定"
+        ]
+
+    def test_long_paragraph_is_cut_around_hit(self):
+        """長段落只截取命中詞前後的上下文"""
+        text = "a" * 100 + " printer " + "b" * 100
+        snippet, = self.highlighter.highlight("printer", text)
+        assert snippet == "..." + "a" * 49 + " <mark>printer</mark> " + "b" * 49 + "..."
+
+    def test_overlapping_windows_are_merged(self):
+        """重疊的上下文窗口合併為一個片段"""
+        text = "x" * 100 + " reset the password " + "y" * 100
+        snippets = self.highlighter.highlight("password reset", text)
+        assert len(snippets) == 1
+        assert "<mark>reset</mark> the <mark>password</mark>" in snippets[0]
+
+    def test_longer_terms_win(self):
+        """較長的查詢詞優先匹配"""
+        assert self.highlighter.highlight("pass password", "password") == ["<mark>password</mark>"]
+
+    def test_stops_after_three_snippets(self):
+        """最多返回三個片段"""
+        text = "\n".join(f"line {i} error" for i in range(10))
+        snippets = self.highlighter.highlight("error", text)
+        assert snippets == [f"line {i} <mark>error</mark>" for i in range(3)]
+
+    def test_text_is_escaped(self):
+        """片段中的 HTML 被轉義"""
+        assert self.highlighter.highlight("tag", "<b>tag</b>") == ["&lt;b&gt;<mark>tag</mark>&lt;/b&gt;"]
+
+    def test_regex_characters_in_query(self):
+        """查詢詞中的正則特殊字符按字面匹配"""
+        assert self.highlighter.highlight("c++", "learn C++ today") == ["learn <mark>C++</mark> today"]
+
+    def test_no_hit_returns_text_head(self):
+        """沒有命中時返回文本開頭"""
+        text = "z" * 150
+        assert self.highlighter.highlight("missing", text) == ["z" * 100 + "..."]
+        assert self.highlighter.highlight("", "short") == ["short"]
@@ -0,0 +1,85 @@
+import json
+
+from src.backend.knowledge_api.services.history_delta import (
+    apply_delta,
+    content_diff,
+    encode_revision,
+    is_snapshot_revision,
+    make_delta,
+    rebuild,
+)
+
+
+class TestContentDiff:
+    """文檔歷史內容差異測試"""
+
+    def test_changed_line(self):
+        """只輸出變化的行及上下文"""
+        diff = content_diff("標題\n第一段\n第二段", "標題\n第一段（修訂）\n第二段")
+        assert diff.splitlines()[2:] == [
+            "@@ -1,3 +1,3 @@",
+            " 標題",
+            "-第一段",
+            "+第一段（修訂）",
+            " 第二段",
+        ]
+
+    def test_first_version_is_all_additions(self):
+        """首個版本相對空文本計算"""
+        assert content_diff(None, "a\nb").splitlines()[3:] == ["+a", "+b"]
+
+    def test_identical_content_has_empty_diff(self):
+        """內容未變化時差異為空"""
+        assert content_diff("same", "same") == ""
+
+
+class TestLineDelta:
+    """行級增量測試"""
+
+    def test_roundtrip(self):
+        """應用增量後與目標逐字節一致，包括末尾換行"""
+        base = "標題\n第一段\n第二段\n第三段\n"
+        target = "標題\n第一段（修訂）\n第二段\n新增段落\n"
+        assert apply_delta(base, make_delta(base, target)) == target
+
+    def test_unchanged_lines_are_copied_by_range(self):
+        """未變化的行以行號範圍表示，不重複保存文本"""
+        base = "".join(f"line {i}\n" for i in range(100))
+        target = base.replace("line 50\n", "changed\n")
+        assert json.loads(make_delta(base, target)) == [[0, 50], "changed\n", [51, 100]]
+
+    def test_empty_documents(self):
+        """空文本之間的增量"""
+        assert apply_delta("", make_delta("", "a\nb")) == "a\nb"
+        assert apply_delta("a\nb", make_delta("a\nb", "")) == ""
+
+    def test_rebuild_chain(self):
+        """從快照依次應用增量得到每個版本"""
+        versions = ["a\nb\nc", "a\nB\nc", "a\nB\nc\nd", "B\nc\nd"]
+        deltas = [make_delta(before, after) for before, after in zip(versions, versions[1:])]
+        assert list(rebuild(versions[0], deltas)) == versions
+
+
+class TestEncodeRevision:
+    """版本存儲形式測試"""
+
+    def test_snapshot_interval(self):
+        """第 1、1 + interval ... 個版本保存快照"""
+        assert [r for r in range(1, 12) if is_snapshot_revision(r, 5)] == [1, 6, 11]
+        assert all(is_snapshot_revision(r, 1) for r in range(1, 5))
+
+    def test_first_revision_is_snapshot(self):
+        """沒有上一版本時保存快照"""
+        assert encode_revision(3, None, "content", 20) == ("content", None)
+
+    def test_small_change_is_delta(self):
+        """小改動保存為增量"""
+        previous = "".join(f"paragraph {i}\n" for i in range(50))
+        content = previous + "appended\n"
+        snapshot, delta = encode_revision(2, previous, content, 20)
+        assert snapshot is None
+        assert apply_delta(previous, delta) == content
+
+    def test_rewrite_falls_back_to_snapshot(self):
+        """增量不比完整內容小時保存快照"""
+        assert encode_revision(2, "old text", "new", 20) == ("new", None)
@@ -0,0 +1,68 @@
+import uuid
+from collections import namedtuple
+
+from src.backend.knowledge_api.services.search_backend import InMemorySearchBackend
+
+DocumentRow = namedtuple("DocumentRow", ["id", "title", "summary", "content", "category_id", "is_published"])
+QuestionRow = namedtuple("QuestionRow", ["id", "title", "content", "document_id"])
+
+
+class FakeQuery:
+    def __init__(self, rows, on_load=None):
+        self.rows = rows
+        self.on_load = on_load
+
+    def all(self):
+        if self.on_load:
+            self.on_load()
+        return list(self.rows)
+
+
+class FakeSession:
+    """按查詢順序返回文檔行和問題行，加載文檔時可執行回調以模擬並發寫入"""
+
+    def __init__(self, documents, questions=(), on_load=None):
+        self.results = [FakeQuery(documents, on_load), FakeQuery(questions)]
+
+    def query(self, *columns):
+        return self.results.pop(0)
+
+
+def _document(title, category_id=None, is_published=True):
+    return DocumentRow(uuid.uuid4(), title, None, None, category_id, is_published)
+
+
+class TestInMemorySearchBackend:
+    """進程內搜索後端測試"""
+
+    def test_uncategorized_document_has_no_category(self):
+        """未分類文檔的 category_id 為 None，不會與任何分類篩選匹配"""
+        backend = InMemorySearchBackend(max_age_seconds=0)
+        document = _document("VPN 連線")
+        backend.rebuild(FakeSession([document]))
+        assert backend.documents.attrs(document.id)["category_id"] is None
+
+        hits, total = backend.rank(None, "vpn", ["document"], {"category_id": "None"})
+        assert (hits, total) == ([], 0)
+
+    def test_writes_during_rebuild_are_replayed(self):
+        """重建期間的寫入和刪除重放到新索引，不隨舊索引丟失"""
+        backend = InMemorySearchBackend(max_age_seconds=0)
+        stale = _document("印表機")
+        backend.rebuild(FakeSession([stale]))
+
+        added = _document("VPN 連線")
+
+        def concurrent_writes():
+            backend.index_document(added)
+            backend.remove_document(stale.id)
+
+        backend.rebuild(FakeSession([stale], on_load=concurrent_writes))
+
+        assert backend.documents.attrs(added.id) is not None
+        assert backend.documents.attrs(stale.id) is None
+        assert backend._pending is None
+
+        # 重建結束後的寫入直接寫入索引，不再記錄
+        backend.remove_document(added.id)
+        assert backend.documents.attrs(added.id) is None
@@ -0,0 +1,91 @@
+import pytest
+
+from src.backend.knowledge_api.services.inverted_index import InvertedIndex, tokenize
+
+
+class TestTokenize:
+    """分詞測試"""
+
+    def test_cjk_text_is_split_into_bigrams(self):
+        """連續中文字符按二元組切分"""
+        assert tokenize("知識庫") == ["知識", "識庫"]
+
+    def test_single_cjk_character_is_kept(self):
+        """單個中文字符保留為單字詞項"""
+        assert tokenize("表 單") == ["表", "單"]
+
+    def test_latin_words_are_lowercased(self):
+        """拉丁文字按單詞切分並小寫化"""
+        assert tokenize("Reset VPN-Password") == ["reset", "vpn", "password"]
+
+    def test_mixed_text(self):
+        """中英文混排時分別切分"""
+        assert tokenize("VPN連線失敗") == ["vpn", "連線", "線失", "失敗"]
+
+    def test_empty_text(self):
+        """空文本不產生詞項"""
+        assert tokenize("") == []
+        assert tokenize(None) == []
+
+
+class TestInvertedIndex:
+    """倒排索引測試"""
+
+    @pytest.fixture
+    def index(self):
+        index = InvertedIndex()
+        index.upsert("vpn", "VPN 連線失敗的排查步驟", {"published": True})
+        index.upsert("password", "如何重設密碼", {"published": True})
+        index.upsert("draft", "VPN 連線設定草稿", {"published": False})
+        return index
+
+    def test_search_requires_all_terms(self, index):
+        """查詢詞項之間為 AND 關係"""
+        keys = [key for key, _ in index.search("VPN 連線")]
+        assert sorted(keys) == ["draft", "vpn"]
+        assert index.search("VPN 密碼") == []
+
+    def test_search_applies_predicate(self, index):
+        """篩選函數作用於條目屬性"""
+        keys = [key for key, _ in index.search("VPN", lambda attrs: attrs["published"])]
+        assert keys == ["vpn"]
+
+    def test_higher_term_frequency_ranks_first(self):
+        """詞頻越高得分越高"""
+        index = InvertedIndex()
+        index.upsert("once", "印表機 卡紙 處理")
+        index.upsert("twice", "印表機 卡紙 印表機 處理")
+        hits = index.search("印表機")
+        assert [key for key, _ in hits] == ["twice", "once"]
+        assert hits[0][1] > hits[1][1] > 0
+
+    def test_rare_terms_weigh_more(self):
+        """文檔頻率越低的詞項權重越高"""
+        index = InvertedIndex()
+        index.upsert("a", "系統 錯誤")
+        index.upsert("b", "系統 當機")
+        index.upsert("c", "系統 更新")
+        common = dict(index.search("系統"))["b"]
+        rare = dict(index.search("當機"))["b"]
+        assert rare > common
+
+    def test_upsert_replaces_existing_entry(self, index):
+        """更新條目時舊詞項被移除"""
+        index.upsert("password", "如何解鎖帳號", {"published": True})
+        assert index.search("密碼") == []
+        assert [key for key, _ in index.search("解鎖")] == ["password"]
+        assert len(index) == 3
+
+    def test_remove(self, index):
+        """移除條目後不再命中"""
+        assert index.remove("vpn") is True
+        assert index.remove("vpn") is False
+        assert "vpn" not in index
+        assert [key for key, _ in index.search("VPN")] == ["draft"]
+
+    def test_ties_are_ordered_by_key(self):
+        """得分相同時按鍵排序"""
+        index = InvertedIndex()
+        for key in ("c", "a", "b"):
+            index.upsert(key, "同樣的內容")
+        assert [key for key, _ in index.search("內容")] == ["a", "b", "c"]
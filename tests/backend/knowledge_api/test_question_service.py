@@ -0,0 +1,158 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from src.database.db import Base
+from src.backend.ticket_api.models.ticket import User
+from src.backend.knowledge_api.models.knowledge import Answer, AnswerVote, Category, Document, Question
+from src.backend.knowledge_api.schemas.question import AnswerVoteCreate
+from src.backend.knowledge_api.services.question_service import QuestionService
+
+TABLES = ("departments", "users", "categories", "documents", "questions", "answers", "answer_votes")
+
+
+@compiles(TSVECTOR, "sqlite")
+def _compile_tsvector(type_, compiler, **kw):
+    return "TEXT"
+
+
+@compiles(JSONB, "sqlite")
+def _compile_jsonb(type_, compiler, **kw):
+    return "JSON"
+
+
+@pytest.fixture
+def vote_db():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    tables = [Base.metadata.tables[name] for name in TABLES]
+    Base.metadata.create_all(engine, tables=tables)
+    session = sessionmaker(bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(engine, tables=tables)
+
+
+@pytest.fixture
+def users(vote_db):
+    users = [
+        User(username=f"voter{i}", email=f"voter{i}@example.com", full_name=f"投票者{i}",
+             password_hash="x", role="user")
+        for i in range(3)
+    ]
+    vote_db.add_all(users)
+    vote_db.commit()
+    return users
+
+
+@pytest.fixture
+def question(vote_db, users):
+    category = Category(name="常見問題", path="")
+    vote_db.add(category)
+    vote_db.flush()
+    category.path = str(category.id)
+    document = Document(title="VPN 設定", content="連線步驟", category_id=category.id, creator_id=users[0].id)
+    vote_db.add(document)
+    vote_db.flush()
+    question = Question(title="VPN 無法連線", content="顯示逾時", document_id=document.id, user_id=users[0].id)
+    vote_db.add(question)
+    vote_db.commit()
+    return question
+
+
+def _answer(db, question, user):
+    answer = Answer(question_id=question.id, user_id=user.id, content="請重新安裝用戶端")
+    db.add(answer)
+    db.commit()
+    return answer
+
+
+def _vote(service, answer, user, is_upvote):
+    return service.vote_answer(answer.id, AnswerVoteCreate(answer_id=answer.id, user_id=user.id, is_upvote=is_upvote))
+
+
+def _tally(answer):
+    return answer.upvote_count, answer.downvote_count, answer.score
+
+
+class TestVoteAnswer:
+    """回答投票計數維護測試"""
+
+    def test_new_votes(self, vote_db, users, question):
+        """新投票累加對應的計數和得分"""
+        service = QuestionService(vote_db)
+        answer = _answer(vote_db, question, users[0])
+
+        _vote(service, answer, users[1], True)
+        answer = _vote(service, answer, users[2], False)
+        assert _tally(answer) == (1, 1, 0)
+        assert vote_db.query(AnswerVote).count() == 2
+
+    def test_same_vote_cancels(self, vote_db, users, question):
+        """重複投相同的票取消投票並扣回計數"""
+        service = QuestionService(vote_db)
+        answer = _answer(vote_db, question, users[0])
+
+        _vote(service, answer, users[1], True)
+        answer = _vote(service, answer, users[1], True)
+        assert _tally(answer) == (0, 0, 0)
+        assert vote_db.query(AnswerVote).count() == 0
+
+    def test_switch_vote(self, vote_db, users, question):
+        """改投相反的票時兩個計數同時調整"""
+        service = QuestionService(vote_db)
+        answer = _answer(vote_db, question, users[0])
+
+        _vote(service, answer, users[1], False)
+        answer = _vote(service, answer, users[1], True)
+        assert _tally(answer) == (1, 0, 1)
+        assert vote_db.query(AnswerVote).one().is_upvote
+
+
+class TestReconcileVoteTallies:
+    """投票計數重算測試"""
+
+    def test_reconcile_matches_votes(self, vote_db, users, question):
+        """按投票表重算不一致的計數，沒有投票的回答歸零，一致的行不更新"""
+        voted = _answer(vote_db, question, users[0])
+        unvoted = _answer(vote_db, question, users[1])
+        correct = _answer(vote_db, question, users[2])
+        vote_db.add_all([
+            AnswerVote(answer_id=voted.id, user_id=users[1].id, is_upvote=True),
+            AnswerVote(answer_id=voted.id, user_id=users[2].id, is_upvote=True),
+            AnswerVote(answer_id=voted.id, user_id=users[0].id, is_upvote=False),
+            AnswerVote(answer_id=correct.id, user_id=users[0].id, is_upvote=False),
+        ])
+        voted.upvote_count, voted.downvote_count, voted.score = 5, 0, 5
+        unvoted.upvote_count, unvoted.downvote_count, unvoted.score = 2, 1, 1
+        correct.upvote_count, correct.downvote_count, correct.score = 0, 1, -1
+        vote_db.commit()
+
+        assert QuestionService(vote_db).reconcile_vote_tallies() == 2
+        vote_db.expire_all()
+        assert _tally(vote_db.get(Answer, voted.id)) == (2, 1, 1)
+        assert _tally(vote_db.get(Answer, unvoted.id)) == (0, 0, 0)
+        assert _tally(vote_db.get(Answer, correct.id)) == (0, 1, -1)
+
+        assert QuestionService(vote_db).reconcile_vote_tallies() == 0
+
+    def test_reconcile_limited_to_question(self, vote_db, users, question):
+        """指定問題時只重算該問題的回答"""
+        other = Question(title="印表機卡紙", content="三樓印表機", document_id=question.document_id,
+                         user_id=users[0].id)
+        vote_db.add(other)
+        vote_db.commit()
+        answer = _answer(vote_db, question, users[0])
+        other_answer = _answer(vote_db, other, users[0])
+        for item in (answer, other_answer):
+            item.upvote_count, item.score = 3, 3
+        vote_db.commit()
+
+        assert QuestionService(vote_db).reconcile_vote_tallies(question_id=question.id) == 1
+        vote_db.expire_all()
+        assert _tally(vote_db.get(Answer, answer.id)) == (0, 0, 0)
+        assert _tally(vote_db.get(Answer, other_answer.id)) == (3, 0, 3)
@@ -0,0 +1,99 @@
+import uuid
+from datetime import datetime
+
+from src.backend.knowledge_api.schemas.search import SearchResult
+from src.backend.knowledge_api.services.search_cache import SearchCache, search_cache_enabled
+from src.backend.shared.cache import TTLCache
+from src.config import settings
+
+
+def make_result(title="VPN 設定"):
+    return SearchResult(
+        id=uuid.uuid4(),
+        type="document",
+        title=title,
+        content="內容",
+        highlight={"content": ["<mark>VPN</mark> 設定"]},
+        created_at=datetime(2024, 1, 1),
+        user_id=uuid.uuid4(),
+        user_name="測試用戶",
+        score=0.5,
+    )
+
+
+class TestSearchCache:
+    """搜索結果緩存測試"""
+
+    def test_key_normalizes_query_and_filters(self):
+        """查詢詞大小寫和空白不影響緩存鍵"""
+        cache = SearchCache(TTLCache(10, 60), 60)
+        category_id = uuid.uuid4()
+        first = cache.key("  VPN   設定 ", ["document"], {"category_id": category_id}, 0, 20)
+        second = cache.key("vpn 設定", ["document"], {"category_id": str(category_id)}, 0, 20)
+        assert first == second
+        assert first != cache.key("vpn 設定", ["document"], {"category_id": category_id}, 20, 20)
+
+    def test_write_invalidates_only_dependent_keys(self):
+        """文檔寫入只影響包含文檔的搜索"""
+        cache = SearchCache(TTLCache(10, 60), 60)
+        documents = cache.key("vpn", ["document"], None, 0, 20)
+        questions = cache.key("vpn", ["question"], None, 0, 20)
+        both = cache.key("vpn", ["document", "question"], None, 0, 20)
+
+        cache.invalidate_documents()
+
+        assert cache.key("vpn", ["document"], None, 0, 20) != documents
+        assert cache.key("vpn", ["question"], None, 0, 20) == questions
+        assert cache.key("vpn", ["document", "question"], None, 0, 20) != both
+
+    def test_local_tier(self):
+        """進程內緩存直接返回結果"""
+        cache = SearchCache(TTLCache(10, 60), 60)
+        results = [make_result()]
+        key = cache.key("vpn", ["document"], None, 0, 20)
+        assert cache.get(key) is None
+        cache.set(key, results, 1)
+        assert cache.get(key) == (results, 1)
+
+    def test_redis_tier_is_shared_between_processes(self, fake_redis):
+        """另一進程寫入 Redis 的結果可被讀取，版本號也在進程間共享"""
+        writer = SearchCache(TTLCache(10, 60), 60, fake_redis)
+        reader = SearchCache(TTLCache(10, 60), 60, fake_redis)
+        results = [make_result()]
+
+        writer.set(writer.key("vpn", ["document"], None, 0, 20), results, 1)
+        cached_results, total = reader.get(reader.key("vpn", ["document"], None, 0, 20))
+        assert total == 1
+        assert cached_results[0].dict() == results[0].dict()
+
+        writer.invalidate_documents()
+        assert reader.get(reader.key("vpn", ["document"], None, 0, 20)) is None
+
+    def test_redis_outage_is_a_cache_miss(self, fake_redis):
+        """Redis 不可用時視為未命中"""
+        cache = SearchCache(TTLCache(0, 60), 60, fake_redis)
+        fake_redis.down = True
+        key = cache.key("vpn", ["document"], None, 0, 20)
+        cache.set(key, [make_result()], 1)
+        assert cache.get(key) is None
+
+
+class TestSearchCacheEnabled:
+    """搜索緩存開關測試"""
+
+    def test_follows_redis_when_unset(self, monkeypatch):
+        """未設置時只在開啟 Redis 時啟用"""
+        monkeypatch.setattr(settings, "SEARCH_CACHE_ENABLED", None)
+        monkeypatch.setattr(settings, "SEARCH_CACHE_REDIS_ENABLED", False)
+        assert not search_cache_enabled()
+        monkeypatch.setattr(settings, "SEARCH_CACHE_REDIS_ENABLED", True)
+        assert search_cache_enabled()
+
+    def test_explicit_setting_wins(self, monkeypatch):
+        """顯式設置時按設置啟用或關閉"""
+        monkeypatch.setattr(settings, "SEARCH_CACHE_ENABLED", True)
+        monkeypatch.setattr(settings, "SEARCH_CACHE_REDIS_ENABLED", False)
+        assert search_cache_enabled()
+        monkeypatch.setattr(settings, "SEARCH_CACHE_ENABLED", False)
+        monkeypatch.setattr(settings, "SEARCH_CACHE_REDIS_ENABLED", True)
+        assert not search_cache_enabled()
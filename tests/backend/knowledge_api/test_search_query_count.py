@@ -0,0 +1,114 @@
+import uuid
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from src.database.db import Base
+from src.backend.ticket_api.models.ticket import User
+from src.backend.knowledge_api.models.knowledge import Answer, Category, Document, Question
+from src.backend.knowledge_api.services.search_backend import SearchBackend, SearchHit
+from src.backend.knowledge_api.services.search_service import SearchService
+
+TABLES = ("departments", "users", "categories", "documents", "questions", "answers")
+
+
+@compiles(TSVECTOR, "sqlite")
+def _compile_tsvector(type_, compiler, **kw):
+    return "TEXT"
+
+
+@compiles(JSONB, "sqlite")
+def _compile_jsonb(type_, compiler, **kw):
+    return "JSON"
+
+
+class StubSearchBackend(SearchBackend):
+    """按固定順序返回預設命中結果的搜索後端"""
+
+    def __init__(self):
+        self.hits = []
+
+    def rank(self, db, query, search_types, filters=None, skip=0, limit=20):
+        page = [hit for hit in self.hits if hit.type in search_types]
+        return page[skip:skip + limit], len(page)
+
+
+@pytest.fixture
+def search_db():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    tables = [Base.metadata.tables[name] for name in TABLES]
+    Base.metadata.create_all(engine, tables=tables)
+    session = sessionmaker(bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(engine, tables=tables)
+
+
+def _add_hits(db, backend, count):
+    """每份數據使用獨立的用戶和分類，確保關聯查詢確實覆蓋多個實體"""
+    for i in range(count):
+        user = User(username=f"user{uuid.uuid4().hex}", email=f"{uuid.uuid4().hex}@example.com",
+                    full_name=f"用戶{i}", password_hash="x", role="user")
+        category = Category(name=f"分類{i}", path="")
+        db.add_all([user, category])
+        db.flush()
+        category.path = str(category.id)
+        document = Document(title="測試文檔", content="這是一個測試文檔，用於測試搜索功能。",
+                            category_id=category.id, creator_id=user.id)
+        db.add(document)
+        db.flush()
+        question = Question(title="測試問題", content="這是一個測試問題，用於測試搜索功能。",
+                            document_id=document.id, user_id=user.id)
+        db.add(question)
+        db.flush()
+        db.add(Answer(question_id=question.id, user_id=user.id, content="回答"))
+        backend.hits += [SearchHit("document", document.id, 1.0), SearchHit("question", question.id, 0.5)]
+    db.commit()
+
+
+def _count_statements(db, action):
+    """統計執行操作期間發送到數據庫的語句數量"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = db.get_bind()
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        result = action()
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    return result, len(statements)
+
+
+class TestSearchQueryCount:
+    """搜索結果組裝的查詢次數測試"""
+
+    def test_query_count_does_not_grow_with_results(self, search_db):
+        """結果組裝按實體類型批量查詢，查詢次數不隨命中數量增長"""
+        backend = StubSearchBackend()
+        service = SearchService(search_db, backend=backend)
+        # 不使用結果緩存，每次搜索都實際組裝結果
+        service.cache = None
+
+        _add_hits(search_db, backend, 1)
+        (results, total), single_count = _count_statements(search_db, lambda: service.search("測試", limit=20))
+        assert total == 2 and len(results) == 2
+
+        _add_hits(search_db, backend, 4)
+        search_db.expire_all()
+        (results, total), many_count = _count_statements(search_db, lambda: service.search("測試", limit=20))
+        assert total == 10 and len(results) == 10
+        assert [(result.type, result.id) for result in results] == [(hit.type, hit.id) for hit in backend.hits]
+        assert all(result.user_name != "未知用戶" for result in results)
+        assert all(result.answer_count == 1 for result in results if result.type == "question")
+
+        # 文檔、問題各一次，用戶、分類、父文檔分類和回答數量按類型批量查詢
+        assert many_count == single_count
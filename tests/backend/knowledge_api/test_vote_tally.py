@@ -0,0 +1,27 @@
+from src.backend.knowledge_api.services.vote_tally import VoteChange, vote_change
+
+
+class TestVoteChange:
+    """回答投票計數增量測試"""
+
+    def test_new_upvote(self):
+        """首次贊成"""
+        assert vote_change(None, True) == VoteChange(True, 1, 0)
+
+    def test_new_downvote(self):
+        """首次反對"""
+        change = vote_change(None, False)
+        assert change == VoteChange(False, 0, 1)
+        assert change.score == -1
+
+    def test_same_vote_cancels(self):
+        """重複投相同的票即取消"""
+        assert vote_change(True, True) == VoteChange(None, -1, 0)
+        assert vote_change(False, False) == VoteChange(None, 0, -1)
+
+    def test_switch_vote(self):
+        """改投相反的票，得分變化為 2"""
+        change = vote_change(False, True)
+        assert change == VoteChange(True, 1, -1)
+        assert change.score == 2
+        assert vote_change(True, False).score == -2
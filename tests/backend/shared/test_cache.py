@@ -0,0 +1,74 @@
+from src.backend.shared.cache import GenerationCounter, TTLCache, read_generations
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTTLCache:
+    """進程內 LRU+TTL 緩存測試"""
+
+    def test_entries_expire(self):
+        """條目超過 TTL 後失效"""
+        clock = FakeClock()
+        cache = TTLCache(maxsize=10, ttl=5, clock=clock)
+        cache.set("a", 1)
+        clock.now = 4.9
+        assert cache.get("a") == 1
+        clock.now = 5.0
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+    def test_least_recently_used_is_evicted(self):
+        """超出容量時淘汰最久未使用的條目"""
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+
+    def test_zero_size_disables_cache(self):
+        """容量為 0 時不緩存"""
+        cache = TTLCache(maxsize=0, ttl=60)
+        cache.set("a", 1)
+        assert cache.get("a") is None
+
+
+class TestGenerationCounter:
+    """版本計數器測試"""
+
+    def test_local_counter(self):
+        """未配置 Redis 時使用進程內計數"""
+        counter = GenerationCounter("local")
+        assert counter.current() == 0
+        assert counter.bump() == 1
+        assert counter.current() == 1
+
+    def test_redis_counter_is_shared(self, fake_redis):
+        """配置 Redis 時不同實例共享版本號"""
+        writer = GenerationCounter("shared", fake_redis)
+        reader = GenerationCounter("shared", fake_redis)
+        writer.bump()
+        writer.bump()
+        assert reader.current() == 2
+
+    def test_redis_failure_falls_back_to_local(self, fake_redis):
+        """Redis 不可用時退回進程內計數"""
+        counter = GenerationCounter("flaky", fake_redis)
+        fake_redis.down = True
+        assert counter.bump() == 1
+        assert counter.current() == 1
+
+    def test_read_generations_uses_one_round_trip(self, fake_redis):
+        """共用 Redis 客戶端的計數器合併讀取"""
+        first = GenerationCounter("first", fake_redis)
+        second = GenerationCounter("second", fake_redis)
+        second.bump()
+        assert read_generations([first, second]) == {"first": 0, "second": 1}
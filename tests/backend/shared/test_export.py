@@ -0,0 +1,58 @@
+import csv
+import io
+import json
+import uuid
+from datetime import datetime
+
+import pytest
+
+from src.backend.shared.export import iter_csv, iter_export, iter_ndjson
+
+COLUMNS = ["id", "title", "created_at", "closed_at"]
+TICKET_ID = uuid.UUID("00000000-0000-0000-0000-000000000001")
+CREATED_AT = datetime(2024, 1, 2, 3, 4, 5)
+
+
+def _rows(count):
+    return ((TICKET_ID, f"ticket, {i}", CREATED_AT, None) for i in range(count))
+
+
+class TestIterCsv:
+    """CSV 流式編碼測試"""
+
+    def test_header_and_values(self):
+        """首行為表頭，UUID 和時間轉為字符串，None 為空單元格"""
+        text = "".join(iter_csv(_rows(2), COLUMNS))
+        rows = list(csv.reader(io.StringIO(text)))
+        assert rows[0] == COLUMNS
+        assert rows[1] == [str(TICKET_ID), "ticket, 0", "2024-01-02T03:04:05", ""]
+        assert len(rows) == 3
+
+    def test_output_is_chunked(self):
+        """按批輸出，不在內存中累積全部行"""
+        chunks = list(iter_csv(_rows(5), COLUMNS, batch_size=2))
+        assert len(chunks) == 3
+
+    def test_empty_result_still_has_header(self):
+        """沒有數據時仍輸出表頭"""
+        assert "".join(iter_csv(iter(()), COLUMNS)) == "id,title,created_at,closed_at\r\n"
+
+
+class TestIterNdjson:
+    """NDJSON 流式編碼測試"""
+
+    def test_one_object_per_line(self):
+        """每行一個 JSON 對象"""
+        lines = "".join(iter_ndjson(_rows(3), COLUMNS, batch_size=2)).splitlines()
+        assert len(lines) == 3
+        assert json.loads(lines[0]) == {
+            "id": str(TICKET_ID),
+            "title": "ticket, 0",
+            "created_at": "2024-01-02T03:04:05",
+            "closed_at": None,
+        }
+
+    def test_unknown_format(self):
+        """不支持的格式拋出 ValueError"""
+        with pytest.raises(ValueError):
+            iter_export(_rows(1), COLUMNS, "xml")
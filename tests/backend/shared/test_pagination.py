@@ -0,0 +1,58 @@
+import uuid
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from src.backend.shared.pagination import (
+    InvalidCursorError,
+    decode_cursor,
+    encode_cursor,
+    next_cursor,
+)
+
+
+class TestCursorPagination:
+    """鍵集分頁游標測試"""
+
+    def test_encode_decode_roundtrip(self):
+        """測試游標編碼後可以還原"""
+        created_at = datetime(2024, 3, 1, 12, 30, 45, 123456)
+        record_id = uuid.uuid4()
+
+        cursor = encode_cursor(created_at, record_id)
+
+        assert "=" not in cursor
+        assert decode_cursor(cursor) == (created_at, record_id)
+
+    @pytest.mark.parametrize("cursor", ["", "not-a-cursor", "e30", "!!!"])
+    def test_decode_invalid_cursor(self, cursor):
+        """測試無效游標拋出異常"""
+        with pytest.raises(InvalidCursorError):
+            decode_cursor(cursor)
+
+    def test_next_cursor_full_page(self):
+        """測試滿頁時返回最後一條記錄的游標"""
+        items = [
+            SimpleNamespace(created_at=datetime(2024, 1, day), id=uuid.uuid4())
+            for day in (3, 2, 1)
+        ]
+
+        cursor = next_cursor(items, limit=3)
+
+        assert decode_cursor(cursor) == (items[-1].created_at, items[-1].id)
+
+    def test_next_cursor_last_page(self):
+        """測試不足一頁時沒有下一頁游標"""
+        items = [SimpleNamespace(created_at=datetime(2024, 1, 1), id=uuid.uuid4())]
+
+        assert next_cursor(items, limit=10) is None
+        assert next_cursor([], limit=10) is None
+
+    def test_next_cursor_from_mappings(self):
+        """測試記錄為字典時同樣生成游標"""
+        items = [{"created_at": datetime(2024, 1, 1), "id": uuid.uuid4()}]
+
+        cursor = next_cursor(items, limit=1)
+
+        assert decode_cursor(cursor) == (items[0]["created_at"], items[0]["id"])
@@ -0,0 +1,17 @@
+from anyio import to_thread
+
+from src.backend.shared.threadpool import configure_threadpool
+
+
+class TestThreadpool:
+    """線程池配置測試"""
+
+    async def test_configure_threadpool(self):
+        """設置默認線程池的容量"""
+        limiter = to_thread.current_default_thread_limiter()
+        original = limiter.total_tokens
+        try:
+            configure_threadpool(7)
+            assert limiter.total_tokens == 7
+        finally:
+            limiter.total_tokens = original
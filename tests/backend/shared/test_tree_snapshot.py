@@ -0,0 +1,74 @@
+from collections import namedtuple
+
+from src.backend.shared.tree_snapshot import TreeSnapshotCache, build_tree, etag_matches, make_etag
+
+Node = namedtuple("Node", ["id", "parent_id"])
+
+
+class TestBuildTree:
+    """樹結構組裝測試"""
+
+    def test_single_pass(self):
+        """扁平列表組裝為樹，子節點保持輸入順序"""
+        nodes = [Node(1, None), Node(3, 2), Node(4, 1), Node(2, 1)]
+        roots, children = build_tree(nodes, key=lambda n: n.id, parent=lambda n: n.parent_id)
+        assert [n.id for n in roots] == [1]
+        assert [n.id for n in children[1]] == [4, 2]
+        assert [n.id for n in children[2]] == [3]
+
+    def test_missing_parent_is_root(self):
+        """父節點不在列表中時視為頂級節點"""
+        roots, _ = build_tree([Node(2, 1)], key=lambda n: n.id, parent=lambda n: n.parent_id)
+        assert [n.id for n in roots] == [2]
+
+
+class TestEtag:
+    """ETag 生成和匹配測試"""
+
+    def test_same_body_same_etag(self):
+        """內容相同的快照 ETag 相同"""
+        assert make_etag(b"[]") == make_etag(b"[]")
+        assert make_etag(b"[]") != make_etag(b"[{}]")
+
+    def test_matches(self):
+        """支持列表、弱 ETag 和 *"""
+        etag = make_etag(b"[]")
+        assert etag_matches(etag, etag)
+        assert etag_matches(f'"other", W/{etag}', etag)
+        assert etag_matches("*", etag)
+        assert not etag_matches('"other"', etag)
+        assert not etag_matches(None, etag)
+
+
+class TestTreeSnapshotCache:
+    """樹結構快照測試"""
+
+    def test_built_once_per_generation(self):
+        """版本不變時重用快照，失效後重建"""
+        cache = TreeSnapshotCache("test", max_age=0)
+        builds = []
+
+        def build():
+            builds.append(1)
+            return f"[{len(builds)}]".encode()
+
+        first = cache.get(build)
+        assert cache.get(build) is first
+        cache.invalidate()
+        second = cache.get(build)
+        assert second.body == b"[2]"
+        assert second.etag != first.etag
+        assert len(builds) == 2
+
+    def test_max_age(self):
+        """超過最長保留時間後重建"""
+        cache = TreeSnapshotCache("test", max_age=1e-9)
+        builds = []
+
+        def build():
+            builds.append(1)
+            return b"[]"
+
+        cache.get(build)
+        cache.get(build)
+        assert len(builds) == 2
@@ -0,0 +1,164 @@
+import uuid
+
+from src.backend.ticket_api.services.reference_data import (
+    CompiledWorkflow,
+    PriorityInfo,
+    ReferenceData,
+    StatusInfo,
+    StepInfo,
+    TypeInfo,
+)
+from src.backend.ticket_api.services.reference_registry import ReferenceDataRegistry
+
+WORKFLOW_ID = uuid.UUID("00000000-0000-0000-0000-000000000001")
+OTHER_WORKFLOW_ID = uuid.UUID("00000000-0000-0000-0000-000000000002")
+DEPARTMENT_ID = uuid.UUID("00000000-0000-0000-0000-000000000003")
+COMPLETED_ID = uuid.UUID("00000000-0000-0000-0000-000000000004")
+
+
+def _steps(workflow_id, count):
+    return [
+        StepInfo(uuid.uuid4(), workflow_id, f"step {order}", order, order == count, DEPARTMENT_ID)
+        for order in range(1, count + 1)
+    ]
+
+
+def _reference_data():
+    steps = _steps(WORKFLOW_ID, 3) + _steps(OTHER_WORKFLOW_ID, 2)
+    return ReferenceData(
+        [TypeInfo(uuid.uuid4(), "Incident", WORKFLOW_ID)],
+        [StatusInfo(uuid.uuid4(), "Open"), StatusInfo(uuid.uuid4(), "Completed")],
+        [PriorityInfo(uuid.uuid4(), "High")],
+        steps,
+    ), steps
+
+
+class TestReferenceData:
+    """工單參考數據快照測試"""
+
+    def test_lookup_by_id_and_name(self):
+        """按 ID 和名稱（不區分大小寫）查找"""
+        refs, _ = _reference_data()
+        ticket_type = refs.type_by_name("incident")
+        assert refs.ticket_type(ticket_type.id) == ticket_type
+        assert refs.status_by_name("OPEN").name == "Open"
+        assert refs.priority_by_name("high").name == "High"
+        assert refs.ticket_type(uuid.uuid4()) is None
+
+    def test_steps_by_workflow_and_order(self):
+        """按 (workflow_id, order) 定位步驟，不跨工作流"""
+        refs, steps = _reference_data()
+        assert refs.first_step(WORKFLOW_ID) == steps[0]
+        assert refs.next_step(steps[0]) == steps[1]
+        assert refs.next_step(steps[2]) is None
+        assert refs.next_step(steps[4]) is None
+        assert refs.first_step(uuid.uuid4()) is None
+
+    def test_closed_and_completed_status(self):
+        """關閉狀態判斷和完成狀態 ID"""
+        refs, _ = _reference_data()
+        completed = refs.status_by_name("completed")
+        assert refs.completed_status_id() == completed.id
+        assert refs.is_closed_status(completed.id)
+        assert not refs.is_closed_status(refs.status_by_name("open").id)
+        assert not refs.is_closed_status(uuid.uuid4())
+
+    def test_missing_completed_status(self):
+        """沒有完成狀態時返回 None"""
+        assert ReferenceData([], [], [], []).completed_status_id() is None
+
+
+class TestCompiledWorkflow:
+    """編譯後的工作流狀態機測試"""
+
+    def test_transitions(self):
+        """審批通過後進入下一步，最終步驟切換到完成狀態"""
+        steps = _steps(WORKFLOW_ID, 3)
+        workflow = CompiledWorkflow(WORKFLOW_ID, reversed(steps), COMPLETED_ID)
+        assert workflow.first_step == steps[0]
+        first = workflow.advance(steps[0].id)
+        assert first.to_step == steps[1] and not first.completes
+        last = workflow.advance(steps[2].id)
+        assert last.to_step is None and last.completes and last.status_id == COMPLETED_ID
+        assert workflow.advance(uuid.uuid4()) is None
+
+    def test_final_flags_and_departments(self):
+        """預先計算最終步驟和負責部門"""
+        steps = _steps(WORKFLOW_ID, 2)
+        workflow = CompiledWorkflow(WORKFLOW_ID, steps, COMPLETED_ID)
+        assert workflow.final_steps == {steps[1].id}
+        assert workflow.department(steps[0].id) == DEPARTMENT_ID
+
+    def test_no_transition_without_completed_status(self):
+        """沒有完成狀態或最後一步不是最終步驟時不流轉"""
+        steps = _steps(WORKFLOW_ID, 2)
+        assert CompiledWorkflow(WORKFLOW_ID, steps).advance(steps[1].id) is None
+        open_ended = [steps[0], steps[1]._replace(is_final=False)]
+        assert CompiledWorkflow(WORKFLOW_ID, open_ended, COMPLETED_ID).advance(steps[1].id) is None
+
+    def test_reference_data_compiles_each_workflow(self):
+        """快照按工作流編譯，目標狀態取自完成狀態"""
+        refs, steps = _reference_data()
+        assert set(refs.workflows) == {WORKFLOW_ID, OTHER_WORKFLOW_ID}
+        completed_id = refs.completed_status_id()
+        assert refs.workflow(OTHER_WORKFLOW_ID).advance(steps[4].id).status_id == completed_id
+        assert refs.workflow(uuid.uuid4()) is None
+
+    def test_add_recompiles_workflow(self):
+        """加入新步驟後重新編譯所屬工作流，已有條目不被覆蓋"""
+        refs, steps = _reference_data()
+        added = StepInfo(uuid.uuid4(), WORKFLOW_ID, "step 4", 4, True, DEPARTMENT_ID)
+        refs.add("step", [added])
+        assert refs.next_step(steps[2]) == added
+        assert refs.workflow(WORKFLOW_ID).advance(added.id).completes
+
+        status = refs.status_by_name("open")
+        refs.add("status", [StatusInfo(status.id, "Renamed"), StatusInfo(uuid.uuid4(), "Pending")])
+        assert refs.status(status.id).name == "Open"
+        assert refs.status_by_name("pending") is not None
+
+    def test_added_completed_status_becomes_target(self):
+        """後加入的完成狀態成為最終步驟的目標狀態"""
+        steps = _steps(WORKFLOW_ID, 1)
+        refs = ReferenceData([], [], [], steps)
+        assert refs.workflow(WORKFLOW_ID).advance(steps[0].id) is None
+        refs.add("status", [StatusInfo(COMPLETED_ID, "completed")])
+        assert refs.workflow(WORKFLOW_ID).advance(steps[0].id).status_id == COMPLETED_ID
+
+    def test_replace_workflow_drops_deleted_step(self):
+        """按主庫步驟替換工作流後，已刪除的步驟不再參與流轉"""
+        refs, steps = _reference_data()
+        assert refs.workflow(WORKFLOW_ID).version is None
+        refs.replace_workflow(WORKFLOW_ID, [steps[0], steps[2]._replace(order=2)], "v2")
+        workflow = refs.workflow(WORKFLOW_ID)
+        assert workflow.version == "v2"
+        assert refs.step(steps[1].id) is None
+        assert workflow.advance(steps[0].id).to_step.id == steps[2].id
+        assert refs.workflow(OTHER_WORKFLOW_ID).step(steps[3].id) == steps[3]
+
+        refs.replace_workflow(WORKFLOW_ID, [], "v3")
+        assert refs.workflow(WORKFLOW_ID) is None
+        assert refs.workflow_versions[WORKFLOW_ID] == "v3"
+
+
+class FakeRedis:
+    def __init__(self):
+        self.values = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+
+class TestReferenceDataRegistry:
+    """參考數據快照註冊表測試"""
+
+    def test_shared_generation_skips_version_check(self):
+        """版本號通過 Redis 共享時，取工作流不訪問數據庫"""
+        registry = ReferenceDataRegistry(max_age=0, redis_client=FakeRedis())
+        refs, steps = _reference_data()
+        registry._snapshot, registry._snapshot_generation = refs, 0
+
+        # 傳入 None 作為會話，任何查詢都會失敗
+        workflow = registry.current_workflow(None, WORKFLOW_ID)
+        assert workflow.first_step == steps[0]
+        assert registry.current_workflow(None, uuid.uuid4()) is None
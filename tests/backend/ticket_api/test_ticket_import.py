@@ -0,0 +1,79 @@
+import io
+import json
+import uuid
+
+from src.backend.ticket_api.services.ticket_import import (
+    ImportReport,
+    ImportRowError,
+    detect_format,
+    parse_records,
+    validate_chunks,
+)
+
+
+def _record(**overrides):
+    record = {
+        "title": "Legacy ticket",
+        "description": "imported from the legacy system",
+        "creator_id": str(uuid.uuid4()),
+        "ticket_type_id": str(uuid.uuid4()),
+        "ticket_status_id": str(uuid.uuid4()),
+        "ticket_priority_id": str(uuid.uuid4()),
+    }
+    record.update(overrides)
+    return record
+
+
+class TestParseRecords:
+    """導入文件解析測試"""
+
+    def test_ndjson_skips_blank_lines_and_reports_bad_json(self):
+        """空行被跳過，格式錯誤的行按行號報告"""
+        stream = io.StringIO("\n".join([json.dumps(_record()), "", "{bad", "[1, 2]"]))
+        parsed = list(parse_records(stream, "ndjson"))
+        assert [(item.row, item.error is None) for item in parsed] == [(1, True), (3, False), (4, False)]
+
+    def test_csv_empty_cells_are_omitted(self):
+        """CSV 空單元格視為未提供"""
+        stream = io.StringIO("title,description,assignee_id\nHello,world wide web,\n")
+        parsed = list(parse_records(stream, "csv"))
+        assert parsed[0].row == 1
+        assert parsed[0].record == {"title": "Hello", "description": "world wide web"}
+
+    def test_detect_format(self):
+        """根據擴展名或內容類型推斷格式"""
+        assert detect_format("tickets.CSV") == "csv"
+        assert detect_format("tickets.jsonl") == "ndjson"
+        assert detect_format("upload", "application/x-ndjson") == "ndjson"
+        assert detect_format("tickets.txt") is None
+
+
+class TestValidateChunks:
+    """分塊驗證測試"""
+
+    def test_invalid_rows_do_not_abort_chunk(self):
+        """無效行記入錯誤，其餘行繼續驗證"""
+        lines = [json.dumps(_record()), json.dumps(_record(title="x")), "{bad", json.dumps(_record())]
+        chunks = list(validate_chunks(parse_records(io.StringIO("\n".join(lines)), "ndjson"), chunk_size=3))
+
+        assert len(chunks) == 2
+        valid, errors = chunks[0]
+        assert [row for row, _ in valid] == [1]
+        assert [error.row for error in errors] == [2, 3]
+        assert errors[0].error.startswith("title:")
+        assert [row for row, _ in chunks[1][0]] == [4]
+
+
+class TestImportReport:
+    """導入報告測試"""
+
+    def test_errors_are_capped_but_counted(self):
+        """錯誤明細超過上限時只保留前若干條，失敗數仍完整統計"""
+        report = ImportReport(max_errors=2)
+        report.add_errors(ImportRowError(row, "bad") for row in (5, 1, 3))
+        report.imported = 7
+
+        result = report.to_dict()
+        assert result["failed"] == 3
+        assert result["errors"] == [{"row": 1, "error": "bad"}, {"row": 5, "error": "bad"}]
+        assert result["errors_truncated"] is True
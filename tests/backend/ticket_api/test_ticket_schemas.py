@@ -0,0 +1,29 @@
+import uuid
+
+import pytest
+from pydantic import ValidationError
+
+from src.backend.ticket_api.schemas.ticket import TicketBulkUpdate
+
+
+class TestTicketBulkUpdate:
+    """批量更新請求驗證測試"""
+
+    def test_requires_ids_or_filters(self):
+        """沒有 ID 列表和篩選條件時拒絕，避免誤更新全部工單"""
+        with pytest.raises(ValidationError):
+            TicketBulkUpdate(patch={"title": "Reassigned"})
+        with pytest.raises(ValidationError):
+            TicketBulkUpdate(patch={"title": "Reassigned"}, filters={})
+
+    def test_requires_non_empty_patch(self):
+        """補丁至少包含一個字段"""
+        with pytest.raises(ValidationError):
+            TicketBulkUpdate(patch={}, ticket_ids=[str(uuid.uuid4())])
+
+    def test_accepts_filters(self):
+        """篩選條件與列表參數一致"""
+        assignee_id = uuid.uuid4()
+        request = TicketBulkUpdate(patch={"assignee_id": str(assignee_id)}, filters={"search": "vpn"})
+        assert request.patch.dict(exclude_unset=True) == {"assignee_id": assignee_id}
+        assert request.ticket_ids is None
@@ -0,0 +1,326 @@
+import io
+import os
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from starlette.datastructures import Headers, UploadFile
+
+from src.database.db import Base
+from src.backend.ticket_api.models.ticket import (
+    Ticket,
+    TicketAttachment,
+    TicketComment,
+    TicketHistory,
+    TicketPriority,
+    TicketStatus,
+    TicketType,
+    User,
+    Workflow,
+    WorkflowApproval,
+    WorkflowStep,
+)
+from src.backend.ticket_api.schemas.ticket import (
+    TicketCommentCreate,
+    TicketCreate,
+    TicketUpdate,
+    WorkflowApprovalCreate,
+)
+from src.backend.ticket_api.services.reference_registry import ReferenceDataRegistry
+from src.backend.ticket_api.services.ticket_service import TicketService
+
+TABLES = (
+    "departments", "users", "workflows", "workflow_steps", "ticket_types", "ticket_statuses",
+    "ticket_priorities", "tickets", "ticket_attachments", "ticket_comments", "ticket_history",
+    "workflow_approvals",
+)
+
+
+@compiles(TSVECTOR, "sqlite")
+def _compile_tsvector(type_, compiler, **kw):
+    return "TEXT"
+
+
+@compiles(JSONB, "sqlite")
+def _compile_jsonb(type_, compiler, **kw):
+    return "JSON"
+
+
+@pytest.fixture
+def ticket_db():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    tables = [Base.metadata.tables[name] for name in TABLES]
+    Base.metadata.create_all(engine, tables=tables)
+    session = sessionmaker(bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(engine, tables=tables)
+
+
+@pytest.fixture
+def seed(ticket_db):
+    """一個兩步工作流及其工單類型、狀態和優先級"""
+    user = User(username="agent", email="agent@example.com", full_name="客服", password_hash="x", role="user")
+    workflow = Workflow(name="事件處理")
+    ticket_db.add_all([user, workflow])
+    ticket_db.flush()
+    first = WorkflowStep(workflow_id=workflow.id, name="受理", order=1)
+    final = WorkflowStep(workflow_id=workflow.id, name="審核", order=2, is_final=True)
+    ticket_type = TicketType(name="Incident", workflow_id=workflow.id)
+    opened = TicketStatus(name="Open", color="green", order=1)
+    closed = TicketStatus(name="Closed", color="grey", order=2)
+    completed = TicketStatus(name="Completed", color="blue", order=3)
+    priority = TicketPriority(name="High", color="red", order=1)
+    ticket_db.add_all([first, final, ticket_type, opened, closed, completed, priority])
+    ticket_db.commit()
+    return SimpleNamespace(user=user, first=first, final=final, ticket_type=ticket_type, opened=opened,
+                           closed=closed, completed=completed, priority=priority)
+
+
+@pytest.fixture
+def service(ticket_db, tmp_path, monkeypatch):
+    # 附件上傳到臨時目錄
+    monkeypatch.chdir(tmp_path)
+    return TicketService(ticket_db, reference_data=ReferenceDataRegistry(max_age=0))
+
+
+@contextmanager
+def failing_history():
+    """插入歷史記錄時拋出異常，模擬提交中途失敗"""
+    def fail(mapper, connection, target):
+        raise RuntimeError("history insert failed")
+
+    event.listen(TicketHistory, "before_insert", fail)
+    try:
+        with pytest.raises(RuntimeError):
+            yield
+    finally:
+        event.remove(TicketHistory, "before_insert", fail)
+
+
+def _ticket_create(seed, **overrides):
+    data = dict(
+        title="印表機無法列印",
+        description="三樓印表機顯示卡紙但找不到紙張",
+        creator_id=seed.user.id,
+        ticket_type_id=seed.ticket_type.id,
+        ticket_status_id=seed.opened.id,
+        ticket_priority_id=seed.priority.id,
+    )
+    data.update(overrides)
+    return TicketCreate(**data)
+
+
+def _upload():
+    return UploadFile(io.BytesIO(b"error log"), filename="error.log",
+                      headers=Headers({"content-type": "text/plain"}))
+
+
+def _actions(db):
+    return sorted(action for action, in db.query(TicketHistory.action))
+
+
+class TestTicketTransactions:
+    """工單寫入與歷史記錄的事務測試"""
+
+    def test_create_ticket_commits_history(self, ticket_db, seed, service):
+        """工單和創建歷史一起提交，工單從工作流第一步開始"""
+        ticket = service.create_ticket(_ticket_create(seed))
+        ticket_db.rollback()
+
+        assert ticket_db.get(Ticket, ticket.id).current_workflow_step_id == seed.first.id
+        assert _actions(ticket_db) == ["created"]
+
+    def test_create_ticket_rolls_back_with_history(self, ticket_db, seed, service):
+        """歷史記錄寫入失敗時工單也不會保存"""
+        with failing_history():
+            service.create_ticket(_ticket_create(seed))
+        ticket_db.rollback()
+
+        assert ticket_db.query(Ticket).count() == 0
+        assert ticket_db.query(TicketHistory).count() == 0
+
+    def test_update_ticket_commits_history(self, ticket_db, seed, service):
+        """修改和更新歷史一起提交，切換到關閉狀態時記錄關閉時間"""
+        ticket = service.create_ticket(_ticket_create(seed))
+        service.update_ticket(ticket.id, TicketUpdate(title="印表機已修復"))
+        ticket_db.rollback()
+
+        assert ticket_db.get(Ticket, ticket.id).title == "印表機已修復"
+        assert _actions(ticket_db) == ["created", "updated"]
+
+        service.update_ticket(ticket.id, TicketUpdate(ticket_status_id=seed.closed.id))
+        assert ticket_db.get(Ticket, ticket.id).closed_at is not None
+
+    def test_update_ticket_rolls_back_with_history(self, ticket_db, seed, service):
+        """歷史記錄寫入失敗時修改也不會保存"""
+        ticket = service.create_ticket(_ticket_create(seed))
+
+        with failing_history():
+            service.update_ticket(ticket.id, TicketUpdate(title="印表機已修復"))
+        ticket_db.rollback()
+
+        assert ticket_db.get(Ticket, ticket.id).title == "印表機無法列印"
+        assert _actions(ticket_db) == ["created"]
+
+    def test_add_comment_commits_history(self, ticket_db, seed, service):
+        """評論和評論歷史一起提交"""
+        ticket = service.create_ticket(_ticket_create(seed))
+        comment = service.add_comment(ticket.id, TicketCommentCreate(
+            ticket_id=ticket.id, user_id=seed.user.id, content="已派人處理"))
+        ticket_db.rollback()
+
+        history = ticket_db.query(TicketHistory).filter(TicketHistory.action == "commented").one()
+        assert history.changes == {"comment_id": str(comment.id)}
+        assert ticket_db.query(TicketComment).count() == 1
+
+    def test_add_comment_rolls_back_with_history(self, ticket_db, seed, service):
+        """歷史記錄寫入失敗時評論也不會保存"""
+        ticket = service.create_ticket(_ticket_create(seed))
+
+        with failing_history():
+            service.add_comment(ticket.id, TicketCommentCreate(
+                ticket_id=ticket.id, user_id=seed.user.id, content="已派人處理"))
+        ticket_db.rollback()
+
+        assert ticket_db.query(TicketComment).count() == 0
+        assert _actions(ticket_db) == ["created"]
+
+    def test_add_attachment_commits_history(self, ticket_db, seed, service):
+        """附件記錄和附件歷史一起提交，文件保存在上傳目錄"""
+        ticket = service.create_ticket(_ticket_create(seed))
+        attachment = service.add_attachment(ticket.id, seed.user.id, _upload())
+        ticket_db.rollback()
+
+        assert ticket_db.get(TicketAttachment, attachment.id).file_size == len(b"error log")
+        assert _actions(ticket_db) == ["attached_file", "created"]
+        assert len(os.listdir(service.upload_dir)) == 1
+
+    def test_add_attachment_failure_removes_file(self, ticket_db, seed, service):
+        """歷史記錄寫入失敗時附件記錄回滾，已保存的文件被刪除"""
+        ticket = service.create_ticket(_ticket_create(seed))
+
+        with failing_history():
+            service.add_attachment(ticket.id, seed.user.id, _upload())
+
+        assert ticket_db.query(TicketAttachment).count() == 0
+        assert _actions(ticket_db) == ["created"]
+        assert os.listdir(service.upload_dir) == []
+
+
+def _approve(service, ticket, step, is_approved=True):
+    return service.submit_approval(ticket.id, WorkflowApprovalCreate(
+        ticket_id=ticket.id, workflow_step_id=step.id, approver_id=ticket.creator_id, is_approved=is_approved))
+
+
+class TestSubmitApproval:
+    """工作流審批提交測試"""
+
+    def test_approval_advances_to_next_step(self, ticket_db, seed, service):
+        """通過當前步驟的審批把工單推進到下一步"""
+        ticket = service.create_ticket(_ticket_create(seed))
+        approval = _approve(service, ticket, seed.first)
+        ticket_db.rollback()
+
+        assert ticket_db.get(WorkflowApproval, approval.id).is_approved
+        ticket = ticket_db.get(Ticket, ticket.id)
+        assert ticket.current_workflow_step_id == seed.final.id
+        assert ticket.closed_at is None
+        assert _actions(ticket_db) == ["approval_submitted", "created", "workflow_advanced"]
+
+    def test_final_approval_completes_ticket(self, ticket_db, seed, service):
+        """通過最終步驟的審批把工單標記為已完成"""
+        ticket = service.create_ticket(_ticket_create(seed))
+        _approve(service, ticket, seed.first)
+        _approve(service, ticket, seed.final)
+        ticket_db.rollback()
+
+        ticket = ticket_db.get(Ticket, ticket.id)
+        assert ticket.ticket_status_id == seed.completed.id
+        assert ticket.closed_at is not None
+        completed = ticket_db.query(TicketHistory).filter(TicketHistory.action == "workflow_completed").one()
+        assert completed.changes == {"final_step_id": str(seed.final.id), "final_step_name": "審核"}
+
+    def test_rejected_approval_keeps_step(self, ticket_db, seed, service):
+        """駁回的審批只記錄審批歷史，不流轉"""
+        ticket = service.create_ticket(_ticket_create(seed))
+        _approve(service, ticket, seed.first, is_approved=False)
+        ticket_db.rollback()
+
+        ticket = ticket_db.get(Ticket, ticket.id)
+        assert ticket.current_workflow_step_id == seed.first.id
+        assert ticket.ticket_status_id == seed.opened.id
+        assert _actions(ticket_db) == ["approval_submitted", "created"]
+
+    def test_history_order_within_approval(self, ticket_db, seed, service):
+        """同一次審批的歷史記錄按 (created_at, id) 倒序時，審批記錄排在流轉記錄之前"""
+        ticket = service.create_ticket(_ticket_create(seed))
+        _approve(service, ticket, seed.first)
+        _approve(service, ticket, seed.final)
+
+        actions = [item["action"] for item in service.get_history(ticket.id) if item["action"] != "created"]
+        assert actions == ["approval_submitted", "workflow_completed", "approval_submitted", "workflow_advanced"]
+
+
+class TestBulkUpdateTickets:
+    """批量更新工單測試"""
+
+    def test_update_by_ids_and_filters(self, ticket_db, seed, service):
+        """按 ID 列表或篩選條件選中工單，返回實際更新的 ID"""
+        low = TicketPriority(name="Low", color="grey", order=2)
+        ticket_db.add(low)
+        ticket_db.commit()
+        tickets = [service.create_ticket(_ticket_create(seed)) for _ in range(3)]
+        ids = [ticket.id for ticket in tickets]
+
+        updated = service.bulk_update_tickets(TicketUpdate(ticket_priority_id=low.id), ticket_ids=ids[:2])
+        assert sorted(updated) == sorted(ids[:2])
+
+        updated = service.bulk_update_tickets(TicketUpdate(title="已批量處理"),
+                                              filters={"priority_id": low.id})
+        assert sorted(updated) == sorted(ids[:2])
+        ticket_db.expire_all()
+        assert [ticket_db.get(Ticket, ticket_id).title for ticket_id in ids] == ["已批量處理"] * 2 + ["印表機無法列印"]
+
+    def test_unchanged_tickets_are_skipped(self, ticket_db, seed, service):
+        """與補丁完全相同的工單不更新，也不記錄歷史"""
+        same = service.create_ticket(_ticket_create(seed, title="已批量處理"))
+        other = service.create_ticket(_ticket_create(seed))
+
+        updated = service.bulk_update_tickets(TicketUpdate(title="已批量處理"), ticket_ids=[same.id, other.id])
+        assert updated == [other.id]
+        assert _actions(ticket_db) == ["created", "created", "updated"]
+
+    def test_closed_status_sets_closed_at(self, ticket_db, seed, service):
+        """切換到關閉狀態時記錄關閉時間"""
+        ticket = service.create_ticket(_ticket_create(seed))
+        service.bulk_update_tickets(TicketUpdate(ticket_status_id=seed.closed.id), ticket_ids=[ticket.id])
+        ticket_db.expire_all()
+
+        ticket = ticket_db.get(Ticket, ticket.id)
+        assert ticket.ticket_status_id == seed.closed.id
+        assert ticket.closed_at is not None
+
+    def test_history_records_changed_fields(self, ticket_db, seed, service):
+        """每張更新的工單一條歷史，old 只包含實際變化的字段"""
+        same_title = service.create_ticket(_ticket_create(seed, title="已批量處理"))
+        other = service.create_ticket(_ticket_create(seed))
+        patch = TicketUpdate(title="已批量處理", ticket_status_id=seed.closed.id)
+        service.bulk_update_tickets(patch, ticket_ids=[same_title.id, other.id], updated_by=seed.user.id)
+
+        history = {
+            item.ticket_id: item.changes
+            for item in ticket_db.query(TicketHistory).filter(TicketHistory.action == "updated")
+        }
+        new = {"title": "已批量處理", "ticket_status_id": str(seed.closed.id)}
+        assert history == {
+            same_title.id: {"old": {"ticket_status_id": str(seed.opened.id)}, "new": new},
+            other.id: {"old": {"title": "印表機無法列印", "ticket_status_id": str(seed.opened.id)}, "new": new},
+        }
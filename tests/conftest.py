@@ -1,21 +1,25 @@
 import os
 import sys
+import uuid
 from pathlib import Path
 
-# 添加項目根目錄到Python路徑
-project_root = Path(__file__).parent.parent
-sys.path.insert(0, str(project_root))
-
 import pytest
+import redis
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
-from src.database.db import Base, get_db
-from src.backend.ticket_api.main import app as ticket_app
-from src.backend.knowledge_api.main import app as knowledge_app
-from src.utils.security import get_password_hash
+# 添加項目根目錄到Python路徑
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+# 模型通過 database.* 導入，需要 src 目錄也在路徑中
+sys.path.insert(0, str(project_root / "src"))
+
+from src.database.db import Base, get_db  # noqa: E402
+from src.backend.ticket_api.main import app as ticket_app  # noqa: E402
+from src.backend.knowledge_api.main import app as knowledge_app  # noqa: E402
+from src.utils.security import get_password_hash  # noqa: E402
 
 # 使用內存數據庫進行測試
 SQLITE_DATABASE_URL = "sqlite:///:memory:"
@@ -101,6 +105,7 @@ def create_test_data(db_session):
     from src.backend.ticket_api.models.user import User
     from src.backend.ticket_api.models.workflow import Workflow, WorkflowStep
     from src.backend.knowledge_api.models.category import Category
+    from src.backend.knowledge_api.services.category_tree import category_path
     
     # 創建測試部門
     test_dept = Department(name="測試部門", description="用於測試的部門")
@@ -131,7 +136,13 @@ def create_test_data(db_session):
     db_session.add_all(steps)
     
     # 創建測試分類
-    test_category = Category(name="測試分類", description="用於測試的分類")
+    test_category_id = uuid.uuid4()
+    test_category = Category(
+        id=test_category_id,
+        name="測試分類",
+        description="用於測試的分類",
+        path=category_path(None, test_category_id),
+    )
     db_session.add(test_category)
     
     # 提交所有更改
@@ -165,4 +176,44 @@ def auth_headers(db_session, create_test_data):
     access_token = create_access_token(token_data)
     
     # 返回帶有認證令牌的請求頭
-    return {"Authorization": f"Bearer {access_token}"}
\ No newline at end of file
+    return {"Authorization": f"Bearer {access_token}"}
+
+
+class FakeRedis:
+    """
+    測試用的進程內 Redis 替身，只實現緩存用到的命令
+    """
+
+    def __init__(self):
+        self.data = {}
+        self.down = False
+
+    def _check(self):
+        if self.down:
+            raise redis.ConnectionError("redis is down")
+
+    def get(self, key):
+        self._check()
+        return self.data.get(key)
+
+    def mget(self, keys):
+        self._check()
+        return [self.data.get(key) for key in keys]
+
+    def set(self, key, value, ex=None):
+        self._check()
+        self.data[key] = value.encode("utf-8") if isinstance(value, str) else value
+
+    def incr(self, key):
+        self._check()
+        value = int(self.data.get(key, 0)) + 1
+        self.data[key] = str(value).encode("ascii")
+        return value
+
+
+@pytest.fixture(scope="function")
+def fake_redis():
+    """
+    創建進程內 Redis 替身
+    """
+    return FakeRedis()
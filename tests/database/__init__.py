@@ -0,0 +1,5 @@
+"""
+Database Layer Tests
+
+數據庫層測試，包含引擎、會話和查詢輔助工具的測試
+"""
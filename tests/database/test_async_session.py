@@ -0,0 +1,14 @@
+from src.database.async_session import to_async_url
+
+
+class TestAsyncSession:
+    """異步引擎配置測試"""
+
+    def test_postgres_url_uses_asyncpg(self):
+        """PostgreSQL 連接串切換為 asyncpg 驅動"""
+        assert to_async_url("postgresql://user:secret@db:5432/app") == "postgresql+asyncpg://user:secret@db:5432/app"
+        assert to_async_url("postgresql+psycopg2://user:secret@db/app") == "postgresql+asyncpg://user:secret@db/app"
+
+    def test_other_urls_are_unchanged(self):
+        """非 PostgreSQL 連接串保持不變"""
+        assert to_async_url("sqlite+aiosqlite:///./test.db") == "sqlite+aiosqlite:///./test.db"
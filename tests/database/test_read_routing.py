@@ -0,0 +1,134 @@
+import pytest
+from sqlalchemy import Column, Integer, String, create_engine, text, update
+from sqlalchemy.orm import declarative_base, sessionmaker
+
+from src.database.read_routing import ReadOnlySessionError, ReadWriteRouter, RecentWriteTracker, client_key
+
+Base = declarative_base()
+
+
+class Note(Base):
+    __tablename__ = "notes"
+
+    id = Column(Integer, primary_key=True)
+    body = Column(String(50))
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeRequest:
+    def __init__(self, headers=None, host="10.0.0.1"):
+        self.headers = headers or {}
+        self.client = type("Client", (), {"host": host})() if host else None
+
+
+class TestReadWriteRouter:
+    """讀寫會話路由測試"""
+
+    @pytest.fixture
+    def setup(self, tmp_path):
+        primary_engine = create_engine(f"sqlite:///{tmp_path / 'primary.db'}")
+        replica_engine = create_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+        for engine in (primary_engine, replica_engine):
+            Base.metadata.create_all(engine)
+        clock = FakeClock()
+        router = ReadWriteRouter(
+            sessionmaker(bind=primary_engine),
+            sessionmaker(bind=replica_engine),
+            RecentWriteTracker(window=5, clock=clock),
+        )
+        return router, clock, primary_engine, replica_engine
+
+    def _bound_engine(self, session):
+        return session.get_bind()
+
+    def test_reads_use_replica(self, setup):
+        """沒有寫入記錄的客戶端讀取副本"""
+        router, _, _, replica_engine = setup
+        with router.read_session("alice") as session:
+            assert self._bound_engine(session) is replica_engine
+
+    def test_reads_after_own_write_are_pinned_to_primary(self, setup):
+        """客戶端寫入後的窗口期內讀取主庫，其他客戶端仍讀取副本"""
+        router, clock, primary_engine, replica_engine = setup
+        with router.write_session("alice") as session:
+            session.add(Note(id=1, body="draft"))
+            session.commit()
+
+        with router.read_session("alice") as session:
+            assert self._bound_engine(session) is primary_engine
+            assert session.get(Note, 1).body == "draft"
+        with router.read_session("bob") as session:
+            assert self._bound_engine(session) is replica_engine
+
+        clock.now += 5
+        with router.read_session("alice") as session:
+            assert self._bound_engine(session) is replica_engine
+
+    def test_bulk_update_counts_as_write(self, setup):
+        """批量更新語句同樣開啟寫入窗口"""
+        router, _, primary_engine, _ = setup
+        with router.write_session("alice") as session:
+            session.execute(update(Note).values(body="x"))
+            session.commit()
+        with router.read_session("alice") as session:
+            assert self._bound_engine(session) is primary_engine
+
+    def test_read_only_commit_does_not_pin(self, setup):
+        """沒有實際寫入的提交不影響路由"""
+        router, _, _, replica_engine = setup
+        with router.write_session("alice") as session:
+            session.execute(text("SELECT 1"))
+            session.commit()
+        with router.read_session("alice") as session:
+            assert self._bound_engine(session) is replica_engine
+
+    def test_rolled_back_write_does_not_pin(self, setup):
+        """回滾的寫入不影響路由"""
+        router, _, _, replica_engine = setup
+        with router.write_session("alice") as session:
+            session.add(Note(id=2, body="discarded"))
+            session.flush()
+            session.rollback()
+            session.commit()
+        with router.read_session("alice") as session:
+            assert self._bound_engine(session) is replica_engine
+
+    def test_replica_session_rejects_writes(self, setup):
+        """副本會話不能寫入"""
+        router, _, _, _ = setup
+        with router.read_session("bob") as session:
+            session.add(Note(id=3, body="oops"))
+            with pytest.raises(ReadOnlySessionError):
+                session.flush()
+
+    def test_without_replica_reads_use_primary(self, tmp_path):
+        """未配置副本時讀寫共用主庫"""
+        factory = sessionmaker(bind=create_engine(f"sqlite:///{tmp_path / 'only.db'}"))
+        router = ReadWriteRouter(factory, factory, RecentWriteTracker(window=5))
+        assert not router.has_replica
+        with router.read_session("alice") as session:
+            assert session.info["client_key"] == "alice"
+
+
+class TestClientKey:
+    """客戶端識別測試"""
+
+    def test_authorization_header_takes_precedence(self):
+        """優先按 Authorization 頭識別，不保存原始令牌"""
+        key = client_key(FakeRequest({"authorization": "Bearer secret"}))
+        assert key.startswith("auth:")
+        assert "secret" not in key
+        assert key == client_key(FakeRequest({"authorization": "Bearer secret"}, host="10.0.0.2"))
+
+    def test_falls_back_to_client_host(self):
+        """沒有 Authorization 頭時按客戶端地址識別"""
+        assert client_key(FakeRequest()) == "host:10.0.0.1"
+        assert client_key(FakeRequest(host=None)) is None
+        assert client_key(None) is None
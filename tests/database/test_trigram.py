@@ -0,0 +1,57 @@
+from sqlalchemy import Column, Integer, MetaData, String, Table, create_engine, insert, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateIndex
+
+from src.database.trigram import contains_any, escape_like, trigram_index
+
+
+class TestContainsAny:
+    """子串篩選條件測試"""
+
+    def setup_method(self):
+        metadata = MetaData()
+        self.items = Table(
+            "items",
+            metadata,
+            Column("id", Integer, primary_key=True),
+            Column("title", String(50)),
+            Column("note", String(50)),
+            trigram_index("ix_items_title_trgm", "title"),
+        )
+        self.engine = create_engine("sqlite://")
+        metadata.create_all(self.engine)
+        with self.engine.begin() as conn:
+            conn.execute(insert(self.items), [
+                {"id": 1, "title": "VPN Setup", "note": None},
+                {"id": 2, "title": "Printer", "note": "50% off"},
+                {"id": 3, "title": "Printer", "note": "500 offers"},
+                {"id": 4, "title": "snake_case", "note": None},
+            ])
+
+    def _match(self, term):
+        query = select(self.items.c.id).where(contains_any([self.items.c.title, self.items.c.note], term))
+        with self.engine.connect() as conn:
+            return sorted(conn.execute(query).scalars())
+
+    def test_case_insensitive_match_on_any_column(self):
+        """任一列包含關鍵詞即匹配，不區分大小寫"""
+        assert self._match("vpn") == [1]
+        assert self._match("PRINT") == [2, 3]
+
+    def test_wildcards_are_literal(self):
+        """% 和 _ 按字面匹配"""
+        assert self._match("50%") == [2]
+        assert self._match("e_c") == [4]
+        assert self._match("_") == [4]
+
+    def test_escape_like(self):
+        """轉義通配符和轉義字符本身"""
+        assert escape_like("a%b_c\\d") == "a\\%b\\_c\\\\d"
+
+    def test_trigram_index_is_postgres_only(self):
+        """GIN 索引只在 PostgreSQL 上創建，SQLite 上跳過"""
+        index = next(iter(self.items.indexes))
+        assert "USING gin (title gin_trgm_ops)" in str(CreateIndex(index).compile(dialect=postgresql.dialect()))
+        with self.engine.connect() as conn:
+            names = conn.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'index'").scalars().all()
+        assert "ix_items_title_trgm" not in names
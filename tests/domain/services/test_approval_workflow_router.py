@@ -0,0 +1,117 @@
+import random
+import uuid
+
+from src.domain.entities.document import Document
+from src.domain.entities.document_approval_step import DocumentApprovalStep
+from src.domain.entities.document_approval_workflow import DocumentApprovalWorkflow
+from src.domain.services.approval_workflow_router import ApprovalWorkflowRouter
+from src.domain.value_objects.approver_type import ApproverType
+
+CATEGORIES = [uuid.uuid4() for _ in range(3)]
+CREATORS = [uuid.uuid4() for _ in range(3)]
+TAGS = [uuid.uuid4() for _ in range(4)]
+
+
+def _workflow(category_criteria=None, tag_criteria=None, creator_criteria=None):
+    workflow = DocumentApprovalWorkflow.create(
+        name="測試工作流",
+        description="描述",
+        category_criteria=category_criteria,
+        tag_criteria=tag_criteria,
+        creator_criteria=creator_criteria
+    )
+    workflow.add_step(DocumentApprovalStep.create(
+        workflow_id=workflow.id,
+        name="第一步",
+        description="第一個審批步驟",
+        order=1,
+        approver_type=ApproverType.INDIVIDUAL,
+        approver_criteria={"user_ids": [str(uuid.uuid4())]}
+    ))
+    return workflow
+
+
+def _document(category_id=CATEGORIES[0], creator_id=CREATORS[0], tags=()):
+    return Document.create(
+        title="測試文檔",
+        content="內容",
+        category_id=category_id,
+        creator_id=creator_id,
+        tags=list(tags)
+    )
+
+
+class TestApprovalWorkflowRouter:
+    """審批工作流路由索引測試"""
+
+    def test_routes_by_category_tag_and_creator(self):
+        """按三個維度的條件選出適用的工作流，按加入順序返回"""
+        by_category = _workflow(category_criteria={"equals": str(CATEGORIES[0])})
+        by_tags = _workflow(tag_criteria={"contains_all": [str(TAGS[0]), str(TAGS[1])]})
+        by_creator = _workflow(creator_criteria={"in": [str(CREATORS[1]), str(CREATORS[2])]})
+        router = ApprovalWorkflowRouter([by_category, by_tags, by_creator])
+
+        assert router.route(_document(tags=[TAGS[0], TAGS[1]])) == [by_category, by_tags]
+        assert router.route(_document(CATEGORIES[1], CREATORS[2], [TAGS[0]])) == [by_creator]
+        assert router.first(_document(CATEGORIES[1])) is None
+
+    def test_incremental_reindex_on_events(self):
+        """條件更新、停用和啟用事件觸發增量重建"""
+        workflow = _workflow(category_criteria={"equals": str(CATEGORIES[0])})
+        router = ApprovalWorkflowRouter([workflow])
+        workflow.get_events()
+
+        workflow.update_criteria(category_criteria={"equals": str(CATEGORIES[1])})
+        for event in workflow.get_events():
+            router.handle(event)
+        assert router.route(_document(CATEGORIES[0])) == []
+        assert router.route(_document(CATEGORIES[1])) == [workflow]
+
+        workflow.deactivate()
+        for event in workflow.get_events():
+            router.handle(event)
+        assert len(router) == 0
+        assert router.route(_document(CATEGORIES[1])) == []
+
+        workflow.activate()
+        for event in workflow.get_events():
+            router.handle(event)
+        assert router.route(_document(CATEGORIES[1])) == [workflow]
+
+    def test_unparseable_tags_never_match(self):
+        """無法解析的標籤不會命中"""
+        router = ApprovalWorkflowRouter([
+            _workflow(tag_criteria={"contains_any": ["urgent"]}),
+            _workflow(tag_criteria={"contains_all": [str(TAGS[0]), "urgent"]}),
+        ])
+        assert router.route(_document(tags=TAGS)) == []
+
+    def test_matches_entity_criteria(self):
+        """與逐個調用 get_applicable_documents 的結果一致"""
+        rng = random.Random(7)
+
+        def value_criteria(values):
+            return rng.choice([
+                None,
+                {},
+                {"equals": str(rng.choice(values))},
+                {"in": [str(value) for value in rng.sample(values, 2)]},
+            ])
+
+        def tag_criteria():
+            return rng.choice([
+                None,
+                {"contains_any": [str(tag) for tag in rng.sample(TAGS, rng.randint(0, 2))]},
+                {"contains_all": [str(tag) for tag in rng.sample(TAGS, rng.randint(0, 2))]},
+            ])
+
+        workflows = [
+            _workflow(value_criteria(CATEGORIES), tag_criteria(), value_criteria(CREATORS))
+            for _ in range(40)
+        ]
+        router = ApprovalWorkflowRouter(workflows)
+
+        for _ in range(100):
+            document = _document(rng.choice(CATEGORIES), rng.choice(CREATORS), rng.sample(TAGS, rng.randint(0, 3)))
+            expected = [workflow for workflow in workflows if workflow.get_applicable_documents(document)]
+            assert router.route(document) == expected
@@ -0,0 +1,5 @@
+"""
+Infrastructure Layer Tests
+
+基礎設施層測試，包含計數緩衝等具體實現的測試
+"""
@@ -0,0 +1,75 @@
+import threading
+import uuid
+
+from src.infrastructure.counters.view_count_flusher import ViewCountFlusher, flush_view_counts
+from src.infrastructure.counters.view_counter_impl import InMemoryViewCounter
+
+DOCUMENT = uuid.UUID("00000000-0000-0000-0000-00000000000a")
+
+
+class FailingSession:
+    """執行語句即失敗的會話"""
+
+    def execute(self, statement):
+        raise RuntimeError("database unavailable")
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class FailingDrainCounter(InMemoryViewCounter):
+    """取出增量即失敗的緩衝區，記錄被調用的次數"""
+
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+        self.called = threading.Event()
+
+    def drain(self):
+        self.calls += 1
+        if self.calls >= 2:
+            self.called.set()
+        raise RuntimeError("redis unavailable")
+
+
+class TestFlushViewCounts:
+    """瀏覽計數寫回測試"""
+
+    def test_failed_write_restores_increments(self):
+        """寫回失敗時增量放回緩衝區"""
+        counter = InMemoryViewCounter()
+        counter.increment("document", DOCUMENT, 3)
+        assert flush_view_counts(counter, FailingSession) == 0
+        assert counter.drain() == {"document": {DOCUMENT: 3}}
+
+    def test_failed_drain_does_not_raise(self):
+        """取出增量失敗時不拋出異常"""
+        assert flush_view_counts(FailingDrainCounter(), FailingSession) == 0
+
+    def test_failed_restore_does_not_raise(self):
+        """放回增量也失敗時只記錄日誌"""
+        counter = InMemoryViewCounter()
+        counter.increment("document", DOCUMENT)
+
+        def restore(counts):
+            raise RuntimeError("redis unavailable")
+
+        counter.restore = restore
+        assert flush_view_counts(counter, FailingSession) == 0
+
+
+class TestViewCountFlusher:
+    """後台寫回線程測試"""
+
+    def test_thread_survives_failures(self):
+        """寫回失敗後線程繼續按間隔運行"""
+        counter = FailingDrainCounter()
+        flusher = ViewCountFlusher(counter, 0.01, FailingSession)
+        flusher.start()
+        try:
+            assert counter.called.wait(2)
+        finally:
+            flusher.stop()
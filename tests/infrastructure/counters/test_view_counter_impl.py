@@ -0,0 +1,79 @@
+import threading
+import uuid
+
+from src.domain.events.document_events import DocumentViewed
+from src.infrastructure.counters.view_counter_impl import (
+    InMemoryViewCounter,
+    group_increments,
+    view_count_handler,
+)
+
+DOCUMENT_A = uuid.UUID("00000000-0000-0000-0000-00000000000a")
+DOCUMENT_B = uuid.UUID("00000000-0000-0000-0000-00000000000b")
+QUESTION = uuid.UUID("00000000-0000-0000-0000-00000000000c")
+
+
+class TestInMemoryViewCounter:
+    """進程內瀏覽計數緩衝測試"""
+
+    def test_increment_returns_pending_count(self):
+        """累加後返回尚未寫回的增量"""
+        counter = InMemoryViewCounter()
+        assert counter.increment("document", DOCUMENT_A) == 1
+        assert counter.increment("document", DOCUMENT_A) == 2
+        assert counter.increment("question", DOCUMENT_A) == 1
+
+    def test_drain_empties_buffer(self):
+        """取出全部增量後緩衝區清空"""
+        counter = InMemoryViewCounter()
+        counter.increment("document", DOCUMENT_A)
+        counter.increment("question", QUESTION, 3)
+        assert counter.drain() == {"document": {DOCUMENT_A: 1}, "question": {QUESTION: 3}}
+        assert counter.drain() == {}
+        assert counter.increment("document", DOCUMENT_A) == 1
+
+    def test_restore_merges_with_new_views(self):
+        """寫回失敗放回的增量與期間的新增量合併"""
+        counter = InMemoryViewCounter()
+        counter.increment("document", DOCUMENT_A, 2)
+        drained = counter.drain()
+        counter.increment("document", DOCUMENT_A)
+        counter.restore(drained)
+        assert counter.drain() == {"document": {DOCUMENT_A: 3}}
+
+    def test_concurrent_increments(self):
+        """多線程同時累加不丟失計數"""
+        counter = InMemoryViewCounter()
+
+        def view():
+            for _ in range(1000):
+                counter.increment("document", DOCUMENT_A)
+
+        threads = [threading.Thread(target=view) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert counter.drain() == {"document": {DOCUMENT_A: 8000}}
+
+
+class TestGroupIncrements:
+    """批量寫回分組測試"""
+
+    def test_same_amount_shares_statement(self):
+        """相同增量的實體合併為一組，組內 ID 有序"""
+        groups = group_increments({DOCUMENT_B: 1, QUESTION: 5, DOCUMENT_A: 1})
+        assert groups == [(1, [DOCUMENT_A, DOCUMENT_B]), (5, [QUESTION])]
+
+    def test_zero_amount_skipped(self):
+        """增量為零的實體不生成語句"""
+        assert group_increments({DOCUMENT_A: 0}) == []
+
+
+def test_document_viewed_event_feeds_buffer():
+    """DocumentViewed 事件計入同一緩衝區"""
+    counter = InMemoryViewCounter()
+    handler = view_count_handler(counter)
+    handler(DocumentViewed(document_id=DOCUMENT_A, viewer_id=None))
+    handler(DocumentViewed(document_id=DOCUMENT_A, viewer_id=None))
+    assert counter.drain() == {"document": {DOCUMENT_A: 2}}